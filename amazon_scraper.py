@@ -1,131 +1,77 @@
-import sqlite3
-import time
-import random
-import re
-from statistics import mean
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-
-# Webdriver
-driver = webdriver.Chrome() 
+import fetcher
+from price_history import ensure_schema
+from page_parser import amazon_prices, average
+from metrics import get_metrics
+from refresh_context import RefreshContext, refresh_store, store_price_saver
 
 # Database config
 DB_PATH = "gpus.db"
 TABLE_NAME = "gpus"
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
 
-# Add Column
-try:
-    cursor.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN amazon_new_avg REAL")
-    print(f"Column 'amazon_new_avg' added.")
-except sqlite3.OperationalError:
-    pass # Column already exists, proceed.
+# Fetch backend: "http" (concurrent, Selenium only as fallback) or "selenium" (one browser, fetch and parse pipelined)
+BACKEND = "http"
+
+JOB_SOURCE = "amazon"  # jobs.source for this script
 
-# Reset prices to NULL
-print("Resetting Amazon prices to NULL...")
-cursor.execute(f"UPDATE {TABLE_NAME} SET amazon_new_avg = NULL")
-conn.commit()
+# Only the most stale / volatile GPUs that fit in this many seconds are refreshed (None = all)
+REFRESH_BUDGET = 600
+REFRESH_TOP_K = None
 
-# convert price to float
+RENDER_WAIT = (10, 15)  # Seconds a page gets to render in the browser (to not seem suspicious)
 
-def get_price_float(price_str):
+def build_amazon_url(gpu_name):
     """
-    Converts price to float ($19.99 --> 19.99)
-    
-    :param price_str: Price string ("$19.99")
+    Default-sort Amazon search URL for a GPU.
+
+    :param gpu_name: GPU name
     """
-    try:
-        clean_str = re.sub(r'[^\d.]', '', price_str)
-        return float(clean_str)
-    except ValueError:
-        return None
+    query = f"{gpu_name} graphics card"
+    encoded_query = query.replace(" ", "+")
+    return f"https://www.amazon.com/s?k={encoded_query}"
+
+def amazon_needs_js(html):
+    """True when the page came back without any search results (robot check, JS shell)."""
+    return fetcher.looks_blocked(html) or "s-search-result" not in html
 
-def scrape_amazon_avg(driver, gpu_name):
+def parse_amazon_avg(html, gpu_name):
     """
-    Gets top 5 results for the GPU (default sort) and finds the mean of their prices
-    
-    :param driver: Chrome webdriver
+    Mean of the top 5 valid results from a saved Amazon search page.
+
+    :param html: Search page HTML
     :param gpu_name: GPU name
     """
-    try:
-        query = f"{gpu_name} graphics card"
-        encoded_query = query.replace(" ", "+")
-        url = f"https://www.amazon.com/s?k={encoded_query}"
-        
-        
-        driver.get(url)
-        time.sleep(random.uniform(10, 15)) # To not seem suspicious
-
-        prices = []
-        
-        
-        items = driver.find_elements(By.CSS_SELECTOR, "div.s-result-item[data-component-type='s-search-result']")
-        
-        for item in items:
-
-            full_text = item.text.lower()
-            
-            # Skip Refurbished/Renewed stuff
-            if "renewed" in full_text or "refurbished" in full_text:
-                continue
-
-            # Skip sponsored stuff
-            if "sponsored" in full_text:
-                continue
-
-            search_words = gpu_name.lower().split()
-            if not all(word in full_text for word in search_words if word not in ["geforce", "radeon", "nvidia", "amd"]):
-                 continue
-            
-            # Get price
-            try:
-                price_element = item.find_element(By.CSS_SELECTOR, ".a-price .a-offscreen")
-                price_text = price_element.get_attribute("textContent")
-                prices.append(get_price_float(price_text))
-            except:
-                continue # No price on this item, move to next
-            
-            if len(prices) >= 5:
-                break
-                
-        if not prices:
-            return None
-            
-        return round(mean(prices), 2)
-
-    except Exception as e:
-        print(f"  Error scraping Amazon: {e}")
-        return None
+    prices = amazon_prices(html, gpu_name)
+    get_metrics().incr("items_parsed", len(prices))
+    return average(prices)
 
+save_price = store_price_saver("amazon", "new", "Amazon Avg (New)")
 
-# Main
 
-# Select all GPUs
-cursor.execute(f"SELECT name FROM {TABLE_NAME}")
-rows = cursor.fetchall()
-gpu_names = [r[0] for r in rows]
-
-print(f"Found {len(gpu_names)} GPUs to update.")
-
-for i, name in enumerate(gpu_names):
-    print(f"[{i+1}/{len(gpu_names)}] Processing: {name}")
-    
-    amazon_price = scrape_amazon_avg(driver, name)
-    
-    if amazon_price is not None:
-        print(f"  -> Amazon Avg (New): ${amazon_price}")
-        
-        # Only update if we actually found a price
-        cursor.execute(f"UPDATE {TABLE_NAME} SET amazon_new_avg = ? WHERE name = ?", (amazon_price, name))
-        conn.commit()
-    else:
-        print(f"  -> No valid prices found. Keeping as NULL.")
-    
-    # Sleep
-    sleep_time = random.uniform(10, 15)
-    time.sleep(sleep_time)
-
-conn.close()
-driver.quit()
-print("Pricing update complete.")
\ No newline at end of file
+def refresh(ctx, backend=BACKEND, top_k=REFRESH_TOP_K):
+    """
+    Scrapes the GPUs that are due within the context's time budget. Returns the run id.
+
+    :param ctx: refresh_context.RefreshContext (writer, job queue, driver pool, budget)
+    :param backend: "http" or "selenium"
+    :param top_k: Refresh at most this many GPUs (None = as many as fit the budget)
+    """
+    return refresh_store(ctx, JOB_SOURCE, "Amazon", build_amazon_url, parse_amazon_avg, amazon_needs_js,
+                         save_price, backend, top_k, render_wait=RENDER_WAIT)
+
+# Main
+def main():
+    # Prices are buffered and committed in batches; closing the context (even on Ctrl-C) flushes them
+    ctx = RefreshContext(DB_PATH, workers=1, budget=REFRESH_BUDGET)
+    run_id = None
+    try:
+        # Prices are appended to price_observations; the old column is only a fallback in the view
+        conn = ctx.connect()
+        ensure_schema(conn)
+        conn.close()
+        run_id = refresh(ctx)
+    finally:
+        ctx.finish("amazon_scraper", run_id)
+    print("Pricing update complete.")
+
+if __name__ == "__main__":
+    main()
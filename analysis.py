@@ -1,8 +1,11 @@
 import sqlite3
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
 import sys
+import threading
+import heapq
+from db_writer import data_version
+from price_history import has_history
 
 # --- CONFIGURATION ---
 ANCHOR_FPS_1080P = 64
@@ -11,103 +14,243 @@ ANCHOR_FPS_4K = 44.2
 
 DB_PATH = "gpus.db"
 
-def get_raw_data():
-    """Simple fetch from DB using a local connection"""
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-        SELECT name, launch_prices, new_avg, ebay_used_avg, rel_performance, tier, driver_support
-        FROM gpus
-        WHERE rel_performance IS NOT NULL
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+# --- MATERIALIZED RESULT ---
+# Rows of gpus_analyzed / the Arrow snapshot; built by analysis_maintenance
+ANALYZED_COLUMNS = ['name', 'launch_prices', 'new_avg', 'ebay_used_avg', 'rel_performance', 'tier', 'support',
+                    'active_price', '1080p Ultra', '1440p Ultra', '4K Ultra', 'Value 1080p', 'Value 1440p', 'Value 4K']
+TEXT_COLUMNS = ['name', 'tier', 'support']
+
 
-def update_gpu_tiers():
+def analyzed_signature(conn):
+    # Anything that changes every row at once forces a full rebuild
+    return f"{ANCHOR_FPS_1080P}|{ANCHOR_FPS_1440P}|{ANCHOR_FPS_4K}|history={has_history(conn)}"
+
+
+def is_analyzed_current(conn):
     """
-    Calculates K-Means clustering and saves 'tier' to the database.
-    Run this function manually or via main block to update tiers.
+    Read-only check: True when gpus_analyzed needs no refresh (no GPU queued in
+    gpus_dirty and the stored derivation signature matches).
+
+    :param conn: sqlite3 connection to gpus.db
     """
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Get Data
-    df = pd.read_sql_query("SELECT name, rel_performance FROM gpus WHERE rel_performance IS NOT NULL", conn)
-    
-    if df.empty:
-        print("No performance data found! Run the benchmark scraper first.")
-        conn.close()
-        return
-
-    # Run K-Means
-    X = df[['rel_performance']]
-    kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
-    df['cluster'] = kmeans.fit_predict(X)
-
-    # Sort clusters
-    cluster_means = df.groupby('cluster')['rel_performance'].mean().sort_values()
-    tier_names = ['Low', 'Low-Mid','High-Mid', 'High', 'Ultra-High']
-    label_map = {old_label: new_name for old_label, new_name in zip(cluster_means.index, tier_names)}
-    df['tier'] = df['cluster'].map(label_map)
-
-    # Save back to SQLite
-    print("-" * 30)
-    print("Classifying GPUs...")
-    
     try:
-        conn.execute("ALTER TABLE gpus ADD COLUMN tier TEXT")
+        if conn.execute("SELECT 1 FROM gpus_dirty LIMIT 1").fetchone():
+            return False
+        row = conn.execute("SELECT value FROM meta WHERE key = 'analyzed_signature'").fetchone()
     except sqlite3.OperationalError:
-        pass 
-
-    # Update rows
-    count = 0
-    for index, row in df.iterrows():
-        conn.execute("UPDATE gpus SET tier = ? WHERE name = ?", (row['tier'], row['name']))
-        count += 1
-        
-    conn.commit()
-    conn.close()
-    print(f"Updated {count} GPUs with new tiers.")
+        # Tables not created yet
+        return False
+    return row is not None and row[0] == analyzed_signature(conn)
 
 
-def get_analyzed_df():
+def get_analyzed_df(with_total=False):
     """
     Returns the fully processed dataframe for the Dashboard.
+    Reads gpus_analyzed after recomputing only the GPUs that changed since the last call.
+
+    :param with_total: Return (df, number of GPUs in the DB), counted in the same query
+    """
+    conn = sqlite3.connect(DB_PATH)
+    if not is_analyzed_current(conn):
+        # Maintenance code (and its write transaction) only when the table is stale
+        from analysis_maintenance import ensure_analyzed_schema, refresh_analyzed
+        ensure_analyzed_schema(conn)
+        refresh_analyzed(conn)
+    df = pd.read_sql_query("""
+        SELECT a.*, (SELECT COUNT(*) FROM gpus) AS total_count
+        FROM gpus_analyzed a ORDER BY a.id
+    """, conn)
+    total_count = int(df['total_count'].iloc[0]) if len(df) else conn.execute("SELECT COUNT(*) FROM gpus").fetchone()[0]
+    conn.close()
+
+    df = df.drop(columns=['id', 'total_count'])
+    for col in ANALYZED_COLUMNS:
+        if col not in TEXT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return (df, total_count) if with_total else df
+
+# --- CACHED PER DATA VERSION ---
+RESOLUTION_COLUMNS = {"1080p": "1080p Ultra", "1440p": "1440p Ultra", "4K": "4K Ultra"}
+
+_cache_lock = threading.RLock()
+_cache = {}  # name -> (data version, value)
+
+
+def _cached(name, build, version=None):
+    """Returns build()'s result, rebuilt only when meta.data_version moves."""
+    version = data_version(DB_PATH) if version is None else version
+    with _cache_lock:
+        hit = _cache.get(name)
+        if hit is None or hit[0] != version:
+            hit = (version, build())
+            _cache[name] = hit
+        return hit[1]
+
+
+class ValueIndex:
+    """
+    Answers "top-k cheapest cost per frame with FPS >= t" per resolution without
+    filtering or sorting the dataframe.
+
+    Rows are sorted by FPS once, so FPS >= t is a suffix found by binary search;
+    a sparse table over cost per frame gives the minimum of any range in O(1),
+    and the k cheapest are pulled out of that suffix with a small heap
+    (O(log n + k log k) per query).
+    """
+
+    def __init__(self, df, columns=RESOLUTION_COLUMNS):
+        """
+        :param df: get_analyzed_df() output
+        :param columns: {resolution: FPS column}
+        """
+        self.df = df
+        self._by_res = {}
+        price = df['active_price'].to_numpy(dtype=float)
+        for res, col in columns.items():
+            fps = df[col].to_numpy(dtype=float)
+            rows = np.flatnonzero(np.isfinite(fps) & np.isfinite(price) & (fps > 0))
+            rows = rows[np.argsort(fps[rows], kind="stable")]
+            cost = price[rows] / fps[rows]
+            self._by_res[res] = (col, fps[rows], rows, cost, self._sparse_table(cost))
+
+    @staticmethod
+    def _sparse_table(cost):
+        # levels[j][i] = position of the minimum of cost[i : i + 2**j]
+        levels = [np.arange(len(cost))]
+        span = 1
+        while 2 * span <= len(cost):
+            prev = levels[-1]
+            left, right = prev[:-span], prev[span:]
+            levels.append(np.where(cost[left] <= cost[right], left, right))
+            span *= 2
+        return levels
+
+    def _argmin(self, cost, levels, lo, hi):
+        j = (hi - lo + 1).bit_length() - 1
+        a, b = levels[j][lo], levels[j][hi - (1 << j) + 1]
+        return int(a) if cost[a] <= cost[b] else int(b)
+
+    def top_k(self, resolution, min_fps, k=5):
+        """
+        Positions (into df) and costs per frame of the k cheapest GPUs reaching min_fps.
+
+        :param resolution: "1080p", "1440p" or "4K"
+        :param min_fps: Minimum estimated FPS
+        :param k: How many
+        """
+        _, fps, rows, cost, levels = self._by_res[resolution]
+        lo, hi = int(np.searchsorted(fps, min_fps, side="left")), len(fps) - 1
+        if lo > hi or k <= 0:
+            return [], []
+
+        m = self._argmin(cost, levels, lo, hi)
+        heap = [(cost[m], m, lo, hi)]
+        positions, costs = [], []
+        while heap and len(positions) < k:
+            c, m, a, b = heapq.heappop(heap)
+            positions.append(int(rows[m]))
+            costs.append(float(c))
+            # The next cheapest is the minimum of the range left or right of this one
+            if a < m:
+                left = self._argmin(cost, levels, a, m - 1)
+                heapq.heappush(heap, (cost[left], left, a, m - 1))
+            if m < b:
+                right = self._argmin(cost, levels, m + 1, b)
+                heapq.heappush(heap, (cost[right], right, m + 1, b))
+        return positions, costs
+
+    def best_value(self, resolution, min_fps, k=5):
+        """Same as top_k, as a k-row dataframe with a 'Cost Per Frame' column (cheapest first)."""
+        positions, costs = self.top_k(resolution, min_fps, k)
+        picks = self.df.iloc[positions].copy()
+        picks['Cost Per Frame'] = costs
+        return picks
+
+
+def get_cached_df(version=None, df=None):
+    """
+    The analyzed dataframe, loaded once per data version and shared by the indexes below.
+
+    :param version: Data version the caller already read (saves one lookup)
+    :param df: That version's dataframe if the caller already has it (e.g. from the snapshot)
+    """
+    def load():
+        if df is not None:
+            return df
+        # The Arrow snapshot when it is current; SQLite only without one
+        import snapshot
+        return snapshot.load_analyzed(version)
+    return _cached("analyzed_df", load, version)
+
+
+def get_value_index(version=None, df=None):
+    """ValueIndex over get_cached_df(), built once per data version."""
+    return _cached("value_index", lambda: ValueIndex(get_cached_df(version, df)), version)
+
+
+def best_value(resolution, min_fps, k=5, version=None, df=None):
+    """
+    Top-k cheapest cost per frame at a resolution with FPS >= min_fps.
+
+    :param resolution: "1080p", "1440p" or "4K"
+    :param min_fps: Minimum estimated FPS
+    :param k: How many
+    :param version: Data version the caller already read (saves one lookup)
+    :param df: That version's dataframe if already loaded (no second load)
+    """
+    return get_value_index(version, df).best_value(resolution, min_fps, k)
+
+def pareto_frontier(price, perf):
+    """
+    Boolean mask of the price/performance Pareto frontier: points that no other
+    point beats on both price (lower) and performance (higher).
+
+    Sort by price (best performance first on ties) and sweep, keeping the best
+    performance seen so far; a point is on the frontier if it beats it. O(n log n).
+
+    :param price: Array of prices
+    :param perf: Array of performance values
+    """
+    price = np.asarray(price, dtype=float)
+    perf = np.asarray(perf, dtype=float)
+    order = np.lexsort((-perf, price))
+    sorted_perf = perf[order]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(sorted_perf)[:-1]))
+    mask = np.zeros(len(price), dtype=bool)
+    mask[order[sorted_perf > best_before]] = True
+    return mask
+
+
+def frontier_flags(df, price_col='active_price', perf_col='rel_performance'):
+    """
+    Frontier flags for every row of df: 'on_frontier' (whole market) and
+    'on_tier_frontier' (within its tier).
+    """
+    price = df[price_col].to_numpy(dtype=float)
+    perf = df[perf_col].to_numpy(dtype=float)
+    flags = pd.DataFrame({'on_frontier': pareto_frontier(price, perf),
+                          'on_tier_frontier': False}, index=df.index)
+    tier_frontier = flags['on_tier_frontier'].to_numpy().copy()
+    for _, rows in df.groupby('tier', dropna=False).indices.items():
+        tier_frontier[rows] = pareto_frontier(price[rows], perf[rows])
+    flags['on_tier_frontier'] = tier_frontier
+    return flags
+
+
+def get_frontier(version=None, df=None):
+    """
+    get_cached_df() plus frontier flags, computed once per data version.
+    Frontier rows sorted by price trace the efficiency line.
+
+    :param version: Data version the caller already read
+    :param df: That version's dataframe if already loaded
     """
-    df = get_raw_data()
-    if 'driver_support' in df.columns:
-        df['support'] = df['driver_support'].fillna("Unknown")
-        df = df.drop(columns=['driver_support'])
-    else:
-        df['support'] = "N/A"
-
-    # Price Strategy: Prefer eBay -> Amazon -> MSRP
-    # Create a clean 'active_price' column
-    # Ensure columns are numeric before math
-    df['ebay_used_avg'] = pd.to_numeric(df['ebay_used_avg'], errors='coerce')
-    df['new_avg'] = pd.to_numeric(df['new_avg'], errors='coerce')
-    df['launch_prices'] = pd.to_numeric(df['launch_prices'], errors='coerce')
-
-    df['active_price'] = df['ebay_used_avg'].fillna(df['new_avg']).fillna(df['launch_prices'])
-    
-    # Remove invalid rows (Free or Broken data)
-    df = df[df['active_price'] > 50] 
-
-    # Calculate Estimated FPS
-    ratio = df['rel_performance'] / 100.0
-    
-    df['1080p Ultra'] = ratio * ANCHOR_FPS_1080P
-    df['1440p Ultra'] = ratio * ANCHOR_FPS_1440P
-    df['4K Ultra'] = ratio * ANCHOR_FPS_4K
-
-    # Calculate "Value" (Cost per Frame)
-    df['Value 1080p'] = df['active_price'] / df['1080p Ultra']
-    df['Value 1440p'] = df['active_price'] / df['1440p Ultra']
-    df['Value 4K'] = df['active_price'] / df['4K Ultra']
-
-    
-    
-    return df
+    def build():
+        frame = get_cached_df(version, df)
+        return frame.join(frontier_flags(frame))
+    return _cached("frontier", build, version)
 
 # Only run the update if this file is executed directly
 if __name__ == "__main__":
+    from analysis_maintenance import update_gpu_tiers
     update_gpu_tiers()
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Maintenance path of the analysis: raw SQL reads, the derived columns, the
+gpus_analyzed table with its dirty-row triggers, and the tier update.
+
+Kept out of analysis.py so processes that only read analyzed data (the
+dashboard, the API) never import the derivation or tiering code.
+analysis.get_analyzed_df imports this module only when it has to refresh
+gpus_analyzed. Configuration (DB_PATH, the FPS anchors) stays in analysis.
+"""
+import sqlite3
+
+import pandas as pd
+
+import analysis
+from db_writer import BatchWriter, META_TABLE
+from price_history import has_history
+
+# gpus_analyzed holds derive_columns() output. Triggers put a GPU in gpus_dirty whenever
+# a scraper writes its prices, performance or tier, and only those rows are recomputed.
+WATCHED_COLUMNS = ['launch_prices', 'new_avg', 'ebay_used_avg', 'rel_performance', 'tier', 'driver_support']
+
+
+def get_raw_data(conn=None, dirty_only=False):
+    """
+    Simple fetch from DB (uses a local connection unless one is given)
+
+    :param conn: Open sqlite3 connection
+    :param dirty_only: Only GPUs listed in gpus_dirty
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(analysis.DB_PATH)
+    if has_history(conn):
+        # Latest observed price per source (falls back to the old columns)
+        query = """
+            SELECT g.rowid AS id, g.name, g.launch_prices, p.new_avg, p.ebay_used_avg, g.rel_performance, g.tier, g.driver_support
+            FROM gpus g
+            JOIN gpu_prices_latest p ON p.name = g.name
+            WHERE g.rel_performance IS NOT NULL
+        """
+    else:
+        query = """
+            SELECT g.rowid AS id, g.name, g.launch_prices, g.new_avg, g.ebay_used_avg, g.rel_performance, g.tier, g.driver_support
+            FROM gpus g
+            WHERE g.rel_performance IS NOT NULL
+        """
+    if dirty_only:
+        query += " AND g.name IN (SELECT name FROM gpus_dirty)"
+    df = pd.read_sql_query(query, conn)
+    if own_conn:
+        conn.close()
+    return df
+
+def update_gpu_tiers():
+    """
+    Splits GPUs into 5 tiers by rel_performance (exact 1-D k-means) and saves 'tier' to the database.
+    Run this function manually or via main block to update tiers.
+    """
+    conn = sqlite3.connect(analysis.DB_PATH)
+
+    try:
+        conn.execute("ALTER TABLE gpus ADD COLUMN tier TEXT")
+    except sqlite3.OperationalError:
+        pass
+
+    # Get Data
+    df = pd.read_sql_query("SELECT name, rel_performance, tier AS old_tier FROM gpus WHERE rel_performance IS NOT NULL", conn)
+    conn.close()
+
+    if df.empty:
+        print("No performance data found! Run the benchmark scraper first.")
+        return
+
+    # Globally optimal segmentation of the sorted scores (deterministic, no restarts)
+    from tiering import Tiering
+    model = Tiering(df['rel_performance'])
+    df['tier'] = model.labels(df['rel_performance'])
+
+    print("-" * 30)
+    print("Classifying GPUs...")
+
+    # Only rows whose tier moved are written (and marked dirty for the analyzed table)
+    changed = df[df['tier'] != df['old_tier']]
+    with BatchWriter(analysis.DB_PATH, flush_interval=0) as writer:
+        writer.executemany("UPDATE gpus SET tier = ? WHERE name = ?", zip(changed['tier'], changed['name']))
+
+    print(f"Tier cut points: {', '.join(f'{b:g}' for b in model.bounds)}")
+    print(f"Updated {len(changed)} of {len(df)} GPUs with new tiers.")
+
+
+def derive_columns(df):
+    """
+    Adds active price, estimated FPS and Value columns to raw rows (drops unusable ones).
+    """
+    if 'driver_support' in df.columns:
+        df['support'] = df['driver_support'].fillna("Unknown")
+        df = df.drop(columns=['driver_support'])
+    else:
+        df['support'] = "N/A"
+
+    # Price Strategy: Prefer eBay -> Amazon -> MSRP
+    # Create a clean 'active_price' column
+    # Ensure columns are numeric before math
+    df['ebay_used_avg'] = pd.to_numeric(df['ebay_used_avg'], errors='coerce')
+    df['new_avg'] = pd.to_numeric(df['new_avg'], errors='coerce')
+    df['launch_prices'] = pd.to_numeric(df['launch_prices'], errors='coerce')
+
+    df['active_price'] = df['ebay_used_avg'].fillna(df['new_avg']).fillna(df['launch_prices'])
+    
+    # Remove invalid rows (Free or Broken data)
+    df = df[df['active_price'] > 50] 
+
+    # Calculate Estimated FPS
+    ratio = df['rel_performance'] / 100.0
+    
+    df['1080p Ultra'] = ratio * analysis.ANCHOR_FPS_1080P
+    df['1440p Ultra'] = ratio * analysis.ANCHOR_FPS_1440P
+    df['4K Ultra'] = ratio * analysis.ANCHOR_FPS_4K
+
+    # Calculate "Value" (Cost per Frame)
+    df['Value 1080p'] = df['active_price'] / df['1080p Ultra']
+    df['Value 1440p'] = df['active_price'] / df['1440p Ultra']
+    df['Value 4K'] = df['active_price'] / df['4K Ultra']
+
+    return df
+
+
+def ensure_analyzed_schema(conn):
+    """
+    Creates gpus_analyzed, the gpus_dirty queue and the triggers that fill it.
+
+    :param conn: sqlite3 connection to gpus.db
+    """
+    columns = ", ".join(f'"{c}" {"TEXT" if c in analysis.TEXT_COLUMNS else "REAL"}' for c in analysis.ANALYZED_COLUMNS[1:])
+    conn.execute(f"CREATE TABLE IF NOT EXISTS gpus_analyzed (id INTEGER, name TEXT PRIMARY KEY, {columns})")
+    conn.execute("CREATE TABLE IF NOT EXISTS gpus_dirty (name TEXT PRIMARY KEY)")
+    conn.execute(META_TABLE)
+
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(gpus)")}
+    watched = ", ".join(c for c in WATCHED_COLUMNS if c in existing)
+    triggers = {
+        "gpus_dirty_insert": "AFTER INSERT ON gpus BEGIN INSERT OR IGNORE INTO gpus_dirty VALUES (NEW.name); END",
+        "gpus_dirty_delete": "AFTER DELETE ON gpus BEGIN INSERT OR IGNORE INTO gpus_dirty VALUES (OLD.name); END",
+        "gpus_dirty_update": f"""AFTER UPDATE OF name, {watched} ON gpus BEGIN
+            INSERT OR IGNORE INTO gpus_dirty VALUES (OLD.name);
+            INSERT OR IGNORE INTO gpus_dirty VALUES (NEW.name);
+        END""",
+    }
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'price_observations'").fetchone():
+        triggers["gpus_dirty_observation"] = """AFTER INSERT ON price_observations BEGIN
+            INSERT OR IGNORE INTO gpus_dirty VALUES (NEW.gpu);
+        END"""
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    conn.commit()
+
+
+def refresh_analyzed(conn, full=False):
+    """
+    Recomputes the gpus_analyzed rows of dirty GPUs (all rows if full=True or the
+    derivation changed). Returns how many GPUs were recomputed.
+
+    :param conn: sqlite3 connection to gpus.db (with ensure_analyzed_schema applied)
+    :param full: Rebuild every row
+    """
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        signature = analysis.analyzed_signature(conn)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'analyzed_signature'").fetchone()
+        if full or row is None or row[0] != signature:
+            conn.execute("DELETE FROM gpus_analyzed")
+            conn.execute("INSERT OR IGNORE INTO gpus_dirty SELECT name FROM gpus")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('analyzed_signature', ?)", (signature,))
+
+        count = conn.execute("SELECT COUNT(*) FROM gpus_dirty").fetchone()[0]
+        if count:
+            df = derive_columns(get_raw_data(conn, dirty_only=True))
+            conn.execute("DELETE FROM gpus_analyzed WHERE name IN (SELECT name FROM gpus_dirty)")
+            columns = ["id"] + analysis.ANALYZED_COLUMNS
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            conn.executemany(
+                f"INSERT INTO gpus_analyzed ({quoted}) VALUES ({', '.join('?' * len(columns))})",
+                df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None),
+            )
+            conn.execute("DELETE FROM gpus_dirty")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return count
+
+
+if __name__ == "__main__":
+    update_gpu_tiers()
@@ -0,0 +1,250 @@
+"""
+JSON query API over analysis.get_analyzed_df().
+
+A small asyncio HTTP/1.1 server (keep-alive, GET only) for programmatic clients.
+All queries are answered from an in-memory snapshot: the analyzed dataframe,
+per-GPU JSON rows, a ValueIndex and a name resolver. A background task polls
+meta.data_version and builds a new snapshot off the event loop when it moves;
+the swap is a single reference assignment, so a request always sees one
+consistent version.
+
+Endpoints:
+    GET /health                                    version and GPU counts
+    GET /gpus/<name>                               one GPU (name is resolved like the scrapers do)
+    GET /compare?names=A,B,C                       head-to-head, deltas against the first GPU
+    GET /best-value?resolution=1440p&fps=60&k=5    cheapest cost per frame reaching the target
+    GET /tiers                                     tiers with GPU counts
+    GET /tiers/<tier>                              GPUs in a tier, fastest first
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8765] [--db gpus.db]
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import analysis
+import snapshot
+from db_writer import data_version
+from gpu_resolver import GPUResolver
+
+# --- CONFIGURATION ---
+HOST = "127.0.0.1"
+PORT = 8765
+POLL_INTERVAL = 2.0   # Seconds between data_version checks
+MAX_K = 100
+MAX_COMPARE = 10
+COMPARE_COLUMNS = ['active_price', '1080p Ultra', '1440p Ultra', '4K Ultra']
+
+
+def _clean(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+class Snapshot:
+    """Everything the endpoints read, built once per data version and never mutated."""
+
+    def __init__(self, version, df):
+        self.version = version
+        self.df = df
+        self.built_at = time.time()
+        self.rows = {rec['name']: {k: _clean(v) for k, v in rec.items()} for rec in df.to_dict("records")}
+        self.value_index = analysis.ValueIndex(df)
+        self.resolver = GPUResolver(self.rows)
+        self.tiers = {}
+        for rec in sorted(self.rows.values(), key=lambda r: -(r['rel_performance'] or 0)):
+            self.tiers.setdefault(rec['tier'] or "Unknown", []).append(rec['name'])
+
+    @classmethod
+    def load(cls):
+        version = data_version(analysis.DB_PATH)
+        return cls(version, snapshot.load_analyzed(version))
+
+    def find(self, name):
+        if name in self.rows:
+            return self.rows[name]
+        resolved = self.resolver.resolve(name)
+        return self.rows.get(resolved) if resolved else None
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- ENDPOINTS ---
+def health(snap, path, query):
+    return {"version": snap.version, "gpus": len(snap.rows), "built_at": snap.built_at}
+
+
+def gpu(snap, path, query):
+    name = unquote(path[len("/gpus/"):])
+    row = snap.find(name)
+    if row is None:
+        raise HTTPError(404, f"GPU not found: {name}")
+    return row
+
+
+def compare(snap, path, query):
+    names = [n.strip() for n in query.get("names", [""])[0].split(",") if n.strip()]
+    if not names or len(names) > MAX_COMPARE:
+        raise HTTPError(400, f"names must list 1-{MAX_COMPARE} GPUs")
+    rows = []
+    for name in names:
+        row = snap.find(name)
+        if row is None:
+            raise HTTPError(404, f"GPU not found: {name}")
+        rows.append(row)
+
+    baseline = rows[0]
+    result = []
+    for row in rows:
+        deltas = {}
+        for col in COMPARE_COLUMNS:
+            base, val = baseline[col], row[col]
+            deltas[col] = round((val - base) / base * 100, 1) if base and val is not None else None
+        result.append({"gpu": row, "delta_pct": deltas})
+    return {"baseline": baseline['name'], "gpus": result}
+
+
+def best_value(snap, path, query):
+    resolution = query.get("resolution", ["1080p"])[0]
+    if resolution not in analysis.RESOLUTION_COLUMNS:
+        raise HTTPError(400, f"resolution must be one of {', '.join(analysis.RESOLUTION_COLUMNS)}")
+    try:
+        fps = float(query.get("fps", ["60"])[0])
+        k = min(int(query.get("k", ["5"])[0]), MAX_K)
+    except ValueError:
+        raise HTTPError(400, "fps and k must be numbers")
+
+    names = snap.df['name'].to_numpy()
+    positions, costs = snap.value_index.top_k(resolution, fps, k)
+    return {
+        "resolution": resolution,
+        "min_fps": fps,
+        "gpus": [dict(snap.rows[names[p]], cost_per_frame=round(c, 4)) for p, c in zip(positions, costs)],
+    }
+
+
+def tiers(snap, path, query):
+    tier = unquote(path[len("/tiers/"):]) if path.startswith("/tiers/") else None
+    if tier is None:
+        return {"tiers": [{"tier": t, "gpus": len(names)} for t, names in snap.tiers.items()]}
+    if tier not in snap.tiers:
+        raise HTTPError(404, f"Unknown tier: {tier}")
+    return {"tier": tier, "gpus": [snap.rows[n] for n in snap.tiers[tier]]}
+
+
+def route(path):
+    if path == "/health":
+        return health
+    if path.startswith("/gpus/"):
+        return gpu
+    if path == "/compare":
+        return compare
+    if path == "/best-value":
+        return best_value
+    if path == "/tiers" or path.startswith("/tiers/"):
+        return tiers
+    return None
+
+
+# --- SERVER ---
+class APIServer:
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.snapshot = None
+        self.requests = 0
+
+    async def refresh_forever(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                version = await asyncio.to_thread(data_version, analysis.DB_PATH)
+                if version != self.snapshot.version:
+                    snap = await asyncio.to_thread(Snapshot.load)
+                    self.snapshot = snap  # Atomic swap; in-flight requests keep their snapshot
+                    print(f"Snapshot swapped to data version {snap.version} ({len(snap.rows)} GPUs).")
+            except Exception as e:
+                print(f"    [!] Snapshot refresh failed: {e}")
+
+    def respond(self, target):
+        parts = urlsplit(target)
+        handler = route(parts.path)
+        if handler is None:
+            return 404, {"error": f"No such endpoint: {parts.path}"}
+        try:
+            return 200, handler(self.snapshot, parts.path, parse_qs(parts.query))
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = (lines[0].split(" ", 2) + ["", ""])[:3]
+                headers = {k.strip().lower(): v.strip() for k, v in
+                           (l.split(":", 1) for l in lines[1:] if ":" in l)}
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                if method != "GET":
+                    status, payload = 405, {"error": "Only GET is supported"}
+                else:
+                    status, payload = self.respond(target)
+                self.requests += 1
+
+                body = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        self.snapshot = await asyncio.to_thread(Snapshot.load)
+        print(f"Loaded data version {self.snapshot.version} ({len(self.snapshot.rows)} GPUs).")
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        refresher = asyncio.create_task(self.refresh_forever())
+        print(f"Serving on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--db", default=analysis.DB_PATH)
+    ap.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Seconds between data version checks")
+    args = ap.parse_args()
+
+    analysis.DB_PATH = args.db
+    try:
+        asyncio.run(APIServer(args.poll).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Load test for api_server.py.
+
+Starts the API server as a subprocess on a copy of the database, then drives it
+from keep-alive connections at a fixed request rate with a mix of lookup,
+compare, best-value and tier queries. Reports achieved throughput and p50/p90/p99
+latency. With --bump, the data version is bumped halfway through so the run
+also covers a snapshot swap under load.
+
+Usage:
+    python bench_api.py [--db gpus.db] [--rate 3000] [--duration 10] [--connections 32] [--bump]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+import analysis
+from db_writer import BatchWriter
+
+PORT = 8799
+
+
+def request_mix(names, tiers):
+    rand = random.Random(0)
+    while True:
+        roll = rand.random()
+        if roll < 0.35:
+            yield f"/gpus/{quote(rand.choice(names))}"
+        elif roll < 0.6:
+            yield f"/best-value?resolution={rand.choice(['1080p', '1440p', '4K'])}&fps={rand.randint(30, 150)}&k=5"
+        elif roll < 0.85:
+            yield "/compare?names=" + ",".join(quote(n) for n in rand.sample(names, 3))
+        elif roll < 0.95:
+            yield f"/tiers/{quote(rand.choice(tiers))}"
+        else:
+            yield "/tiers"
+
+
+async def get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.decode("latin-1").split("\r\n"):
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    await reader.readexactly(length)
+    return int(head.split(b" ", 2)[1])
+
+
+async def run_load(rate, duration, connections, paths):
+    latencies, errors = [], 0
+    interval = connections / rate   # Each connection sends one request per interval
+    deadline = time.perf_counter() + duration
+
+    async def worker(offset):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+        next_at = time.perf_counter() + offset
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = time.perf_counter()
+            status = await get(reader, writer, next(paths))
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+            next_at += interval
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i * interval / connections) for i in range(connections)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def bump_version(db_path):
+    with BatchWriter(db_path, flush_interval=0) as writer:
+        writer.execute("UPDATE gpus SET new_avg = new_avg WHERE rowid = (SELECT MIN(rowid) FROM gpus)")
+
+
+def wait_for_server(proc):
+    for _ in range(200):
+        if proc.poll() is not None:
+            sys.exit("API server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    sys.exit("API server did not come up")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default="gpus.db")
+    ap.add_argument("--rate", type=int, default=3000, help="Target requests per second")
+    ap.add_argument("--duration", type=float, default=10)
+    ap.add_argument("--connections", type=int, default=32)
+    ap.add_argument("--bump", action="store_true", help="Bump the data version halfway through")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "gpus.db")
+    shutil.copy(args.db, db_path)
+    # Query only GPUs the API knows (analyzed rows), so every request should be a 200
+    analysis.DB_PATH = db_path
+    df = analysis.get_analyzed_df()
+    names = df['name'].tolist()
+    tiers = df['tier'].dropna().unique().tolist()
+
+    proc = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_server.py"),
+                             "--port", str(PORT), "--db", db_path, "--poll", "0.5"])
+    try:
+        wait_for_server(proc)
+        if args.bump:
+            threading.Timer(args.duration / 2, bump_version, (db_path,)).start()
+        latencies, errors, elapsed = asyncio.run(
+            run_load(args.rate, args.duration, args.connections, request_mix(names, tiers)))
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"{len(latencies)} requests in {elapsed:.1f}s = {len(latencies) / elapsed:.0f} req/s "
+          f"(target {args.rate}), {errors} errors")
+    print(f"  latency p50 {pct(50):.2f} ms   p90 {pct(90):.2f} ms   p99 {pct(99):.2f} ms   max {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
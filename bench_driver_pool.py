@@ -0,0 +1,149 @@
+"""
+Driver-pool scheduling benchmark with fake drivers (no browser needed).
+
+Runs the price_updater scheduling (4 store pages per GPU, GPUs spread over
+pool_size // 4 workers, per-host limit) for several pool sizes and prints
+GPUs/minute, so the scaling and the point where the host limit takes over
+are visible.
+
+Before timing, it checks the pool offline and exits with an AssertionError if
+one breaks: no driver is lent to two threads at once, no store sees more than
+per_host pages at a time, every page comes back under its own key, and a lazy
+pool only starts the browsers it needs (and quits them all on close).
+
+Usage:
+    python bench_driver_pool.py [--gpus 40] [--latency 0.2] [--per-host 2] [--sizes 4,8,12,16]
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from driver_pool import DriverPool, FakeDriver, HostLimiter, PageFetcher
+from pipeline import Stage, run_pipeline
+from selenium.webdriver.common.by import By
+
+
+def store_urls(model):
+    q = model.replace(" ", "+")
+    return {
+        "amazon": f"https://www.amazon.com/s?k={q}",
+        "newegg": f"https://www.newegg.com/p/pl?d={q}",
+        "bestbuy": f"https://www.bestbuy.com/site/searchpage.jsp?st={q}",
+        "ebay": f"https://www.ebay.com/sch/i.html?_nkw={q}",
+    }
+
+
+def fake_page_text(driver, url):
+    driver.get(url)
+    return driver.find_element(By.TAG_NAME, "body").text
+
+
+def check_pool(per_host=2, size=6):
+    """Offline checks of DriverPool / PageFetcher scheduling on FakeDrivers."""
+    lock = threading.Lock()
+    busy, per_store, peak = set(), Counter(), Counter()
+
+    def tracked_page_text(driver, url):
+        host = urlsplit(url).netloc
+        with lock:
+            assert id(driver) not in busy, "driver lent to two threads at once"
+            busy.add(id(driver))
+            per_store[host] += 1
+            peak[host] = max(peak[host], per_store[host])
+            peak["all"] = max(peak["all"], len(busy))
+        try:
+            return fake_page_text(driver, url)
+        finally:
+            with lock:
+                busy.discard(id(driver))
+                per_store[host] -= 1
+
+    drivers = []
+    def factory():
+        drivers.append(FakeDriver(latency=0.02))
+        return drivers[-1]
+
+    gpus = [f"RTX {4000 + i}" for i in range(12)]
+    with DriverPool(factory, size) as pool:
+        assert pool.started == size
+        pages = PageFetcher(pool, tracked_page_text, HostLimiter(per_host))
+        for model, texts, error in run_pipeline(gpus, [Stage("fetch", lambda m, _: pages.fetch_all(store_urls(m)), 3)]):
+            assert error is None, error
+            assert texts == {key: f"Results for {url}" for key, url in store_urls(model).items()}
+        pages.close()
+    assert all(d.closed for d in drivers) and len(drivers) == size
+    busiest_store = max(peak[h] for h in peak if h != "all")
+    assert busiest_store <= per_host, peak
+    assert peak["all"] > busiest_store, f"stores did not load in parallel: {peak}"
+
+    # Lazy: one browser for one thread at a time, more only under concurrent use
+    drivers.clear()
+    pool = DriverPool(factory, size, lazy=True)
+    assert pool.started == 0
+    for url in store_urls("RTX 4090").values():
+        with pool.driver() as d:
+            fake_page_text(d, url)
+    assert pool.started == 1
+    pages = PageFetcher(pool, fake_page_text, HostLimiter(per_host))
+    pages.fetch_all(store_urls("RTX 4080"))
+    pages.close()
+    assert 1 < pool.started <= 4, pool.started
+
+    # A browser that fails to start does not use up a slot
+    attempts = []
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("chrome failed to start")
+        return factory()
+    flaky_pool = DriverPool(flaky, 1, lazy=True)
+    try:
+        with flaky_pool.driver():
+            pass
+        raise AssertionError("factory error was swallowed")
+    except RuntimeError:
+        pass
+    with flaky_pool.driver() as d:
+        assert isinstance(d, FakeDriver)
+    flaky_pool.close()
+    pool.close()
+    assert all(d.closed for d in drivers)
+    print("pool checks OK")
+
+
+def run(size, gpus, latency, per_host):
+    with DriverPool(lambda: FakeDriver(latency=latency), size) as pool:
+        pages = PageFetcher(pool, fake_page_text, HostLimiter(per_host))
+        workers = max(1, size // 4)
+        start = time.perf_counter()
+        fetch = Stage("fetch", lambda m, _: pages.fetch_all(store_urls(m)), workers, queue_size=workers)
+        for model, texts, error in run_pipeline(gpus, [fetch]):
+            if error is not None:
+                raise error
+            assert len(texts) == 4
+        elapsed = time.perf_counter() - start
+        pages.close()
+    return len(gpus) / (elapsed / 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gpus", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake page load time (s)")
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--sizes", default="1,4,8,12,16")
+    args = parser.parse_args()
+
+    check_pool(args.per_host)
+    gpus = [f"RTX {4000 + i}" for i in range(args.gpus)]
+    baseline = None
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rate = run(size, gpus, args.latency, args.per_host)
+        baseline = baseline or rate
+        print(f"pool={size:<3} {rate:8.1f} GPUs/min  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Fetch-engine benchmark against a local stand-in for eBay / Amazon.
+
+Serves saved result pages (or generated ones) from a local HTTP server with
+artificial latency, then scrapes every GPU in gpus.db one at a time ("before")
+and through fetcher.AsyncFetcher ("after"), printing GPUs/minute for both.
+
+Usage:
+    python bench_fetch.py [--pages DIR] [--latency 0.5] [--per-host 4] [--limit 60]
+
+DIR may contain ebay.html and/or amazon.html (saved with "Save Page As").
+
+Before timing, it checks the fetcher offline against the same server and exits
+with an AssertionError if one breaks: cached pages are served from the cache,
+bot-check pages are never cached, and a page that fails to load (or to parse)
+reaches on_result as an error, with or without the browser fallback.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import fetcher
+from amazon_scraper import build_amazon_url, parse_amazon_avg, amazon_needs_js
+from driver_pool import FakeDriver
+from ebay_scraper import build_ebay_url, parse_ebay_sold, ebay_needs_js
+from page_cache import PageCache
+
+DB_PATH = "gpus.db"
+
+BLOCKED_PAGE = "<html><body><h1>Robot Check</h1><p>Enter the captcha below</p></body></html>"
+
+
+def fake_ebay_page(query):
+    cards = "".join(
+        f'<li class="s-card"><div class="s-card__title">{query} {i} Used</div>'
+        f'<span class="s-card__price">${300 + i * 7}.99</span></li>'
+        for i in range(12)
+    )
+    return f"<html><body><ul>{cards}</ul></body></html>"
+
+
+def fake_amazon_page(query):
+    cards = "".join(
+        f'<div class="s-result-item" data-component-type="s-search-result"><h2>{query} {i}</h2>'
+        f'<span class="a-price"><span class="a-offscreen">${400 + i * 11}.00</span></span></div>'
+        for i in range(8)
+    )
+    return f"<html><body>{cards}</body></html>"
+
+
+def make_handler(pages_dir, latency):
+    saved = {}
+    for key in ("ebay", "amazon"):
+        path = os.path.join(pages_dir, f"{key}.html") if pages_dir else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                saved[key] = f.read()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            time.sleep(latency)
+            parts = urlsplit(self.path)
+            qs = parse_qs(parts.query)
+            if parts.path == "/missing":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if parts.path == "/blocked":
+                body = BLOCKED_PAGE
+            elif parts.path.startswith("/sch/"):
+                body = saved.get("ebay") or fake_ebay_page(qs.get("_nkw", [""])[0])
+            else:
+                query = qs.get("k", [""])[0].replace(" graphics card", "")
+                body = saved.get("amazon") or fake_amazon_page(query)
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def load_gpu_names(limit):
+    if os.path.exists(DB_PATH):
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        names = [r[0] for r in conn.execute("SELECT name FROM gpus")]
+        conn.close()
+    else:
+        names = [f"RTX {3000 + i}" for i in range(limit)]
+    return names[:limit]
+
+
+def check_fetcher(base):
+    """Offline checks of AsyncFetcher's caching and error reporting, against the stub server."""
+    urls = {
+        "ok": f"{base}/sch/i.html?_nkw=RTX+4090",
+        "bad": f"{base}/sch/i.html?_nkw=RTX+4080",
+        "blocked": f"{base}/blocked",
+        "missing": f"{base}/missing",
+    }
+
+    def parse(html, key):
+        if key == "bad":
+            raise ValueError("unexpected layout")
+        return len(html)
+
+    def scrape(cache, **kwargs):
+        results = {}
+        f = fetcher.AsyncFetcher(per_host=2, delay=(0, 0), cache=cache, browser_delay=(0, 0), **kwargs)
+        fetcher.scrape_many(list(urls), urls.get, parse, fetcher=f,
+                            on_result=lambda done, key, value, error: results.update({key: (value, error)}))
+        f.close()
+        return results, f.stats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PageCache(os.path.join(tmp, "pages.db"))
+
+        # No fallback: failures and bot checks are reported, only real pages are cached
+        results, stats = scrape(cache)
+        assert results["ok"][0] and results["ok"][1] is None
+        assert results["bad"][0] is None and isinstance(results["bad"][1], ValueError)
+        assert isinstance(results["blocked"][1], fetcher.FetchError) and results["blocked"][0] is None
+        assert isinstance(results["missing"][1], fetcher.FetchError)
+        assert cache.get(urls["ok"]) is not None and cache.get(urls["blocked"]) is None
+        assert stats["http"] == 2 and stats["failed"] == 2, stats
+
+        # Second run: the good pages come from the cache
+        results, stats = scrape(cache)
+        assert stats["cached"] == 2 and stats["http"] == 0, stats
+        assert results["ok"][1] is None
+
+        # Browser fallback still on a robot check: an error, and still not cached
+        still_blocked = {urls["blocked"]: "Robot Check", urls["missing"]: "Robot Check"}
+        results, stats = scrape(cache, driver_factory=lambda: FakeDriver(pages=still_blocked))
+        assert isinstance(results["blocked"][1], fetcher.FetchError)
+        assert stats["selenium"] == 2 and cache.get(urls["blocked"]) is None, stats
+
+        # Browser fallback that renders the page: parsed and cached
+        drivers = []
+        def rendering_driver():
+            drivers.append(FakeDriver(pages=dict.fromkeys(still_blocked, "Rendered results")))
+            return drivers[-1]
+        results, stats = scrape(cache, driver_factory=rendering_driver)
+        assert results["blocked"][1] is None and results["missing"][1] is None
+        assert stats["selenium"] == 2 and len(drivers) == 1 and drivers[0].closed, (stats, drivers)
+        assert "Rendered results" in cache.get(urls["blocked"])
+        cache.close()
+    print("fetcher checks OK")
+
+
+def run(label, names, build_url, parse, needs_js, per_host):
+    f = fetcher.AsyncFetcher(per_host=per_host, delay=(0, 0))
+    start = time.perf_counter()
+    results = fetcher.scrape_many(names, build_url, parse, needs_js=needs_js, fetcher=f)
+    elapsed = time.perf_counter() - start
+    f.close()
+    found = sum(1 for v in results.values() if v is not None)
+    rate = len(names) / (elapsed / 60)
+    print(f"  {label:<8} {rate:8.1f} GPUs/min  ({found}/{len(names)} priced)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory with saved ebay.html / amazon.html")
+    parser.add_argument("--latency", type=float, default=0.5, help="Server-side delay per page (s)")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=60, help="Number of GPUs to scrape")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.pages, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    check_fetcher(base)
+
+    names = load_gpu_names(args.limit)
+    stores = [
+        ("eBay", lambda n: build_ebay_url(n).replace("https://www.ebay.com", base), parse_ebay_sold, ebay_needs_js),
+        ("Amazon", lambda n: build_amazon_url(n).replace("https://www.amazon.com", base), parse_amazon_avg, amazon_needs_js),
+    ]
+
+    for store, build_url, parse, needs_js in stores:
+        print(f"\n{store}: {len(names)} GPUs, {args.latency}s latency per page")
+        before = run("before", names, build_url, parse, needs_js, per_host=1)
+        after = run("after", names, build_url, parse, needs_js, per_host=args.per_host)
+        print(f"  speedup  {after / before:.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
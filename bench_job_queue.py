@@ -0,0 +1,253 @@
+"""
+Job-queue benchmark on a throwaway database.
+
+Several workers, each with its own JobQueue (own connection and lease owner),
+drain one run by leasing and completing jobs, as parallel scraper processes
+would. It prints jobs/second for each worker count and checks that every job
+ends up done exactly once.
+
+Before timing, it checks the queue offline and exits with an AssertionError if
+one breaks: a dead worker's lease expires and another worker takes the job
+over, failures back off exponentially and end in 'failed' after MAX_ATTEMPTS,
+refresh_context.refresh_store fails (rather than completes) the jobs whose
+page could not be loaded and retries them, on both backends (the http one
+leasing a bounded batch at a time), and the scheduler's per-GPU cost
+stays per source when sources share a run id.
+
+Usage:
+    python bench_job_queue.py [--jobs 500] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import job_queue
+import page_cache
+import refresh_context
+from driver_pool import FakeDriver
+from job_queue import MAX_ATTEMPTS, JobQueue
+from page_cache import PageCache
+from refresh_context import RefreshContext, refresh_store
+from refresh_scheduler import seconds_per_gpu
+
+
+def make_db(path, gpus):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE gpus (name TEXT PRIMARY KEY, tier TEXT)")
+    conn.execute("CREATE TABLE bench_prices (gpu TEXT, source TEXT, price REAL)")
+    conn.executemany("INSERT INTO gpus (name) VALUES (?)", [(g,) for g in gpus])
+    conn.commit()
+    conn.close()
+
+
+def job_row(db_path, run_id, gpu, source):
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("""
+        SELECT state, attempts, next_attempt_at, lease_owner, last_error FROM jobs
+        WHERE run_id = ? AND gpu = ? AND source = ?
+    """, (run_id, gpu, source)).fetchone()
+    conn.close()
+    return row
+
+
+def states(db_path, run_id, source):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT state, COUNT(*) FROM jobs WHERE run_id = ? AND source = ? GROUP BY state",
+                        (run_id, source)).fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def check_queue(tmp):
+    """Offline checks of leases, lease expiry and backoff."""
+    db_path = os.path.join(tmp, "queue.db")
+    gpus = [f"RTX {4000 + i}" for i in range(4)]
+    make_db(db_path, gpus)
+    dead = JobQueue(db_path, owner="dead", lease_seconds=0.05)
+    live = JobQueue(db_path, owner="live")
+
+    run_id, resumed = live.open_run("bench", gpus)
+    assert not resumed and live.open_run("bench", gpus) == (run_id, True)
+
+    # Leases are exclusive while they last
+    first = dead.lease(run_id, "bench", limit=2)
+    rest = live.lease(run_id, "bench", limit=None)
+    assert {j.gpu for j in first} | {j.gpu for j in rest} == set(gpus)
+    assert not {j.gpu for j in first} & {j.gpu for j in rest}
+
+    # A worker that died: its leases expire and go to the next worker, and its
+    # late complete() does not touch the job it no longer holds
+    time.sleep(0.1)
+    taken = live.lease(run_id, "bench", limit=None)
+    assert sorted(j.gpu for j in taken) == sorted(j.gpu for j in first)
+    dead.complete(first[0])
+    state, _, _, owner, _ = job_row(db_path, run_id, first[0].gpu, "bench")
+    assert (state, owner) == ("leased", "live")
+    for job in rest + taken[1:]:
+        live.complete(job)
+
+    # Failures back off exponentially, then the job is marked failed
+    job = taken[0]
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        before = time.time()
+        live.fail(job, RuntimeError(f"attempt {attempt} failed"))
+        state, attempts, next_at, owner, error = job_row(db_path, run_id, job.gpu, "bench")
+        assert attempts == attempt and owner is None and error == f"attempt {attempt} failed"
+        if attempt < MAX_ATTEMPTS:
+            delay = job_queue.BACKOFF_BASE * 2 ** (attempt - 1)
+            assert state == "pending" and before + delay <= next_at <= time.time() + delay * 1.25
+            assert live.lease(run_id, "bench") == [], "job leased during its backoff"
+            # Skip the wait
+            live.conn.execute("UPDATE jobs SET next_attempt_at = 0 WHERE id = ?", (job.id,))
+            (job,) = live.lease(run_id, "bench")
+        else:
+            assert state == "failed"
+    assert live.counts(run_id) == {"done": 3, "failed": 1}
+    assert list(live.iter_jobs(run_id, "bench")) == []
+    dead.close()
+    live.close()
+    print("queue checks OK")
+
+
+def check_refresh(tmp):
+    """refresh_store only completes the jobs whose page was loaded and parsed."""
+    db_path = os.path.join(tmp, "refresh.db")
+    gpus = ["RTX 4090", "RTX 4080", "RTX 4070", "RTX 4060"]
+    make_db(db_path, gpus)
+    loads = {}
+
+    class FlakyDriver(FakeDriver):
+        # 4090 is always blocked, 4080 is blocked once and then loads
+        def get(self, url):
+            super().get(url)
+            loads[url] = loads.get(url, 0) + 1
+
+        def _text(self):
+            first_4080 = self.current_url == url("RTX 4080") and loads[self.current_url] == 1
+            blocked = self.current_url == url("RTX 4090") or first_4080
+            return "Robot Check" if blocked else f"{self.current_url} $500"
+
+    def save_price(source):
+        def save(writer, gpu, price, run_id, on_commit):
+            writer.execute("INSERT INTO bench_prices VALUES (?, ?, ?)", (gpu, source, price), on_commit)
+        return save
+
+    def url(gpu):
+        return f"http://bench.invalid/{gpu.replace(' ', '+')}"
+
+    store = dict(build_url=url, parse=lambda html, gpu: 500.0, needs_js=lambda html: "Robot Check" in html)
+    backoff, lease_batch, cache = job_queue.BACKOFF_BASE, refresh_context.HTTP_LEASE_BATCH, page_cache._default
+    job_queue.BACKOFF_BASE = 0.01
+    # Loaded pages go to a throwaway cache, not page_cache.db
+    page_cache._default = PageCache(os.path.join(tmp, "page_cache.db"))
+    ctx = RefreshContext(db_path, workers=1, driver_factory=FlakyDriver)
+    try:
+        # selenium: blocked pages are retried, a page that never loads ends up failed
+        run_id = refresh_store(ctx, "ebay", "Bench", save_price=save_price("ebay"),
+                               backend="selenium", pause=(0, 0), render_wait=(0, 0), **store)
+        ctx.writer.flush()
+        assert states(db_path, run_id, "ebay") == {"done": 3, "failed": 1}, states(db_path, run_id, "ebay")
+        assert loads[url("RTX 4090")] == MAX_ATTEMPTS and loads[url("RTX 4080")] == 2, loads
+        assert "could not load" in job_row(db_path, run_id, "RTX 4090", "ebay")[4]
+        # Blocked pages are not cached, so only the three loaded ones are
+        assert page_cache._default.stats()["pages"] == 3, page_cache._default.stats()
+
+        # http: offline with nothing cached, so every fetch fails; jobs are leased a batch at a
+        # time and retried like on the selenium backend until they are marked failed
+        page_cache._default.close()
+        page_cache._default = PageCache(os.path.join(tmp, "empty_cache.db"), offline=True)
+        refresh_context.HTTP_LEASE_BATCH = 3
+        leased = []
+        fail = ctx.queue.fail
+
+        def counting_fail(job, error):
+            leased.append(states(db_path, job.run_id, "amazon").get("leased", 0))
+            return fail(job, error)
+        ctx.queue.fail = counting_fail
+        run_id = refresh_store(ctx, "amazon", "Bench", save_price=save_price("amazon"), backend="http", **store)
+        ctx.writer.flush()
+        assert states(db_path, run_id, "amazon") == {"failed": len(gpus)}, states(db_path, run_id, "amazon")
+        assert all(job_row(db_path, run_id, g, "amazon")[1] == MAX_ATTEMPTS for g in gpus)
+        assert len(leased) == len(gpus) * MAX_ATTEMPTS and max(leased) <= 3, leased
+    finally:
+        ctx.close()
+        page_cache._default.close()
+        job_queue.BACKOFF_BASE, page_cache._default = backoff, cache
+        refresh_context.HTTP_LEASE_BATCH = lease_batch
+
+    conn = sqlite3.connect(db_path)
+    saved = conn.execute("SELECT source, COUNT(*) FROM bench_prices GROUP BY source").fetchall()
+    conn.close()
+    assert saved == [("ebay", 3)], saved
+    print("refresh checks OK")
+
+
+def check_scheduler(tmp):
+    """seconds_per_gpu keeps sources apart when one refresh gives them a shared run id."""
+    db_path = os.path.join(tmp, "scheduler.db")
+    make_db(db_path, [])
+    q = JobQueue(db_path)
+    gpus = [f"RTX {4000 + i}" for i in range(6)]
+    run_id, _ = q.open_run("ebay", gpus, "refresh-shared")
+    q.open_run("amazon", gpus, run_id)
+    t0 = time.time()
+    # eBay jobs finished 3s apart, Amazon jobs 30s apart
+    q.conn.executemany("UPDATE jobs SET state = 'done', updated_at = ? WHERE source = ? AND gpu = ?",
+                       [(t0 + i * step, source, gpu) for source, step in (("ebay", 3), ("amazon", 30))
+                        for i, gpu in enumerate(gpus)])
+    q.close()
+    conn = sqlite3.connect(db_path)
+    costs = {source: seconds_per_gpu(conn, source) for source in ("ebay", "amazon")}
+    conn.close()
+    assert abs(costs["ebay"] - 15 / 6) < 1e-6 and abs(costs["amazon"] - 150 / 6) < 1e-6, costs
+    print("scheduler checks OK")
+
+
+def run(db_path, jobs, workers):
+    seed = JobQueue(db_path)
+    run_id, _ = seed.open_run(f"bench-{workers}", [f"GPU {i}" for i in range(jobs)], f"bench-{workers}")
+    seen, lock = [], threading.Lock()
+
+    def worker(n):
+        q = JobQueue(db_path, owner=f"worker-{n}")
+        for job in q.iter_jobs(run_id, f"bench-{workers}"):
+            with lock:
+                seen.append(job.gpu)
+            q.complete(job)
+        q.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    assert len(seen) == len(set(seen)) == jobs, f"{len(seen)} leases for {len(set(seen))}/{jobs} jobs"
+    assert seed.counts(run_id) == {"done": jobs}
+    seed.close()
+    return jobs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_queue(tmp)
+        check_refresh(tmp)
+        check_scheduler(tmp)
+        db_path = os.path.join(tmp, "bench.db")
+        make_db(db_path, [])
+        for workers in [int(w) for w in args.workers.split(",")]:
+            rate = run(db_path, args.jobs, workers)
+            print(f"workers={workers:<3} {rate:8.1f} jobs/s")
+
+
+if __name__ == "__main__":
+    main()
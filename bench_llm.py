@@ -0,0 +1,128 @@
+"""
+LLM client benchmark against a local OpenAI-compatible stub server.
+
+The stub answers /v1/chat/completions after a fixed delay with canned JSON
+(arrays keyed by GPU for batched prompts). Reports wall-clock time per 100
+GPUs (two questions each) for:
+  sequential - one blocking call after another, like the old price_updater
+  async      - llm_client.AsyncLLMClient with a concurrency limit
+  batched    - several GPUs packed into one prompt
+
+Usage:
+    python bench_llm.py [--gpus 100] [--latency 1.0] [--concurrency 8] [--batch 5]
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_cache import LLMCache
+from llm_client import AsyncLLMClient, Batcher
+
+NEW_TASK = "Find the best NEW price for each GPU."
+NEW_FIELDS = '"best_price": float, "store": str'
+USED_TASK = "Find the average USED price for each GPU."
+USED_FIELDS = '"average_price": float, "listing_count": int'
+
+
+def stub_answer(prompt):
+    used = "average_price" in prompt
+    one = {"average_price": 310.5, "listing_count": 6} if used else {"best_price": 499.99, "store": "Amazon"}
+    names = re.findall(r'### GPU: "([^"]+)"', prompt)
+    if names:
+        return json.dumps([dict(one, gpu=name) for name in names])
+    return "```json\n" + json.dumps(one) + "\n```"
+
+
+def make_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt = body["messages"][-1]["content"]
+            time.sleep(latency)
+            data = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": stub_answer(prompt)}}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 50,
+                          "total_tokens": len(prompt) // 4 + 50},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def prompts_for(gpu):
+    return (f'{NEW_TASK} GPU "{gpu}". Return "best_price".',
+            f'{USED_TASK} GPU "{gpu}". Return "average_price".')
+
+
+async def run_sequential(llm, gpus):
+    for gpu in gpus:
+        for prompt in prompts_for(gpu):
+            await llm.ask(prompt)
+
+
+async def run_async(llm, gpus):
+    await asyncio.gather(*(llm.ask(p) for gpu in gpus for p in prompts_for(gpu)))
+
+
+async def run_batched(llm, gpus, batch_size):
+    new = Batcher(llm, NEW_TASK, NEW_FIELDS, batch_size=batch_size, wait=0.05)
+    used = Batcher(llm, USED_TASK, USED_FIELDS, batch_size=batch_size, wait=0.05)
+    results = await asyncio.gather(*(b.submit(gpu, "listing text") for gpu in gpus for b in (new, used)))
+    assert all(r is not None for r in results), "batched answers missing"
+
+
+def timed(base_url, concurrency, mode, gpus, batch_size):
+    async def go():
+        llm = AsyncLLMClient(api_key="stub", base_url=base_url, model="stub-model",
+                             concurrency=concurrency, cache=LLMCache(":memory:"))
+        start = time.perf_counter()
+        if mode == "sequential":
+            await run_sequential(llm, gpus)
+        elif mode == "async":
+            await run_async(llm, gpus)
+        else:
+            await run_batched(llm, gpus, batch_size)
+        elapsed = time.perf_counter() - start
+        await llm.close()
+        return elapsed, llm.calls
+    return asyncio.run(go())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gpus", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=1.0, help="Stub response delay (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    gpus = [f"RTX {4000 + i}" for i in range(args.gpus)]
+    for mode in ("sequential", "async", "batched"):
+        elapsed, calls = timed(base_url, args.concurrency, mode, gpus, args.batch)
+        per_100 = elapsed * 100 / len(gpus)
+        print(f"{mode:<11} {per_100:8.1f}s per 100 GPUs  ({calls} API calls)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Listing-parser benchmark: BeautifulSoup (the old HTML path) vs page_parser's lxml.
+
+Generates realistic eBay / Amazon result pages (60 cards each, with junk
+listings, variant cards, sponsored results, missing prices and the inline
+scripts real pages carry), checks both parsers give the same prices and
+prints pages/second, single process and through a process pool.
+
+Usage:
+    python bench_parse.py [--pages 200] [--workers 4]
+"""
+import argparse
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+import page_parser
+
+GPUS = ["GeForce RTX 4070", "GeForce RTX 4070 Ti", "GeForce RTX 3060 12 GB", "Radeon RX 7900 XTX", "Radeon RX 6600"]
+NOISE = ["for parts only", "broken fan", "box only", "Renewed", "Sponsored", "cooler shroud", ""]
+FILLER = "<script>window.__data = {" + ", ".join(f'"k{i}": "{"x" * 40}"' for i in range(200)) + "};</script>"
+
+
+def fake_ebay_page(gpu, rand):
+    cards = []
+    for i in range(60):
+        title = f"{rand.choice(['MSI', 'ASUS', 'Gigabyte'])} {gpu}{rand.choice(['', ' Ti', ' SUPER'])} {rand.choice(NOISE)}"
+        price = "" if rand.random() < 0.1 else f'<span class="s-card__price">${rand.randint(150, 900)}.{rand.randint(0, 99):02d}</span>'
+        cards.append(f'<li class="s-card s-card--horizontal"><div class="s-card__title"><span>{title}</span></div>'
+                     f'<div class="s-card__attribute-row">Pre-Owned</div>{price}</li>')
+    return f"<html><head>{FILLER}</head><body><ul class='srp-results'>{''.join(cards)}</ul></body></html>"
+
+
+def fake_amazon_page(gpu, rand):
+    cards = []
+    for i in range(60):
+        title = f"{rand.choice(['ZOTAC', 'PNY', 'XFX'])} {gpu}{rand.choice(['', ' Ti', ' XT'])} Graphics Card {rand.choice(NOISE)}"
+        price = "" if rand.random() < 0.1 else (f'<span class="a-price"><span class="a-offscreen">${rand.randint(200, 1200)}.99</span>'
+                                              f'<span aria-hidden="true">$...</span></span>')
+        cards.append(f'<div class="s-result-item s-asin" data-component-type="s-search-result">'
+                     f'<h2><span>{title}</span></h2>{price}</div>')
+        if i % 10 == 0:
+            cards.append('<div class="s-result-item" data-component-type="s-ad">Ad</div>')
+    return f"<html><head>{FILLER}</head><body>{''.join(cards)}</body></html>"
+
+
+# --- BEFORE: BeautifulSoup + html.parser ---
+def _price(text):
+    try:
+        return float(re.sub(r'[^\d.]', '', text))
+    except ValueError:
+        return None
+
+
+def bs4_ebay(html, gpu_name):
+    prices = []
+    for item in BeautifulSoup(html, "html.parser").select("li.s-card"):
+        title_el = item.select_one(".s-card__title, .s-item__title")
+        if title_el is None or not page_parser.is_valid_ebay_listing(title_el.get_text(" ", strip=True).lower(), gpu_name):
+            continue
+        price_el = item.select_one(".s-card__price, .s-item__price")
+        val = _price(price_el.get_text(strip=True)) if price_el is not None else None
+        if val is not None:
+            prices.append(val)
+            if len(prices) >= page_parser.EBAY_MAX_SALES:
+                break
+    return prices
+
+
+def bs4_amazon(html, gpu_name):
+    prices = []
+    for item in BeautifulSoup(html, "html.parser").select("div.s-result-item[data-component-type='s-search-result']"):
+        if not page_parser.is_valid_amazon_listing(item.get_text(" ", strip=True).lower(), gpu_name):
+            continue
+        price_el = item.select_one(".a-price .a-offscreen")
+        val = _price(price_el.get_text()) if price_el is not None else None
+        if val is not None:
+            prices.append(val)
+            if len(prices) >= page_parser.AMAZON_MAX_RESULTS:
+                break
+    return prices
+
+
+def _lxml_job(job):
+    store, gpu, html = job
+    return page_parser.STORE_PARSERS[store](html, gpu)
+
+
+def timed(fn, jobs):
+    start = time.perf_counter()
+    out = [fn(html, gpu) for _, gpu, html in jobs]
+    return out, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=200, help="Pages per store")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    rand = random.Random(0)
+    stores = {"ebay": (fake_ebay_page, bs4_ebay), "amazon": (fake_amazon_page, bs4_amazon)}
+    all_jobs = []
+    for store, (make_page, before) in stores.items():
+        jobs = [(store, gpu, make_page(gpu, rand)) for gpu in (rand.choice(GPUS) for _ in range(args.pages))]
+        all_jobs += jobs
+        old, t_old = timed(before, jobs)
+        new, t_new = timed(page_parser.STORE_PARSERS[store], jobs)
+        mismatches = sum(a != b for a, b in zip(old, new))
+        print(f"{store:7s} BeautifulSoup {len(jobs) / t_old:8.1f} pages/s   lxml {len(jobs) / t_new:8.1f} pages/s   "
+              f"({t_old / t_new:.1f}x, {mismatches} mismatches)")
+
+    # Warm the pool up first so process start-up is not counted
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(_lxml_job, all_jobs[:args.workers]))
+        start = time.perf_counter()
+        list(pool.map(_lxml_job, all_jobs, chunksize=16))
+        elapsed = time.perf_counter() - start
+    print(f"lxml on {args.workers} processes: {len(all_jobs) / elapsed:.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Staged pipeline vs per-GPU workers, with fake drivers and a fake LLM.
+
+Every GPU goes through fetch (4 store pages on a DriverPool of FakeDrivers),
+extract (--parse seconds) and judge (--llm seconds). The "sequential" run does
+all three in each of pool_size // 4 workers, as price_updater used to; the
+"pipeline" run gives each step its own workers and bounded queues. It prints
+GPUs/minute for both and the rate the slowest stage allows.
+
+Before timing, it checks the pipeline's contract offline and exits with an
+AssertionError if one breaks: a failing stage only fails its item, an
+exception from the items iterable is raised (after the items in flight), and
+stopping early or failing leaves no pipeline threads running.
+
+Usage:
+    python bench_pipeline.py [--gpus 40] [--latency 0.2] [--parse 0.05] [--llm 0.5] [--pool 8] [--llm-workers 8]
+"""
+import argparse
+import threading
+import time
+
+from driver_pool import DriverPool, FakeDriver, HostLimiter, PageFetcher
+from pipeline import Stage, run_pipeline
+from bench_driver_pool import fake_page_text, store_urls
+
+
+def run(gpus, args, staged):
+    with DriverPool(lambda: FakeDriver(latency=args.latency), args.pool) as pool:
+        pages = PageFetcher(pool, fake_page_text, HostLimiter(args.pool))
+        fetch_workers = max(1, args.pool // 4)
+
+        def fetch(model, _):
+            return pages.fetch_all(store_urls(model))
+
+        def extract(model, texts):
+            time.sleep(args.parse)
+            return texts
+
+        def judge(model, texts):
+            time.sleep(args.llm)
+            return len(texts)
+
+        start = time.perf_counter()
+        if staged:
+            results = run_pipeline(gpus, [Stage("fetch", fetch, fetch_workers, fetch_workers),
+                                          Stage("extract", extract, 1),
+                                          Stage("judge", judge, args.llm_workers)])
+        else:
+            # One stage doing all three steps per GPU
+            results = run_pipeline(gpus, [Stage("scan", lambda m, _: judge(m, extract(m, fetch(m, m))),
+                                                fetch_workers, fetch_workers)])
+        for model, result, error in results:
+            if error is not None:
+                raise error
+            assert result == 4
+        elapsed = time.perf_counter() - start
+        pages.close()
+    return len(gpus) / (elapsed / 60)
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def _wait_for_shutdown(timeout=2.0):
+    deadline = time.time() + timeout
+    while _pipeline_threads() and time.time() < deadline:
+        time.sleep(0.02)
+    assert not _pipeline_threads(), f"threads left running: {[t.name for t in _pipeline_threads()]}"
+
+
+def check_contract():
+    """Offline checks of run_pipeline's error handling and shutdown."""
+    def slow(item, value):
+        time.sleep(0.01)
+        return value
+
+    def fail_on_3(item, value):
+        if item == 3:
+            raise ValueError("bad item")
+        return value * 2
+
+    # A failing stage fails only its item and skips the later stages
+    out = {item: (result, error) for item, result, error in
+           run_pipeline(range(10), [Stage("a", slow, 2, 2), Stage("b", fail_on_3), Stage("c", slow, 3, 1)])}
+    assert sorted(out) == list(range(10))
+    assert isinstance(out[3][1], ValueError) and out[3][0] is None
+    assert all(out[i] == (i * 2, None) for i in out if i != 3)
+    _wait_for_shutdown()
+
+    # The items iterable raising (e.g. a failed lease) surfaces as that exception
+    def leases():
+        yield from range(3)
+        raise RuntimeError("database is locked")
+    seen = []
+    try:
+        for item, result, error in run_pipeline(leases(), [Stage("a", slow, 2, 1)]):
+            assert error is None
+            seen.append(item)
+        raise AssertionError("feeder error was swallowed")
+    except RuntimeError as e:
+        assert str(e) == "database is locked"
+    assert sorted(seen) == [0, 1, 2]
+    _wait_for_shutdown()
+
+    # Stopping early: items are pulled lazily and every thread winds down
+    pulled = []
+    def endless():
+        n = 0
+        while True:
+            pulled.append(n)
+            yield n
+            n += 1
+    results = run_pipeline(endless(), [Stage("a", slow, 2, 1), Stage("b", slow, 1, 1)])
+    next(results)
+    results.close()
+    _wait_for_shutdown()
+    assert len(pulled) < 20, f"pulled {len(pulled)} items for one result"
+    print("pipeline checks OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gpus", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake page load time (s)")
+    parser.add_argument("--parse", type=float, default=0.05, help="Extract time per GPU (s)")
+    parser.add_argument("--llm", type=float, default=0.5, help="LLM time per GPU (s)")
+    parser.add_argument("--pool", type=int, default=8, help="Fake drivers")
+    parser.add_argument("--llm-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    check_contract()
+    gpus = [f"RTX {4000 + i}" for i in range(args.gpus)]
+    fetch_workers = max(1, args.pool // 4)
+    bound = min(fetch_workers / args.latency, 1 / args.parse if args.parse else float("inf"),
+                args.llm_workers / args.llm if args.llm else float("inf")) * 60
+
+    sequential = run(gpus, args, staged=False)
+    staged = run(gpus, args, staged=True)
+    print(f"sequential {sequential:8.1f} GPUs/min")
+    print(f"pipeline   {staged:8.1f} GPUs/min  ({staged / sequential:.1f}x)")
+    print(f"slowest-stage bound {bound:8.1f} GPUs/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+GPU name resolver checks and timing over the real catalog.
+
+Builds a TechPowerUp-style performance chart from the names in gpus.db (brand
+prefixed, memory sizes dropped, plus laptop entries), then matches it to the
+catalog with performance_scraper_calc.match_scores and with the old substring
+scan, printing the time each takes and the GPUs each one scores.
+
+It exits with an AssertionError if a check breaks: every catalog name resolves
+to itself, a name without a memory size resolves to every memory variant of
+its card, and match_scores scores at least every GPU the substring scan did.
+
+Usage:
+    python bench_resolver.py [--db gpus.db] [--repeat 20]
+"""
+import argparse
+import re
+import sqlite3
+import time
+
+from gpu_resolver import GPUResolver
+from performance_scraper_calc import match_scores
+
+_MEMORY_SIZE = re.compile(r"\s*\(?\b\d{1,3}\s*GB\)?", re.IGNORECASE)
+
+
+def load_names(db_path):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    names = [r[0] for r in conn.execute("SELECT name FROM gpus")]
+    conn.close()
+    return names
+
+
+def chart_from_catalog(names):
+    """{chart name: score} the way TechPowerUp lists cards: vendor prefix, no memory size."""
+    chart = {}
+    for i, name in enumerate(sorted(names)):
+        bare = _MEMORY_SIZE.sub("", name).strip()
+        if not bare.lower().startswith(("nvidia", "amd", "intel")):
+            bare = f"{'AMD' if 'Radeon' in bare else 'NVIDIA'} {bare}"
+        chart.setdefault(bare, float(100 + i))
+    chart["NVIDIA GeForce RTX 4060 Laptop GPU"] = 95.0
+    return chart
+
+
+def substring_scores(performance_map, db_names):
+    """The matching performance_scraper_calc used before the token index."""
+    scores = {}
+    for db_name in db_names:
+        score = performance_map.get(db_name)
+        if score is None:
+            for key in performance_map:
+                if db_name in key or key in db_name:
+                    score = performance_map[key]
+                    break
+        if score is not None:
+            scores[db_name] = score
+    return scores
+
+
+def check(names, chart):
+    resolver = GPUResolver(names)
+    for name in names:
+        assert resolver.resolve(name) == name and resolver.resolve_all(name) == [name], name
+
+    # Cards listed once per memory size: the bare name fits all of them
+    variants = {}
+    for name in names:
+        variants.setdefault(_MEMORY_SIZE.sub("", name).strip(), set()).add(name)
+    for bare, group in variants.items():
+        if len(group) > 1 and resolver.resolve_all(bare):
+            assert set(resolver.resolve_all(bare)) == group, (bare, resolver.resolve_all(bare))
+
+    scores, old = match_scores(chart, names), substring_scores(chart, names)
+    lost = sorted(set(old) - set(scores))
+    assert not lost, f"no longer scored: {lost}"
+    for group in variants.values():
+        if group & set(scores):
+            assert group <= set(scores), f"only some variants scored: {sorted(group)}"
+    print(f"resolver checks OK ({len(names)} names, {sum(len(g) > 1 for g in variants.values())} multi-memory cards)")
+    return scores, old
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default="gpus.db")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    names = load_names(args.db)
+    chart = chart_from_catalog(names)
+    scores, old = check(names, chart)
+
+    new_s = best_of(args.repeat, match_scores, chart, names)
+    old_s = best_of(args.repeat, substring_scores, chart, names)
+    print(f"{len(chart)} chart entries x {len(names)} GPUs")
+    print(f"  substring scan {old_s * 1000:8.2f} ms  ({len(old)} GPUs scored)")
+    print(f"  match_scores   {new_s * 1000:8.2f} ms  ({len(scores)} GPUs scored)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Startup budget check for the dashboard's read path.
+
+Imports the modules a dashboard worker loads before its first render (not
+counting streamlit / plotly) in fresh interpreters under `python -X importtime`.
+It reports the median cold import time and the slowest modules, then times
+the data calls of the first render: the data version, load_data (snapshot, or
+SQLite when there is none), the Best Value query and the frontier.
+
+The first render runs against a copy of --db in a temporary directory, with
+gpus_analyzed and the snapshot built beforehand (as a refresh leaves them), so
+it measures the warm path a dashboard worker takes and the repo's database is
+never written to.
+
+Exits with status 1 when the median import time is over --budget, or when a
+module that belongs to the maintenance / scraping side gets imported, either
+by the imports or by the first render.
+
+Usage:
+    python bench_startup.py [--budget 800] [--runs 5] [--db gpus.db]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# What dashboard.py imports from this repo
+READ_PATH = ["analysis", "snapshot", "db_writer", "price_history"]
+# Must never load on the read path
+FORBIDDEN = ["sklearn", "scipy", "tiering", "analysis_maintenance", "selenium", "openai", "bs4", "lxml", "asyncio"]
+DEFAULT_BUDGET_MS = 800
+# The repo's modules stay importable when run from another directory (e.g. next to a test DB)
+ENV = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+
+# What the end of a refresh leaves behind: an up-to-date gpus_analyzed and snapshot
+PREPARE_SCRIPT = """
+import analysis, snapshot
+analysis.DB_PATH = {db!r}
+analysis.get_analyzed_df()
+snapshot.write_snapshot({snapshot!r})
+"""
+
+# Same calls as dashboard.py's first render, in the same order
+LOAD_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import analysis, snapshot
+from db_writer import data_version
+analysis.DB_PATH = {db!r}
+version = data_version(analysis.DB_PATH)
+df, total = snapshot.load_analyzed(version, with_total=True, path={snapshot!r})
+analysis.best_value("1080p", 60, k=5, version=version, df=df)
+analysis.get_frontier(version, df)
+ms = (time.perf_counter() - start) * 1000
+loaded = sorted({{m.split(".")[0] for m in sys.modules}} & set({forbidden!r}))
+print(ms, len(df), ",".join(loaded) or "-")
+"""
+
+
+def import_profile():
+    """One cold import of READ_PATH: {module: (self us, cumulative us)} and the top-level total in ms."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(READ_PATH)}"],
+                          capture_output=True, text=True, check=True, env=ENV)
+    modules, total = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative))
+        if depth == 1:   # Top-level imports; their cumulative times add up to the whole
+            total += int(cumulative)
+    return modules, total / 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="Max median cold import time (ms)")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--db", default="gpus.db")
+    args = ap.parse_args()
+
+    runs = [import_profile() for _ in range(args.runs)]
+    median = statistics.median(total for _, total in runs)
+    modules = runs[-1][0]
+
+    print(f"Cold import of {', '.join(READ_PATH)}: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(t for _, t in runs):.0f}, max {max(t for _, t in runs):.0f}), budget {args.budget:.0f} ms")
+    print("Slowest top-level packages (cumulative):")
+    tops = {}
+    for name, (_, cumulative) in modules.items():
+        root = name.split(".")[0]
+        tops[root] = max(tops.get(root, 0), cumulative)
+    for root, cumulative in sorted(tops.items(), key=lambda kv: -kv[1])[:10]:
+        print(f"    {root:24s} {cumulative / 1000:8.1f} ms")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = shutil.copy(args.db, os.path.join(tmp, "gpus.db"))
+        paths = dict(db=db, snapshot=os.path.join(tmp, "gpus_analyzed.arrow"))
+        subprocess.run([sys.executable, "-c", PREPARE_SCRIPT.format(**paths)],
+                       capture_output=True, text=True, check=True, env=ENV)
+        proc = subprocess.run([sys.executable, "-c", LOAD_SCRIPT.format(forbidden=FORBIDDEN, **paths)],
+                              capture_output=True, text=True, env=ENV)
+    if proc.returncode == 0:
+        ms, rows, render_loaded = proc.stdout.split()
+        print(f"Import + first render's data calls: {float(ms):.0f} ms ({rows} GPUs)")
+        if render_loaded != "-":
+            print(f"FAIL: first render imports {render_loaded.replace(',', ', ')}")
+            failed = True
+    else:
+        print(f"First render failed:\n{proc.stderr}")
+        failed = True
+
+    leaked = sorted(m for m in modules if m.split(".")[0] in FORBIDDEN)
+    if leaked:
+        print(f"FAIL: read path imports {', '.join(sorted({m.split('.')[0] for m in leaked}))}")
+        failed = True
+    if median > args.budget:
+        print(f"FAIL: {median:.0f} ms is over the {args.budget:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
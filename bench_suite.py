@@ -0,0 +1,178 @@
+"""
+Analysis benchmark suite on synthetic catalogs.
+
+For each catalog size, builds (or reuses) a synthetic database with synth_db
+and times:
+  get_raw_data                    raw SELECT into pandas
+  get_analyzed_df (cold)          full rebuild of gpus_analyzed
+  get_analyzed_df (warm)          nothing changed since the last call
+  get_analyzed_df (1% changed)    incremental recompute after price writes
+  snapshot write / load           Arrow export, and the memory-mapped read the
+                                  dashboard does on a cold start
+  dashboard expressions           best-value filter/sort, value index, tier
+                                  filter, sorted names, frontier flags
+  update_gpu_tiers                clustering + tier write-back (run last)
+
+Each timing is the best of --repeat runs. Results are written as JSON (with the
+git commit) to bench_results/, and --compare prints the change against an
+earlier results file.
+
+Usage:
+    python bench_suite.py [--sizes 10000 100000] [--observations 5] [--repeat 3]
+                          [--compare bench_results/<old>.json] [--skip-tiers]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+
+import analysis
+import analysis_maintenance
+import snapshot
+import synth_db
+from db_writer import BatchWriter
+
+# --- CONFIGURATION ---
+DATA_DIR = "bench_data"
+RESULTS_DIR = "bench_results"
+
+
+def best_of(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def catalog(size, observations, seed=0):
+    path = os.path.join(DATA_DIR, f"synth_{size}_{observations:g}_{seed}.db")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"  generating {path} ...")
+        synth_db.generate(path, size, observations, seed)
+    return path
+
+
+def touch_prices(db_path, fraction):
+    """Rewrites about fraction of the GPUs' new prices through a BatchWriter (marks them dirty)."""
+    with BatchWriter(db_path, flush_interval=0, batch_size=100000) as writer:
+        writer.execute(f"UPDATE gpus SET new_avg = new_avg + 1 WHERE abs(random()) % {round(1 / fraction)} = 0")
+
+
+def run_size(size, observations, repeat, skip_tiers):
+    db_path = catalog(size, observations)
+    analysis.DB_PATH = db_path
+    results = {}
+
+    def full_rebuild():
+        conn = analysis.sqlite3.connect(db_path)
+        analysis_maintenance.ensure_analyzed_schema(conn)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('analyzed_signature', 'stale')")
+        conn.commit()
+        conn.close()
+
+    results["get_raw_data"] = best_of(analysis_maintenance.get_raw_data, repeat)
+    results["get_analyzed_df_cold"] = best_of(analysis.get_analyzed_df, repeat, setup=full_rebuild)
+    results["get_analyzed_df_warm"] = best_of(analysis.get_analyzed_df, repeat)
+    results["get_analyzed_df_1pct_changed"] = best_of(analysis.get_analyzed_df, repeat,
+                                                       setup=lambda: touch_prices(db_path, 0.01))
+    snap_path = db_path + ".arrow"
+    results["snapshot_write"] = best_of(lambda: snapshot.write_snapshot(snap_path), repeat)
+    results["snapshot_load"] = best_of(lambda: snapshot.load_analyzed(path=snap_path), repeat)
+
+    df = analysis.get_analyzed_df()
+    col, target_fps = "1440p Ultra", 60
+
+    def filter_sort():
+        candidates = df[df[col] >= target_fps].copy()
+        candidates['Cost Per Frame'] = candidates['active_price'] / candidates[col]
+        candidates.sort_values("Cost Per Frame", ascending=True).head(5)
+
+    index = analysis.ValueIndex(df)
+    tiers = [t for t in df['tier'].unique() if t][:3]
+    results["best_value_filter_sort"] = best_of(filter_sort, repeat)
+    results["value_index_build"] = best_of(lambda: analysis.ValueIndex(df), repeat)
+    results["value_index_query"] = best_of(lambda: index.best_value("1440p", target_fps, 5), repeat)
+    results["tier_filter"] = best_of(lambda: df[df['tier'].isin(tiers)].copy(), repeat)
+    results["sorted_names"] = best_of(lambda: df.sort_values("rel_performance", ascending=False)['name'].unique(), repeat)
+    results["frontier_flags"] = best_of(lambda: analysis.frontier_flags(df), repeat)
+
+    if not skip_tiers:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["update_gpu_tiers"] = best_of(analysis_maintenance.update_gpu_tiers, 1)
+
+    return {"rows": len(df), "seconds": results}
+
+
+def compare(current, previous):
+    print(f"\nChange vs {previous.get('commit')} ({previous.get('timestamp')}):")
+    for size, run in current["sizes"].items():
+        old = previous.get("sizes", {}).get(size)
+        if old is None:
+            continue
+        print(f"  {size} GPUs")
+        for name, secs in run["seconds"].items():
+            before = old["seconds"].get(name)
+            if before:
+                flag = "  <-- slower" if secs > before * 1.2 else ""
+                print(f"    {name:32s} {before * 1000:10.2f} ms -> {secs * 1000:10.2f} ms  ({secs / before:5.2f}x){flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--observations", type=float, default=5, help="Average price observations per GPU")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--compare", help="Earlier results JSON to compare against")
+    ap.add_argument("--skip-tiers", action="store_true", help="Skip update_gpu_tiers (slow on 1M GPUs)")
+    ap.add_argument("--out", help="Results file (default bench_results/<timestamp>-<commit>.json)")
+    args = ap.parse_args()
+
+    db_path = analysis.DB_PATH
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "observations_per_gpu": args.observations,
+        "sizes": {},
+    }
+    try:
+        for size in args.sizes:
+            print(f"{size} GPUs")
+            run = run_size(size, args.observations, args.repeat, args.skip_tiers)
+            report["sizes"][str(size)] = run
+            for name, secs in run["seconds"].items():
+                print(f"    {name:32s} {secs * 1000:10.2f} ms")
+    finally:
+        analysis.DB_PATH = db_path
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Tiering benchmark: scikit-learn KMeans (the old update_gpu_tiers) vs tiering.py.
+
+For each size, draws rel_performance scores like synth_db does and times:
+  kmeans          KMeans(n_clusters=5, n_init=10) on the one column
+  exact (raw)     optimal_segments on all sorted scores, every one distinct
+  exact (dedup)   Tiering, the DP over distinct scores (what update_gpu_tiers runs)
+  add one GPU     Tiering.add, the incremental refit
+and prints the within-tier SSE of each (the exact ones are never worse).
+
+Usage:
+    python bench_tiers.py [--sizes 1000 100000 1000000] [--kmeans-max 1000000] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import tiering
+
+
+def best_of(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def sse(values, labels):
+    return float(sum(((values[labels == c] - values[labels == c].mean()) ** 2).sum() for c in np.unique(labels)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    ap.add_argument("--kmeans-max", type=int, default=1000000, help="Skip KMeans above this size")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    from sklearn.cluster import KMeans
+    rng = np.random.default_rng(0)
+    k = len(tiering.TIER_NAMES)
+
+    for n in args.sizes:
+        raw = np.clip(rng.lognormal(mean=4.4, sigma=0.75, size=n), 1, 450)
+        perf = raw.round()   # Scores are whole percentages, like the real catalog
+        print(f"{n} GPUs ({len(np.unique(perf))} distinct scores)")
+
+        if n <= args.kmeans_max:
+            t, labels = best_of(lambda: KMeans(n_clusters=k, random_state=42, n_init=10).fit_predict(perf.reshape(-1, 1)),
+                                args.repeat)
+            print(f"    kmeans             {t * 1000:10.2f} ms   SSE {sse(perf, labels):.6g}")
+
+        srt = np.sort(raw)
+        t, (starts, cost) = best_of(lambda: tiering.optimal_segments(srt, k), args.repeat)
+        print(f"    exact (raw)        {t * 1000:10.2f} ms   SSE {cost:.6g}   (unrounded scores, all distinct)")
+
+        t, model = best_of(lambda: tiering.Tiering(perf), args.repeat)
+        print(f"    exact (dedup)      {t * 1000:10.2f} ms   SSE {model.sse:.6g}")
+
+        t, _ = best_of(lambda: model.add(rng.uniform(1, 450)), args.repeat)
+        print(f"    add one GPU        {t * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Best-value query benchmark on a synthetic catalog.
+
+Compares the dashboard's old expression (filter df by FPS, compute cost per
+frame, sort, head) with analysis.ValueIndex.top_k for random resolution /
+FPS targets, and checks both return the same costs.
+
+Usage:
+    python bench_value_index.py [--gpus 100000] [--queries 2000] [--k 5]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import analysis_maintenance
+
+
+def synthetic_df(n, seed=0):
+    """get_analyzed_df-shaped dataframe with n GPUs."""
+    rng = np.random.default_rng(seed)
+    perf = rng.lognormal(mean=4.0, sigma=0.8, size=n) + 20  # Keeps nearly every price above the $50 cut-off
+    raw = pd.DataFrame({
+        "name": [f"GPU {i}" for i in range(n)],
+        "launch_prices": rng.uniform(80, 2500, n),
+        "new_avg": np.where(rng.random(n) < 0.4, np.nan, perf * rng.uniform(3, 9, n)),
+        "ebay_used_avg": np.where(rng.random(n) < 0.5, np.nan, perf * rng.uniform(2, 6, n)),
+        "rel_performance": perf,
+        "tier": rng.choice(["Low", "Low-Mid", "High-Mid", "High", "Ultra-High"], n),
+        "driver_support": None,
+    })
+    return analysis_maintenance.derive_columns(raw).reset_index(drop=True)
+
+
+def naive(df, col, target_fps, k):
+    candidates = df[df[col] >= target_fps].copy()
+    candidates['Cost Per Frame'] = candidates['active_price'] / candidates[col]
+    return candidates.sort_values("Cost Per Frame", ascending=True).head(k)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--gpus", type=int, default=100000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    df = synthetic_df(args.gpus)
+    rand = random.Random(1)
+    queries = [(res, rand.uniform(10, 200)) for res in rand.choices(list(analysis.RESOLUTION_COLUMNS), k=args.queries)]
+    print(f"{len(df)} GPUs, {len(queries)} queries, k={args.k}")
+
+    start = time.perf_counter()
+    index = analysis.ValueIndex(df)
+    print(f"  index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    naive_n = min(len(queries), 200)
+    start = time.perf_counter()
+    expected = [naive(df, analysis.RESOLUTION_COLUMNS[res], fps, args.k)['Cost Per Frame'].tolist()
+                for res, fps in queries[:naive_n]]
+    naive_us = (time.perf_counter() - start) / naive_n * 1e6
+
+    start = time.perf_counter()
+    got = [index.top_k(res, fps, args.k)[1] for res, fps in queries]
+    index_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    mismatches = sum(not np.allclose(a, b) for a, b in zip(expected, got))
+    print(f"  filter + sort: {naive_us:9.1f} us/query")
+    print(f"  ValueIndex:    {index_us:9.1f} us/query  ({naive_us / index_us:.0f}x faster, {mismatches} mismatches)")
+
+
+if __name__ == "__main__":
+    main()
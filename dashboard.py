@@ -1,26 +1,23 @@
 import streamlit as st
-import plotly.express as px
-import pandas as pd
 import analysis
+import snapshot
 import sys
+from db_writer import data_version
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="GPU Market Analyzer", layout="wide")
 st.title("GPU Market Analysis Dashboard")
 
 # --- LOAD DATA ---
-@st.cache_data
-def load_data():
-    df = analysis.get_analyzed_df()
-    
-    # Load raw DB just to get the total count
-    conn = analysis.sqlite3.connect("gpus.db")
-    total_count = pd.read_sql_query("SELECT count(*) from gpus", conn).iloc[0,0]
-    conn.close()
-    
-    return df, total_count
+# Cached per data version: every scraper commit bumps it, so the next rerun
+# (any click or page load) picks up fresh prices without restarting Streamlit.
+# Memory-maps the Arrow snapshot when it is current, else reads SQLite.
+@st.cache_data(max_entries=2)
+def load_data(version):
+    return snapshot.load_analyzed(version, with_total=True)
 
-df, total_db_count = load_data()
+data_ver = data_version(analysis.DB_PATH)
+df, total_db_count = load_data(data_ver)
 
 # --- CONFIGURATION ---
 TIER_ORDER = ["Low", "Low-Mid", "High-Mid", "High", "Ultra-High", "Ultra"] 
@@ -33,7 +30,7 @@ with st.expander("About & Metrics", expanded=False):
     
     st.markdown("---")
     st.markdown("##### Methodology")
-    st.caption("**Tiers:** K-Means clustering (5 tiers) based on relative performance.")
+    st.caption("**Tiers:** Optimal 1-D K-Means clustering (5 tiers) based on relative performance.")
     st.caption("**FPS:** Estimated FPS using TechPowerUp relative scale against RTX 4060 Mobile (Most used GPU on Steam) benchmarks.")
     st.caption("**Active Price:** Prioritizes eBay average (recent sold), then Amazon, then MSRP.")
 
@@ -191,12 +188,10 @@ with tab_value:
     with c2:
         st.markdown(f"#### Top 5 Best Value Cards for {target_res} @ {target_fps}+ FPS")
         
-        candidates = df[df[target_col] >= target_fps].copy()
+        # Answered from a per-version index over the loaded df instead of filtering + sorting it on every change
+        top_picks = analysis.best_value(target_res, target_fps, k=5, version=data_ver, df=df)
         
-        if not candidates.empty:
-            candidates['Cost Per Frame'] = candidates['active_price'] / candidates[target_col]
-            top_picks = candidates.sort_values("Cost Per Frame", ascending=True).head(5)
-            
+        if not top_picks.empty:
             display_cols = ['name', 'active_price', target_col, 'Cost Per Frame', 'tier']
             
             st.dataframe(
@@ -231,10 +226,20 @@ with tab_scatter:
         search_options = sorted(df['name'].unique().tolist())
         highlight_gpus = st.multiselect("🔍 Highlight Specific GPUs", options=search_options)
 
-    # Apply Filter
-    df_filtered = df[df['tier'].isin(selected_tiers)].copy()
+    show_tier_frontiers = st.toggle("Per-tier frontiers", value=False)
+
+    # Apply Filter (frontier flags are computed once per data version in analysis)
+    df_frontier = analysis.get_frontier(data_ver, df)
+    df_filtered = df_frontier[df_frontier['tier'].isin(selected_tiers)].copy()
+    if len(selected_tiers) < len(valid_tiers):
+        # Frontier of what is on screen; one O(n log n) sweep
+        df_filtered['on_frontier'] = analysis.pareto_frontier(df_filtered['active_price'], df_filtered['rel_performance'])
+    df_filtered['Frontier'] = df_filtered['on_frontier'].map({True: "Efficient", False: "Dominated"})
 
     # --- PLOTTING ---
+    # Imported here so the header and the other tabs render before plotly has loaded
+    import plotly.express as px
+
     if highlight_gpus:
         df_filtered['color_group'] = df_filtered['name'].apply(
             lambda x: "Selected" if x in highlight_gpus else "Others"
@@ -251,8 +256,9 @@ with tab_scatter:
             color_discrete_map=color_map,
             size="rel_performance",
             hover_name="name",
-            hover_data=["1080p Ultra", "4K Ultra", "active_price"],
+            hover_data=["1080p Ultra", "4K Ultra", "active_price", "Frontier"],
             height=600,
+            render_mode="webgl",
             template="plotly_dark",
             opacity=0.8
         )
@@ -269,12 +275,36 @@ with tab_scatter:
             color="tier",
             size="rel_performance",
             hover_name="name",
-            hover_data=["1080p Ultra", "4K Ultra", "active_price"],
+            hover_data=["1080p Ultra", "4K Ultra", "active_price", "Frontier"],
             height=600,
+            render_mode="webgl",
             template="plotly_dark",
             category_orders={"tier": TIER_ORDER}
         )
 
+    # --- FRONTIER OVERLAY ---
+    # Every GPU off the line is dominated: something else is cheaper and at least as fast
+    frontier_sets = [("Efficiency Frontier", df_filtered[df_filtered['on_frontier']])]
+    if show_tier_frontiers:
+        frontier_sets += [(f"{tier} Frontier", group[group['on_tier_frontier']])
+                          for tier, group in df_filtered.groupby('tier')]
+    for label, points in frontier_sets:
+        points = points.sort_values('active_price')
+        fig.add_scatter(
+            x=points['active_price'],
+            y=points['rel_performance'],
+            mode="lines",
+            # Step line: until the next frontier price, nothing faster is available
+            line=dict(shape="hv", width=3 if label == "Efficiency Frontier" else 1,
+                      dash="solid" if label == "Efficiency Frontier" else "dot"),
+            name=label,
+            hoverinfo="skip",
+        )
+
+    dominated_count = int((~df_filtered['on_frontier']).sum())
+    st.caption(f"{len(df_filtered) - dominated_count} efficient GPUs, {dominated_count} dominated "
+               "(another card is cheaper and at least as fast).")
+
     fig.update_layout(
         title="Market Efficiency Frontier",
         xaxis_title="Price ($)",
@@ -0,0 +1,188 @@
+import atexit
+import signal
+import sqlite3
+import threading
+import time
+
+from metrics import get_metrics
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+BATCH_SIZE = 500        # Buffered statements before a flush
+FLUSH_INTERVAL = 5.0    # Seconds; buffered writes never wait longer than this
+
+# meta.data_version goes up with every committed batch, so readers (the dashboard)
+# can tell cheaply whether anything changed since they last loaded
+META_TABLE = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)"
+BUMP_DATA_VERSION = """
+    INSERT INTO meta (key, value) VALUES ('data_version', 1)
+    ON CONFLICT(key) DO UPDATE SET value = value + 1
+"""
+
+
+class BatchWriter:
+    """
+    Write-behind buffer for gpus.db.
+
+    Statements are queued and written with executemany inside one transaction per
+    batch (BATCH_SIZE statements or FLUSH_INTERVAL seconds, whichever comes first),
+    so a run pays one commit per batch instead of one per GPU. Consecutive
+    statements with the same SQL are grouped, so write order is kept.
+
+    Buffered writes are flushed on close(), on leaving a `with` block (including
+    Ctrl-C), at interpreter exit and on SIGTERM. Safe to share between threads.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        """
+        :param db_path: SQLite database
+        :param batch_size: Statements per transaction
+        :param flush_interval: Max seconds a write stays buffered (0 disables the timer)
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute(META_TABLE)
+        self.rows_written = 0
+        self.commits = 0
+
+        self._lock = threading.RLock()
+        self._groups = []       # [[sql, [params, ...]], ...]
+        self._pending = 0
+        self._callbacks = []
+        self._closed = False
+
+        self._stop = threading.Event()
+        if flush_interval:
+            self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._timer.start()
+        atexit.register(self.close)
+        _install_sigterm_handler()
+
+    def execute(self, sql, params=(), on_commit=None):
+        """
+        Buffers one statement.
+
+        :param sql: e.g. "UPDATE gpus SET ebay_used_avg = ? WHERE name = ?"
+        :param params: Statement parameters
+        :param on_commit: Called once this statement's batch is committed (e.g. to mark a job done)
+        """
+        self.executemany(sql, [params], on_commit)
+
+    def executemany(self, sql, seq_of_params, on_commit=None):
+        """Buffers the same statement for several parameter sets."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchWriter is closed")
+            if not self._groups or self._groups[-1][0] != sql:
+                self._groups.append([sql, []])
+            rows = list(seq_of_params)
+            self._groups[-1][1].extend(rows)
+            self._pending += len(rows)
+            if on_commit is not None:
+                self._callbacks.append(on_commit)
+            if self._pending >= self.batch_size:
+                self.flush()
+
+    def call_after_commit(self, callback):
+        """Runs callback once everything buffered so far is committed (right away if nothing is)."""
+        with self._lock:
+            if self._groups:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def flush(self):
+        """Writes everything buffered in one transaction."""
+        with self._lock:
+            if not self._groups:
+                return 0
+            groups, self._groups = self._groups, []
+            callbacks, self._callbacks = self._callbacks, []
+            count, self._pending = self._pending, 0
+
+            metrics = get_metrics()
+            start = time.perf_counter()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, rows in groups:
+                    self.conn.executemany(sql, rows)
+                self.conn.execute(BUMP_DATA_VERSION)
+                self.conn.execute("COMMIT")
+                metrics.observe("db_commit", time.perf_counter() - start)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                # Keep the writes buffered so the next flush (or close) retries them
+                self._groups = groups + self._groups
+                self._callbacks = callbacks + self._callbacks
+                self._pending += count
+                raise
+            self.rows_written += count
+            self.commits += 1
+            metrics.incr("rows_written", count)
+            metrics.incr("db_commits")
+
+        for cb in callbacks:
+            cb()
+        return count
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"    [!] DB flush error: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._stop.set()
+            try:
+                self.flush()
+            finally:
+                self._closed = True
+                self.conn.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bump_data_version(conn):
+    """
+    Marks a change written outside a BatchWriter (a migration, a one-off fix) so
+    readers reload. Call it before that change's commit, on the same connection.
+
+    :param conn: sqlite3 connection with the change still uncommitted
+    """
+    conn.execute(META_TABLE)
+    conn.execute(BUMP_DATA_VERSION)
+
+
+def data_version(db_path=DB_PATH):
+    """Current meta.data_version of a database (0 if nothing was written through a BatchWriter yet)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def _install_sigterm_handler():
+    # SIGTERM normally kills the process without running atexit; turn it into SystemExit
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _raise_system_exit)
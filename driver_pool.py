@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# --- CONFIGURATION ---
+POOL_SIZE = 4          # Browsers kept open at once
+PER_HOST_LIMIT = 2     # Max pages loading from one store at the same time
+
+
+class DriverPool:
+    """
+    A fixed set of pre-warmed Selenium drivers shared by worker threads.
+    """
+
+    def __init__(self, factory, size=POOL_SIZE, lazy=False):
+        """
+        :param factory: Callable returning a new driver (e.g. price_updater.setup_driver)
+        :param size: Max number of drivers
+        :param lazy: Start drivers one at a time, only when every started one is busy
+        """
+        self.size = size
+        self.factory = factory
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._started = 0
+        if lazy:
+            return
+
+        # Start the browsers in parallel, Chrome startup is the slow part
+        with ThreadPoolExecutor(max_workers=size) as ex:
+            for d in ex.map(lambda _: factory(), range(size)):
+                self._all.append(d)
+                self._idle.put(d)
+        self._started = size
+
+    def _take(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            start_one = self._started < self.size
+            if start_one:
+                self._started += 1
+        if not start_one:
+            return self._idle.get()
+        try:
+            d = self.factory()
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+        with self._lock:
+            self._all.append(d)
+        return d
+
+    @property
+    def started(self):
+        """Drivers started so far."""
+        return len(self._all)
+
+    @contextmanager
+    def driver(self):
+        """Borrows a driver until the block exits."""
+        d = self._take()
+        try:
+            yield d
+        finally:
+            self._idle.put(d)
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        for d in drivers:
+            try:
+                d.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HostLimiter:
+    """
+    Per-host politeness limit: at most `per_host` pages in flight per store.
+    """
+
+    def __init__(self, per_host=PER_HOST_LIMIT):
+        self.per_host = per_host
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with sem:
+            yield
+
+
+class PageFetcher:
+    """
+    Loads pages on pooled drivers, several at a time.
+
+    A page first waits for a free slot on its host, then for a free driver,
+    so a busy store never ties up browsers that other stores could use.
+    """
+
+    def __init__(self, pool, fetch_page, limiter=None):
+        """
+        :param pool: DriverPool
+        :param fetch_page: Callable(driver, url) -> page text (e.g. price_updater.get_page_text)
+        :param limiter: HostLimiter (a default one is created otherwise)
+        """
+        self.pool = pool
+        self.fetch_page = fetch_page
+        self.limiter = limiter or HostLimiter()
+        self._executor = ThreadPoolExecutor(max_workers=pool.size)
+
+    def fetch(self, url):
+        with self.limiter.slot(url):
+            with self.pool.driver() as d:
+                return self.fetch_page(d, url)
+
+    def fetch_all(self, urls):
+        """
+        Loads a {key: url} dict at the same time and returns {key: text}.
+
+        :param urls: e.g. {"amazon": ..., "newegg": ..., "bestbuy": ..., "ebay": ...}
+        """
+        futures = {key: self._executor.submit(self.fetch, url) for key, url in urls.items()}
+        return {key: f.result() for key, f in futures.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# --- FAKE DRIVER (no browser) ---
+
+class _FakeElement:
+    def __init__(self, text):
+        self.text = text
+
+    def get_attribute(self, name):
+        return self.text
+
+
+class FakeDriver:
+    """
+    Stand-in for webdriver.Chrome so the scheduling code can run without a browser.
+
+    Every get() sleeps `latency` seconds and records the URL. Page text comes from
+    `pages[url]` if given, otherwise a short placeholder naming the URL.
+    """
+
+    def __init__(self, latency=0.0, pages=None):
+        self.latency = latency
+        self.pages = pages or {}
+        self.current_url = None
+        self.visits = []
+        self.closed = False
+
+    def get(self, url):
+        time.sleep(self.latency)
+        self.current_url = url
+        self.visits.append(url)
+
+    @property
+    def page_source(self):
+        return f"<html><body>{self._text()}</body></html>"
+
+    @property
+    def title(self):
+        return self.current_url or ""
+
+    def _text(self):
+        return self.pages.get(self.current_url, f"Results for {self.current_url}")
+
+    def execute_script(self, script, *args):
+        return None
+
+    def find_element(self, by, value):
+        return _FakeElement(self._text())
+
+    def find_elements(self, by, value):
+        return []
+
+    def quit(self):
+        self.closed = True
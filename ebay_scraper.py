@@ -1,131 +1,76 @@
-import sqlite3
-import time
-import random
-import re
-from statistics import mean
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-
-# Webdriver
-driver = webdriver.Chrome()
+import fetcher
+from price_history import ensure_schema
+from page_parser import average, ebay_sold_prices
+from metrics import get_metrics
+from refresh_context import RefreshContext, refresh_store, store_price_saver
 
 # Database config
 DB_PATH = "gpus.db"
 TABLE_NAME = "gpus"
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
 
-# Add Column
-try:
-    cursor.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN ebay_used_avg REAL")
-    print(f"Column 'ebay_used_avg' added.")
-except sqlite3.OperationalError:
-    pass 
+# Fetch backend: "http" (concurrent, Selenium only as fallback) or "selenium" (one browser, fetch and parse pipelined)
+BACKEND = "http"
+
+JOB_SOURCE = "ebay"  # jobs.source for this script
 
-# Reset prices
-print("Resetting eBay prices to NULL...")
-cursor.execute(f"UPDATE {TABLE_NAME} SET ebay_used_avg = NULL")
-conn.commit()
+# Only the most stale / volatile GPUs that fit in this many seconds are refreshed (None = all)
+REFRESH_BUDGET = 600
+REFRESH_TOP_K = None
 
+RENDER_WAIT = (5, 10)  # Seconds a page gets to render in the browser
 
-def get_price_float(price_str):
+
+def build_ebay_url(gpu_name):
     """
-    Converts price to float ($19.99 --> 19.99)
-    
-    :param price_str: Price string ("$19.99")
+    Sold + completed, Buy It Now, Used condition search URL for a GPU.
+
+    :param gpu_name: GPU name
     """
-    try:
-        clean_str = re.sub(r'[^\d.]', '', price_str)
-        return float(clean_str)
-    except ValueError:
-        return None
+    encoded_query = gpu_name.replace(" ", "+")
+    return f"https://www.ebay.com/sch/i.html?_nkw={encoded_query}&_sacat=0&_from=R40&LH_BIN=1&LH_Sold=1&LH_Complete=1&LH_ItemCondition=3000"
 
-def scrape_ebay_sold(driver, gpu_name):
+def ebay_needs_js(html):
+    """True when the page came back without any result cards (bot check, JS shell)."""
+    return fetcher.looks_blocked(html) or "s-card" not in html
+
+def parse_ebay_sold(html, gpu_name):
     """
-    Scrapes the 'Sold Items' page on eBay for the last 10 sales.
+    Average of the last 10 valid sales from a saved 'Sold Items' results page.
 
-    :param driver: Chrome webdriver
+    :param html: Results page HTML
     :param gpu_name: GPU name
     """
-    try:
-        query = f"{gpu_name}"
-        encoded_query = query.replace(" ", "+")
-        
-        url = f"https://www.ebay.com/sch/i.html?_nkw={encoded_query}&_sacat=0&_from=R40&LH_BIN=1&LH_Sold=1&LH_Complete=1&LH_ItemCondition=3000"
-        
-        driver.get(url)
-        time.sleep(random.uniform(5, 10))
-        
-        prices = []
-
-        items = driver.find_elements(By.CSS_SELECTOR, "li.s-card")
-        
-        for item in items:
-            try:
-                # Get Title
-                try:
-                    title_el = item.find_element(By.CSS_SELECTOR, ".s-card__title, .s-item__title")
-                    title_text = title_el.text.lower()
-                except:
-                    continue
-
-                # Filters
-                if "parts only" in title_text or "broken" in title_text or "box only" in title_text:
-                    continue
-
-                # Strict Name Match (Ensure "3080" is in title if we searched for it)
-                search_words = gpu_name.lower().split()
-                ignore_list = ["geforce", "radeon", "nvidia", "amd", "intel", "arc", "rtx", "gtx"]
-                critical_keywords = [w for w in search_words if w not in ignore_list]
-                
-                if not all(k in title_text for k in critical_keywords):
-                    continue
-
-                # Get price
-                price_el = item.find_element(By.CSS_SELECTOR, ".s-card__price, .s-item__price")
-                val = get_price_float(price_el.text)
-                
-
-                prices.append(val)
-
-            except Exception as e:
-                continue # Skip bad items
-
-            if len(prices) >= 10:
-                break
-        
-        if not prices:
-            return None
-            
-        return round(mean(prices), 2)
-
-    except Exception as e:
-        print(f"  Error scraping eBay: {e}")
-        return None
+    prices = ebay_sold_prices(html, gpu_name)
+    get_metrics().incr("items_parsed", len(prices))
+    return average(prices)
 
-# Main
+save_price = store_price_saver("ebay", "used", "eBay Avg (Used)")
+
+def refresh(ctx, backend=BACKEND, top_k=REFRESH_TOP_K):
+    """
+    Scrapes the GPUs that are due within the context's time budget. Returns the run id.
 
-# Get List of GPUs
-cursor.execute(f"SELECT name FROM {TABLE_NAME}")
-rows = cursor.fetchall()
-gpu_names = [r[0] for r in rows]
-
-print(f"Found {len(gpu_names)} GPUs to update.")
-
-for i, name in enumerate(gpu_names):
-    print(f"[{i+1}/{len(gpu_names)}] Processing: {name}")
-    
-    avg_price = scrape_ebay_sold(driver, name)
-    
-    if avg_price is not None: # Only update if price is found
-        print(f"   -> eBay Avg (Used): ${avg_price}")
-        cursor.execute(f"UPDATE {TABLE_NAME} SET ebay_used_avg = ? WHERE name = ?", (avg_price, name))
-        conn.commit()
-    else:
-        print(f"   -> No sales found. Keeping as NULL.")
-    
-    time.sleep(random.uniform(10, 15))
-
-conn.close()
-driver.quit()
-print("Done.")
\ No newline at end of file
+    :param ctx: refresh_context.RefreshContext (writer, job queue, driver pool, budget)
+    :param backend: "http" or "selenium"
+    :param top_k: Refresh at most this many GPUs (None = as many as fit the budget)
+    """
+    return refresh_store(ctx, JOB_SOURCE, "eBay", build_ebay_url, parse_ebay_sold, ebay_needs_js,
+                         save_price, backend, top_k, render_wait=RENDER_WAIT)
+
+# Main
+def main():
+    # Prices are buffered and committed in batches; closing the context (even on Ctrl-C) flushes them
+    ctx = RefreshContext(DB_PATH, workers=1, budget=REFRESH_BUDGET)
+    run_id = None
+    try:
+        # Prices are appended to price_observations; the old column is only a fallback in the view
+        conn = ctx.connect()
+        ensure_schema(conn)
+        conn.close()
+        run_id = refresh(ctx)
+    finally:
+        ctx.finish("ebay_scraper", run_id)
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import get_metrics
+
+# --- CONFIGURATION ---
+PER_HOST_LIMIT = 3          # Max requests in flight against one store at once
+REQUEST_TIMEOUT = 20        # Seconds
+POLITE_DELAY = (1.0, 3.0)   # Random pause after each request, per host slot
+BROWSER_DELAY = (5.0, 10.0) # Random wait for a page to render in the Selenium fallback
+PARSE_WORKERS = 2           # Threads parsing pages while the event loop keeps fetching
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Text that shows up on bot-check / JS-only pages instead of results
+JS_MARKERS = ["captcha", "enable javascript", "pardon our interruption", "robot check"]
+
+
+def looks_blocked(html):
+    """
+    Default check for pages that did not render without a browser.
+
+    :param html: Raw HTML returned by the plain HTTP request
+    """
+    if not html:
+        return True
+    head = html[:20000].lower()
+    return any(marker in head for marker in JS_MARKERS)
+
+
+def load_in_browser(driver, url, delay=BROWSER_DELAY):
+    """
+    Loads a page in a Selenium driver and returns its page source.
+
+    :param driver: Selenium driver (or driver_pool.FakeDriver)
+    :param url: Page URL
+    :param delay: (min, max) seconds to let the page render
+    """
+    metrics = get_metrics()
+    with metrics.timer("driver_get"):
+        driver.get(url)
+    metrics.sleep(random.uniform(*delay))
+    html = driver.page_source
+    metrics.incr("pages_fetched")
+    metrics.incr("page_bytes", len(html))
+    return html
+
+
+def fetch_in_browser(driver, url, needs_js=looks_blocked, delay=BROWSER_DELAY, cache=None):
+    """
+    A page's cached copy, else the page loaded in a Selenium driver.
+    Returns (HTML or None, True if it was loaded over the network); driver errors are raised.
+
+    :param driver: Selenium driver
+    :param url: Page URL
+    :param needs_js: Callable(html) -> bool; pages it flags (captcha / robot check) are not
+                     cached, so the next run tries again
+    :param delay: (min, max) seconds to let the page render
+    :param cache: page_cache.PageCache (no caching if None); offline, a missing page is None
+    """
+    if cache is not None:
+        html = cache.get(url)
+        if html is not None or cache.offline:
+            return html, False
+    html = load_in_browser(driver, url, delay)
+    if cache is not None and not needs_js(html):
+        cache.put(url, html)
+    return html, True
+
+
+class FetchError(Exception):
+    """A page could not be loaded, or only a bot-check page came back."""
+
+
+class AsyncFetcher:
+    """
+    Fetches pages concurrently over plain HTTP.
+
+    Requests go through one keep-alive session, with at most `per_host` requests
+    in flight per host. Pages that need JavaScript (see `needs_js`) are loaded
+    again through a Selenium driver, which is only started if a page needs it.
+    """
+
+    def __init__(self, per_host=PER_HOST_LIMIT, delay=POLITE_DELAY, driver_factory=None,
+                 timeout=REQUEST_TIMEOUT, headers=None, cache=None, driver_pool=None,
+                 browser_delay=BROWSER_DELAY):
+        """
+        :param per_host: Max concurrent requests per host
+        :param delay: (min, max) seconds to wait after each request before freeing the slot
+        :param browser_delay: (min, max) seconds to let a page render in the fallback browser
+        :param driver_factory: Callable returning a Selenium driver, used for the JS fallback
+        :param timeout: Per-request timeout in seconds
+        :param headers: Extra headers merged over DEFAULT_HEADERS
+        :param cache: page_cache.PageCache to read from / write to (no caching if None)
+        :param driver_pool: Anything with a driver() context manager (driver_pool.DriverPool,
+                            refresh_context.RefreshContext) to borrow the fallback browser from
+                            instead of starting one with driver_factory; left open by close()
+        """
+        self.per_host = per_host
+        self.delay = delay
+        self.browser_delay = browser_delay
+        self.timeout = timeout
+        self.driver_factory = driver_factory
+        self.driver_pool = driver_pool
+        self.driver = None
+        self.cache = cache
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(per_host * 4, 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_limits = {}
+        self._driver_lock = None
+        self.stats = {"cached": 0, "http": 0, "selenium": 0, "failed": 0}
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    def _get(self, url):
+        metrics = get_metrics()
+        with metrics.timer("http_get"):
+            resp = self.session.get(url, timeout=self.timeout)
+        if resp.status_code != 200:
+            return None
+        metrics.incr("pages_fetched")
+        metrics.incr("page_bytes", len(resp.content))
+        return resp.text
+
+    def _get_with_driver(self, url):
+        if self.driver_pool is not None:
+            with self.driver_pool.driver() as d:
+                return load_in_browser(d, url, self.browser_delay)
+        if self.driver is None:
+            self.driver = self.driver_factory()
+        return load_in_browser(self.driver, url, self.browser_delay)
+
+    async def fetch(self, url, needs_js=looks_blocked):
+        """
+        Returns the HTML for a URL, or None if it could not be loaded.
+
+        :param url: Page URL
+        :param needs_js: Callable(html) -> bool, True when the page has to be loaded in a browser
+        """
+        if self.cache is not None:
+            html = self.cache.get(url)
+            if html is not None:
+                self.stats["cached"] += 1
+                get_metrics().incr("page_cache_hits")
+                return html
+            if self.cache.offline:
+                self.stats["failed"] += 1
+                return None
+
+        html = None
+        async with self._host_limit(url):
+            try:
+                html = await asyncio.to_thread(self._get, url)
+            except requests.RequestException as e:
+                print(f"    [!] HTTP Error: {e}")
+            if self.delay and self.delay[1] > 0:
+                with get_metrics().timer("sleep"):
+                    await asyncio.sleep(random.uniform(*self.delay))
+
+        if html is not None and not needs_js(html):
+            self.stats["http"] += 1
+            self._store(url, html)
+            return html
+
+        if self.driver_factory is None and self.driver_pool is None:
+            self.stats["failed"] += 1
+            return html
+
+        # Selenium fallback, one page at a time on a single browser
+        if self._driver_lock is None:
+            self._driver_lock = asyncio.Lock()
+        async with self._driver_lock:
+            try:
+                html = await asyncio.to_thread(self._get_with_driver, url)
+                self.stats["selenium"] += 1
+                # Still a captcha / robot check in the browser: not cached, so the next run tries again
+                if not needs_js(html):
+                    self._store(url, html)
+                return html
+            except Exception as e:
+                print(f"    [!] Selenium Error: {e}")
+                self.stats["failed"] += 1
+                return None
+
+    def _store(self, url, html):
+        if self.cache is not None:
+            self.cache.put(url, html)
+
+    def close(self):
+        self.session.close()
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def _timed_parse(parse, html, name):
+    with get_metrics().timer("parse"):
+        return parse(html, name)
+
+
+async def _scrape_all(fetcher, gpu_names, build_url, parse, needs_js, on_result, parse_workers):
+    done = 0
+    loop = asyncio.get_running_loop()
+    # Parsing runs on its own threads so the loop keeps requests in flight meanwhile;
+    # pages wait in the executor queue when parsing falls behind the network
+    parser = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="parse")
+
+    async def one(name):
+        nonlocal done
+        url = build_url(name)
+        html = await fetcher.fetch(url, needs_js=needs_js)
+        value, error = None, None
+        if html is None or needs_js(html):
+            error = FetchError(f"could not load {url}")
+        else:
+            try:
+                value = await loop.run_in_executor(parser, _timed_parse, parse, html, name)
+            except Exception as e:
+                error = e
+        done += 1
+        on_result(done, name, value, error)
+        return name, value
+
+    try:
+        pairs = await asyncio.gather(*(one(name) for name in gpu_names))
+    finally:
+        parser.shutdown(wait=False, cancel_futures=True)
+    return dict(pairs)
+
+
+def scrape_many(gpu_names, build_url, parse, needs_js=looks_blocked, on_result=None, fetcher=None,
+                parse_workers=PARSE_WORKERS, **fetcher_kwargs):
+    """
+    Fetches and parses one results page per GPU concurrently.
+
+    Returns {gpu_name: parsed value (None on error)} and prints the throughput in GPUs/minute.
+
+    :param gpu_names: List of GPU names
+    :param build_url: Callable(gpu_name) -> search URL
+    :param parse: Callable(html, gpu_name) -> value (e.g. average price or None)
+    :param needs_js: Callable(html) -> bool for the Selenium fallback
+    :param on_result: Callable(done_count, gpu_name, value, error), called as each GPU finishes;
+                      error is a FetchError (page not loaded or still blocked) or the parse
+                      exception, and value is None then
+    :param fetcher: Existing AsyncFetcher to reuse (a new one is created and closed otherwise)
+    :param parse_workers: Threads running parse, so parsing overlaps with fetching
+    """
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = AsyncFetcher(**fetcher_kwargs)
+    if on_result is None:
+        on_result = lambda done, name, value, error: None
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(_scrape_all(fetcher, gpu_names, build_url, parse, needs_js, on_result,
+                                          parse_workers))
+    finally:
+        if own_fetcher:
+            fetcher.close()
+    elapsed = time.perf_counter() - start
+
+    rate = len(gpu_names) / (elapsed / 60) if elapsed > 0 else float("inf")
+    print(f"Fetched {len(gpu_names)} GPUs in {elapsed:.1f}s ({rate:.1f} GPUs/min) "
+          f"[cached={fetcher.stats['cached']}, http={fetcher.stats['http']}, selenium={fetcher.stats['selenium']}, failed={fetcher.stats['failed']}]")
+    return results
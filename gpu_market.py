@@ -0,0 +1,131 @@
+"""
+One entry point for refreshing the GPU database.
+
+    python gpu_market.py refresh --sources ebay,amazon,msrp,perf --workers 4 --budget 10m
+
+Runs the chosen sources one after another in a single process over one
+refresh_context.RefreshContext: one run id for all their job-queue runs and
+metrics, one batched DB writer, one driver pool (a browser only starts when
+a source needs one more than are already open), and every schema check done
+once up front.
+The dashboard snapshot is written once at the end.
+
+Sources (run in this order whatever order they are given in):
+    names   TechPowerUp GPU list -> new rows in gpus    (gpu_name_scraper)
+    msrp    TechPowerUp launch prices                   (launch_price_scraper)
+    perf    TechPowerUp relative performance chart      (performance_scraper_calc)
+    ebay    eBay used sold-listing averages             (ebay_scraper)
+    amazon  Amazon new-listing averages                 (amazon_scraper)
+"""
+import argparse
+import importlib
+import re
+import time
+
+import analysis
+from driver_pool import POOL_SIZE
+from refresh_context import DB_PATH, RefreshContext
+
+SOURCES = {
+    "names": "gpu_name_scraper",
+    "msrp": "launch_price_scraper",
+    "perf": "performance_scraper_calc",
+    "ebay": "ebay_scraper",
+    "amazon": "amazon_scraper",
+}
+DEFAULT_SOURCES = ["msrp", "perf", "ebay", "amazon"]
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(text):
+    """
+    "90" / "90s" / "10m" / "1.5h" -> seconds.
+
+    :param text: Duration text
+    """
+    match = _DURATION.match(text.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {text!r} (e.g. 600, 10m, 1h)")
+    value, unit = match.groups()
+    return float(value) * _UNIT_SECONDS[unit]
+
+
+def parse_sources(text):
+    names = [s.strip() for s in text.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SOURCES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown source(s) {', '.join(unknown)}; choose from {', '.join(SOURCES)}")
+    return names
+
+
+def refresh(sources=DEFAULT_SOURCES, workers=POOL_SIZE, budget=None, db_path=DB_PATH, incremental=True):
+    """
+    Refreshes the given sources in one process. Returns the shared run id.
+
+    :param sources: Keys of SOURCES
+    :param workers: Max browsers in the shared driver pool
+    :param budget: Seconds for the whole refresh (None = no limit); eBay / Amazon
+                   only queue the GPUs that fit in what is left when they start
+    :param db_path: SQLite database
+    :param incremental: msrp only fetches GPUs without a launch price
+
+    A source that fails is reported and skipped; the others still run.
+    """
+    modules = {key: importlib.import_module(SOURCES[key]) for key in SOURCES if key in sources}
+    ctx = RefreshContext(db_path, workers=workers, budget=budget)
+    print(f"Refresh {ctx.run_id}: {', '.join(modules)} on up to {workers} browser(s)"
+          + (f", budget {budget:.0f}s" if budget is not None else ""))
+    try:
+        # Schema changes once, on one connection
+        conn = ctx.connect()
+        for ensure_schema in dict.fromkeys(m.ensure_schema for m in modules.values()):
+            ensure_schema(conn)
+        conn.close()
+
+        failed = []
+        for key, module in modules.items():
+            start = time.perf_counter()
+            print(f"\n=== {key} ===")
+            try:
+                if key == "msrp":
+                    module.refresh(ctx, incremental)
+                else:
+                    module.refresh(ctx)
+            except Exception as e:
+                print(f"    [!] {key} failed: {e}")
+                failed.append(key)
+            # The next source reads what this one wrote (new GPU names, scores)
+            ctx.writer.flush()
+            print(f"=== {key} done in {time.perf_counter() - start:.1f}s ===")
+        if failed:
+            print(f"\nFailed sources: {', '.join(failed)}")
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        ctx.finish("gpu_market")
+    return ctx.run_id
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="gpu-market", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = ap.add_subparsers(dest="command", required=True)
+    cmd = commands.add_parser("refresh", help="Scrape the chosen sources into the DB")
+    cmd.add_argument("--sources", type=parse_sources, default=DEFAULT_SOURCES,
+                     help=f"Comma-separated, from {','.join(SOURCES)} (default {','.join(DEFAULT_SOURCES)})")
+    cmd.add_argument("--workers", type=int, default=POOL_SIZE, help="Max browsers in the shared driver pool")
+    cmd.add_argument("--budget", type=parse_duration, default=None, help="Time budget, e.g. 600, 10m, 1h")
+    cmd.add_argument("--db", default=DB_PATH)
+    cmd.add_argument("--all", action="store_true", help="msrp: refresh every spec page, not only unpriced GPUs")
+    args = ap.parse_args(argv)
+
+    if args.command == "refresh":
+        # The snapshot written at the end reads analysis.DB_PATH
+        analysis.DB_PATH = args.db
+        refresh(args.sources, args.workers, args.budget, args.db, incremental=not args.all)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,71 @@
 from bs4 import BeautifulSoup
 import requests
-import sqlite3
 
+from job_queue import new_run_id
+from refresh_context import RefreshContext
 
-#---------------------------------SCRAPING---------------------------------------
 
+DB_PATH = "gpus.db"
 base_url = "https://www.techpowerup.com/gpu-specs/"
-response = requests.get(base_url)
-soup = BeautifulSoup(response.text, 'html.parser')
 
-items = []
+#---------------------------------SCRAPING---------------------------------------
+
+def scrape_gpu_names():
+    """GPU names listed on the TechPowerUp GPU database page."""
+    response = requests.get(base_url)
+    soup = BeautifulSoup(response.text, 'html.parser')
 
-for block in soup.select("div.items-mobile--item"):
-    gpu = {
-        "name": None,
-    }
+    items = []
 
-    name_tag = block.select_one("a.item-name")
-    gpu["name"] = name_tag.get_text(strip = True)
+    for block in soup.select("div.items-mobile--item"):
+        gpu = {
+            "name": None,
+        }
 
-    rows = block.select(".item-properties-row")
+        name_tag = block.select_one("a.item-name")
+        if name_tag is None:
+            continue
+        gpu["name"] = name_tag.get_text(strip = True)
 
-    items.append(gpu)
+        items.append(gpu)
+
+    return items
 
 #---------------------------------DATABASE---------------------------------------
 
-conn = sqlite3.connect("gpus.db")
-cur = conn.cursor()
+def ensure_schema(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS gpus (
+        name TEXT PRIMARY KEY
+    )
+    """)
+    conn.commit()
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS gpus (
-    name TEXT PRIMARY KEY,
-)
-""")
+def refresh(ctx):
+    """
+    Adds GPUs that are not in the gpus table yet. Returns the number of names found.
 
-for item in items:
-    cur.execute("""
-        INSERT INTO gpus VALUES (
+    :param ctx: refresh_context.RefreshContext
+    """
+    items = scrape_gpu_names()
+    # Names already in the table are kept with their prices and scores
+    ctx.writer.executemany("""
+        INSERT OR IGNORE INTO gpus (name) VALUES (
             :name
         )
-    """, item)
+    """, items)
+    return len(items)
+
+def main():
+    ctx = RefreshContext(DB_PATH, run_id=new_run_id("names"), workers=1)
+    try:
+        conn = ctx.connect()
+        ensure_schema(conn)
+        conn.close()
+        found = refresh(ctx)
+    finally:
+        ctx.finish("gpu_name_scraper")
+    print(f"Done. {found} GPU names found.")
 
-conn.commit()
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import re
+import sqlite3
+import sys
+import threading
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+
+# Vendor / brand / series words that never tell two cards apart ("GeForce RTX 4090" == "RTX 4090")
+NOISE = {"nvidia", "amd", "intel", "ati", "geforce", "radeon", "arc", "rtx", "gtx", "gt", "rx",
+         "generation", "graphics", "card", "video", "gpu",
+         "volta", "blackwell"}  # Architecture tags the catalog adds in parentheses
+# Suffixes that make a different card ("RTX 4060" vs "RTX 4060 Ti" / "RTX 4060 Mobile")
+VARIANT_SUFFIXES = {"ti", "super", "xt", "xtx", "gre", "mobile"}
+ALIASES = {"laptop": "mobile", "notebook": "mobile"}
+
+_GLUED_SERIES = re.compile(r"\b(rtx|gtx|gt|rx)(?=\d)")                  # "rtx4090" -> "rtx 4090"
+_GLUED_SUFFIX = re.compile(r"(?<=\d)(ti|super|xtx|xt|gre)\b")            # "4060ti" -> "4060 ti"
+_MEMORY = re.compile(r"\b(\d{1,3})\s*gb?\b")                             # "12 GB" / "12GB" / "12G" -> "12gb"
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def tokenize(text):
+    """
+    Normalized tokens of a GPU name or listing title: lowercase, punctuation
+    dropped, glued series/suffixes split, memory sizes joined ("12 GB" -> "12gb").
+    """
+    text = _NON_WORD.sub(" ", text.lower())
+    text = _GLUED_SERIES.sub(r"\1 ", text)
+    text = _GLUED_SUFFIX.sub(r" \1", text)
+    text = _MEMORY.sub(r"\1gb", text)
+    return [ALIASES.get(t, t) for t in text.split()]
+
+
+def _split(tokens):
+    """(core tokens, memory tokens) with brand noise removed."""
+    core = frozenset(t for t in tokens if t not in NOISE and not t.endswith("gb"))
+    memory = frozenset(t for t in tokens if t.endswith("gb") and t[:-2].isdigit())
+    return core, memory
+
+
+def canonical_key(name):
+    """Order-free key of a GPU name without brand words ("AMD Radeon Pro W7900" -> "pro w7900")."""
+    core, memory = _split(tokenize(name))
+    return " ".join(sorted(core) + sorted(memory))
+
+
+class TitleMatcher:
+    """
+    Precompiled listing filter for one GPU: the title has to contain every model
+    token, no variant suffix the GPU doesn't have (including ones that only exist
+    on a bigger card in the catalog, like "pro" for "Radeon VII"), and no
+    conflicting memory size.
+    """
+
+    def __init__(self, core, memory, excluded):
+        self.core = core
+        self.memory = memory
+        self.excluded = excluded
+
+    def match_tokens(self, tokens):
+        tokens = set(tokens)
+        if not self.core <= tokens or not self.excluded.isdisjoint(tokens):
+            return False
+        if self.memory:
+            listed = {t for t in tokens if t.endswith("gb")}
+            if listed and listed.isdisjoint(self.memory):
+                return False
+        return True
+
+    def __call__(self, title):
+        return self.match_tokens(tokenize(title))
+
+
+class GPUResolver:
+    """
+    Maps scraped GPU names and listing titles onto the names in the gpus table.
+
+    Names are indexed once by their canonical token set, with an inverted index
+    (token -> names) for titles, so a lookup costs a few set operations instead
+    of a scan over the catalog.
+    """
+
+    def __init__(self, names):
+        """
+        :param names: Canonical GPU names (usually gpus.name)
+        """
+        self.names = sorted(set(names))
+        self._entries = {}    # name -> (core, memory)
+        self._by_core = {}    # core -> [names]
+        self._index = {}      # token -> {names}
+        self._matchers = {}
+        self._lock = threading.Lock()
+
+        for name in self.names:
+            core, memory = _split(tokenize(name))
+            if not core:
+                continue
+            self._entries[name] = (core, memory)
+            self._by_core.setdefault(core, []).append(name)
+            for token in core:
+                self._index.setdefault(token, set()).add(name)
+
+    @classmethod
+    def from_db(cls, db_path=DB_PATH):
+        """Resolver over gpus.name (empty if the database or table doesn't exist yet)."""
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                names = [r[0] for r in conn.execute("SELECT name FROM gpus")]
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            names = []
+        return cls(names)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def resolve(self, name):
+        """
+        Canonical gpus.name for a scraped name ("NVIDIA GeForce RTX 4060 Ti 8GB"),
+        or None. The model tokens have to match exactly, so "RTX 4060" never
+        resolves to "RTX 4060 Ti"; a memory size only has to not contradict.
+        When several memory variants fit ("RTX 3050" for the 6 GB and 8 GB
+        cards), the first by name is returned; see resolve_all.
+
+        :param name: GPU name from another site (TechPowerUp, store listing, ...)
+        """
+        candidates = self.resolve_all(name)
+        return candidates[0] if candidates else None
+
+    def resolve_all(self, name):
+        """
+        Every catalog name a scraped name fits, best first: the exact name alone,
+        else the variants whose memory size matches or is not contradicted
+        (all memory variants when the scraped name gives no size).
+
+        :param name: GPU name from another site
+        """
+        if name in self._entries:
+            return [name]
+        core, memory = _split(tokenize(name))
+        candidates = self._by_core.get(core, [])
+        if memory:
+            fitting = [n for n in candidates if not self._entries[n][1] or self._entries[n][1] & memory]
+            # Prefer the entry that names the same memory size over one that names none
+            fitting.sort(key=lambda n: not (self._entries[n][1] & memory))
+            candidates = fitting
+        return list(candidates)
+
+    def resolve_title(self, title):
+        """
+        Most specific catalog GPU a listing title is about, or None.
+
+        :param title: Listing title / card text
+        """
+        tokens = tokenize(title)
+        token_set = set(tokens)
+        hits = {}
+        for token in token_set:
+            for name in self._index.get(token, ()):
+                hits[name] = hits.get(name, 0) + 1
+
+        best = None
+        for name, count in hits.items():
+            if count == len(self._entries[name][0]) and self.matcher(name).match_tokens(token_set):
+                key = (count, len(self._entries[name][1]))
+                if best is None or key > best[0]:
+                    best = (key, name)
+        return best[1] if best else None
+
+    def matcher(self, gpu_name):
+        """
+        Precompiled TitleMatcher for one GPU (cached), for the eBay/Amazon listing filters.
+
+        :param gpu_name: GPU name (does not have to be in the catalog)
+        """
+        m = self._matchers.get(gpu_name)
+        if m is not None:
+            return m
+
+        core, memory = _split(tokenize(gpu_name))
+        excluded = set(VARIANT_SUFFIXES - core)
+        # Tokens of bigger cards in the catalog that contain this one ("pro vii" for "vii")
+        if core:
+            supersets = set.intersection(*(self._index.get(t, set()) for t in core))
+            for name in supersets:
+                excluded |= self._entries[name][0] - core
+        m = TitleMatcher(core, memory, frozenset(excluded))
+        with self._lock:
+            self._matchers[gpu_name] = m
+        return m
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver(db_path=DB_PATH):
+    """Shared resolver over the gpus table, built on first use."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = GPUResolver.from_db(db_path)
+        return _resolver
+
+
+if __name__ == "__main__":
+    # python gpu_resolver.py "NVIDIA GeForce RTX 4060 Ti 8GB" ...
+    resolver = get_resolver()
+    print(f"{len(resolver.names)} GPUs indexed.")
+    for arg in sys.argv[1:]:
+        print(f"{arg!r}: name -> {resolver.resolve_all(arg)!r}, title -> {resolver.resolve_title(arg)!r}")
@@ -0,0 +1,195 @@
+import os
+import random
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from metrics import get_metrics
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+LEASE_SECONDS = 15 * 60     # A leased job is handed to another worker after this long
+MAX_ATTEMPTS = 4            # Attempts before a job is marked failed
+BACKOFF_BASE = 30           # Seconds; retry n waits BACKOFF_BASE * 2^(n-1), plus jitter
+
+Job = namedtuple("Job", ["id", "run_id", "gpu", "source", "attempts"])
+
+
+def new_run_id(prefix):
+    """e.g. "ebay-20250114-093012-4121"."""
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Durable work queue in the `jobs` table of gpus.db.
+
+    One row per (run, GPU, source), moving pending -> leased -> done, or back to
+    pending with a backoff delay on error and to failed after MAX_ATTEMPTS.
+    Leases are taken inside BEGIN IMMEDIATE transactions, so several processes
+    can pull from the same run without scraping a GPU twice. If a worker dies,
+    its leases expire and the jobs are picked up again.
+    """
+
+    def __init__(self, db_path=DB_PATH, owner=None, lease_seconds=LEASE_SECONDS):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                gpu TEXT NOT NULL,
+                source TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL,
+                UNIQUE (run_id, gpu, source)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_run_state ON jobs(run_id, source, state)")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn.cursor())
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def open_run(self, source, gpus, run_id=None):
+        """
+        Joins the newest unfinished run for a source, or starts a new one with a job per GPU.
+        Returns (run_id, resumed).
+
+        :param source: e.g. "ebay", "amazon", "stores"
+        :param gpus: GPU names to queue if a new run is started
+        :param run_id: Id for a new run, so several sources can share one (generated if None)
+        """
+        def txn(cur):
+            row = cur.execute("""
+                SELECT run_id FROM jobs
+                WHERE source = ? AND state IN ('pending', 'leased')
+                ORDER BY id DESC LIMIT 1
+            """, (source,)).fetchone()
+            if row:
+                return row[0], True
+
+            new_id = run_id or new_run_id(source)
+            now = time.time()
+            cur.executemany(
+                "INSERT OR IGNORE INTO jobs (run_id, gpu, source, updated_at) VALUES (?, ?, ?, ?)",
+                [(new_id, gpu, source, now) for gpu in gpus],
+            )
+            return new_id, False
+
+        return self._transaction(txn)
+
+    def lease(self, run_id, source, limit=1):
+        """
+        Leases up to `limit` jobs that are due: pending past their backoff, or leased with an expired lease.
+
+        :param run_id: Run to pull from
+        :param source: Job source
+        :param limit: Max jobs to lease (None for all due jobs)
+        """
+        def txn(cur):
+            now = time.time()
+            rows = cur.execute("""
+                SELECT id, run_id, gpu, source, attempts FROM jobs
+                WHERE run_id = ? AND source = ?
+                  AND ((state = 'pending' AND next_attempt_at <= ?)
+                    OR (state = 'leased' AND lease_expires < ?))
+                ORDER BY id
+                LIMIT ?
+            """, (run_id, source, now, now, -1 if limit is None else limit)).fetchall()
+            cur.executemany(
+                "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                [(self.owner, now + self.lease_seconds, now, r[0]) for r in rows],
+            )
+            return [Job(*r) for r in rows]
+
+        return self._transaction(txn)
+
+    def iter_jobs(self, run_id, source):
+        """
+        Yields leased jobs one at a time until the run has nothing left for this worker.
+        Waits for jobs in backoff; stops when only other workers' live leases remain.
+        """
+        while True:
+            jobs = self.lease(run_id, source)
+            if jobs:
+                yield jobs[0]
+                continue
+
+            with self._lock:
+                row = self.conn.execute("""
+                    SELECT MIN(next_attempt_at) FROM jobs
+                    WHERE run_id = ? AND source = ? AND state = 'pending'
+                """, (run_id, source)).fetchone()
+            if row[0] is None:
+                return
+            time.sleep(min(max(row[0] - time.time(), 0.5), BACKOFF_BASE))
+
+    def complete(self, job):
+        def txn(cur):
+            cur.execute("""
+                UPDATE jobs SET state = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (time.time(), job.id, self.owner))
+        self._transaction(txn)
+
+    def fail(self, job, error):
+        """
+        Puts a job back with exponential backoff, or marks it failed after MAX_ATTEMPTS.
+        Returns True if the job will be retried.
+        """
+        retry = job.attempts + 1 < MAX_ATTEMPTS
+
+        def txn(cur):
+            now = time.time()
+            attempts = job.attempts + 1
+            if not retry:
+                state, next_at = "failed", now
+            else:
+                delay = BACKOFF_BASE * 2 ** (attempts - 1)
+                state, next_at = "pending", now + delay + random.uniform(0, delay / 4)
+            cur.execute("""
+                UPDATE jobs SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ?,
+                       lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (state, attempts, next_at, str(error)[:500], now, job.id, self.owner))
+        self._transaction(txn)
+        get_metrics().incr("job_retries" if retry else "jobs_failed")
+        return retry
+
+    def counts(self, run_id):
+        with self._lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY state", (run_id,)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    # python job_queue.py  -> status of the latest runs
+    q = JobQueue()
+    runs = q.conn.execute("SELECT run_id FROM jobs GROUP BY run_id ORDER BY MAX(id) DESC LIMIT ?",
+                          (int(sys.argv[1]) if len(sys.argv) > 1 else 5,)).fetchall()
+    for (run_id,) in runs:
+        c = q.counts(run_id)
+        print(f"{run_id}: " + ", ".join(f"{state}={n}" for state, n in sorted(c.items())))
+    q.close()
@@ -1,89 +1,219 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-import time
+import re
 import sqlite3
+import sys
+from urllib.parse import urljoin
 
-db_path = "gpus.db"
-table_name = "gpus"
+from bs4 import BeautifulSoup
 
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+import fetcher
+from db_writer import bump_data_version
+from page_cache import get_cache
+from gpu_resolver import GPUResolver
+from job_queue import new_run_id
+from refresh_context import RefreshContext
 
-try:
-    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN launch_prices TEXT")
+db_path = "gpus.db"
+table_name = "gpus"
+index_url = "https://www.techpowerup.com/gpu-specs/"
+
+# Spec pages are plain HTML: fetched over HTTP a few at a time, Selenium only if one comes back blocked
+PER_HOST_LIMIT = 4
+POLITE_DELAY = (0.5, 1.5)
+
+# Only GPUs without a launch price are fetched; pass --all to refresh every spec page
+INCREMENTAL = True
+
+# "$1,599 USD", "$299", "$1,049.99 USD"; other currencies and "N/A" are left empty
+USD_PRICE = re.compile(r"\$\s*(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?")
+
+
+def parse_launch_price(text):
+    """
+    Launch price text from a spec page as a number ("$1,599 USD" --> 1599.0).
+
+    :param text: Launch price text, or None
+    """
+    if not isinstance(text, str):
+        return text
+    match = USD_PRICE.search(text)
+    if not match:
+        return None
+    whole, cents = match.groups()
+    return float(whole.replace(",", "") + (f".{cents}" if cents else ""))
+
+
+def normalize_stored_prices(conn):
+    """
+    Turns launch prices saved as text by older runs into numbers (or NULL).
+    Returns the number of rows fixed.
+
+    :param conn: sqlite3 connection
+    """
+    rows = conn.execute(f"SELECT name, launch_prices FROM {table_name} WHERE typeof(launch_prices) = 'text'").fetchall()
+    if not rows:
+        return 0
+    conn.executemany(f"UPDATE {table_name} SET launch_prices = ? WHERE name = ?",
+                     [(parse_launch_price(text), name) for name, text in rows])
+    # Same commit as the fix, so cached dashboards and snapshots see the new prices
+    bump_data_version(conn)
     conn.commit()
-    print(f"Column 'launch_prices' added to {table_name}.")
-except sqlite3.OperationalError:
-    print(f"Column 'launch_prices' already exists.")
-
+    return len(rows)
 
 
 def clean_gpu_name(scraped_name):
     # Remove "Specs" from the end
     name = scraped_name.replace(" Specs", "").strip()
-    
+
     # List of vendors to remove from the start
     vendors = ["NVIDIA ", "AMD ", "Intel ", "ATI "]
-    
+
     for vendor in vendors:
         if name.startswith(vendor):
             name = name.replace(vendor, "", 1) # Remove only the first occurrence
             break
-            
+
     return name.strip()
 
 
+def parse_spec_links(html):
+    """(GPU name, spec page URL) pairs from the first column of the GPU table."""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for table in soup.find_all("table"):
+        if not any("Name" in th.get_text() for th in table.find_all("th")):
+            continue
+        for row in table.find_all("tr"):
+            cell = row.find("td")
+            link = cell.find("a") if cell else None
+            if link and link.get("href"):
+                links.append((link.get_text(" ", strip=True), urljoin(index_url, link["href"])))
+    return links
+
+
+def parse_spec_page(html):
+    """Returns (page title, launch price text or "Not Found") for a spec page."""
+    soup = BeautifulSoup(html, "html.parser")
+    launch_price = "Not Found"
+    for dt in soup.find_all("dt"):
+        if "Launch Price" in dt.get_text():
+            dd = dt.find_next_sibling("dd")
+            if dd:
+                launch_price = dd.get_text(strip=True)
+            break
+    title = soup.title.get_text() if soup.title else ""
+    return title, launch_price
 
-driver = webdriver.Chrome()
-driver.get("https://www.techpowerup.com/gpu-specs/")
-links = []
 
-rows = driver.find_elements(By.XPATH, "//table[.//th[contains(text(), 'Name')]]//tr")
+def spec_needs_js(html):
+    """True for bot checks / rate-limit pages instead of a spec sheet."""
+    return fetcher.looks_blocked(html) or "<dt" not in html
 
-for row in rows:
-    try:
-        link_element = row.find_element(By.XPATH, ".//td[1]//a")
-        url = link_element.get_attribute("href")
-        if url:
-            links.append(url)
-    except:
-        continue
 
-links = list(set(links))
-print(f"Successfully collected {len(links)} unique GPU links.")
+def index_needs_js(html):
+    return fetcher.looks_blocked(html) or "gpu-specs/" not in html
+
+
+def plan_links(links, resolver, priced, incremental=INCREMENTAL):
+    """
+    Spec pages worth fetching.
+
+    In incremental mode, links whose name resolves to a GPU that already has a
+    launch price are skipped, and so are links that match no GPU in the DB.
 
+    :param links: (name, url) pairs from the index page
+    :param resolver: GPUResolver over the DB names
+    :param priced: Set of DB names that already have a launch price
+    :param incremental: Skip GPUs that are already priced
+    """
+    urls = []
+    for name, url in dict.fromkeys(links):
+        if incremental:
+            db_name = resolver.resolve(clean_gpu_name(name))
+            if db_name is None or db_name in priced:
+                continue
+        urls.append(url)
+    return urls
 
-for index, link in enumerate(links):
+
+def ensure_schema(conn):
+    """Adds the launch_prices column and converts prices older runs saved as text."""
     try:
-        driver.get(link)
-        time.sleep(10)        
-        launch_price = "N/A"  
-        try:
-            price_element = driver.find_element(By.XPATH, "//dt[contains(text(), 'Launch Price')]/following-sibling::dd[1]")
-            launch_price = price_element.text.strip()
-        except:
-            launch_price = "Not Found"
-        full_title = driver.title.split('|')[0].strip()
-        clean_name = clean_gpu_name(full_title)
-
-        print(f"[{index + 1}/{len(links)}] {clean_name} -> {launch_price}")
-
-        if launch_price != "Not Found":
-            cursor.execute(f"""
-                UPDATE {table_name} 
-                SET launch_prices = ? 
+        conn.execute(f"ALTER TABLE {table_name} ADD COLUMN launch_prices REAL")
+        bump_data_version(conn)
+        conn.commit()
+        print(f"Column 'launch_prices' added to {table_name}.")
+    except sqlite3.OperationalError:
+        pass
+
+    fixed = normalize_stored_prices(conn)
+    if fixed:
+        print(f"Converted {fixed} launch prices stored as text to numbers.")
+
+
+def refresh(ctx, incremental=INCREMENTAL):
+    """
+    Fetches launch prices from the TechPowerUp spec pages and queues them on the context's writer.
+
+    :param ctx: refresh_context.RefreshContext
+    :param incremental: Only fetch GPUs without a launch price
+    """
+    conn = ctx.connect()
+    # TechPowerUp titles are matched to DB names by normalized tokens ("AMD Radeon Pro W7900" ==
+    # "Radeon Pro W7900"), so mismatches are reported without a per-row UPDATE + commit
+    resolver = GPUResolver(r[0] for r in conn.execute(f"SELECT name FROM {table_name}"))
+    priced = {r[0] for r in conn.execute(f"SELECT name FROM {table_name} WHERE launch_prices IS NOT NULL")}
+    conn.close()
+
+    # Pages come from the cache when fresh; a browser is only borrowed if a page needs it
+    fetch_opts = dict(per_host=PER_HOST_LIMIT, delay=POLITE_DELAY, driver_pool=ctx, cache=get_cache())
+    index = fetcher.scrape_many([index_url], lambda url: url, lambda html, url: parse_spec_links(html),
+                                needs_js=index_needs_js, **fetch_opts)
+    links = index.get(index_url) or []
+    print(f"Successfully collected {len(links)} GPU links.")
+
+    urls = plan_links(links, resolver, priced, incremental)
+    if incremental:
+        print(f"{len(urls)} GPUs without a launch price to fetch ({len(priced)} already priced).")
+
+    writer = ctx.writer
+
+    def on_result(done, link, parsed, error):
+        if error is not None or parsed is None:
+            print(f"[{done}/{len(urls)}] Could not load {link}" + (f": {error}" if error else ""))
+            return
+        full_title, price_text = parsed
+        clean_name = clean_gpu_name(full_title.split('|')[0].strip())
+        launch_price = parse_launch_price(price_text)
+        print(f"[{done}/{len(urls)}] {clean_name} -> {price_text}")
+
+        if launch_price is None:
+            return
+        db_name = resolver.resolve(clean_name)
+        if db_name is not None:
+            writer.execute(f"""
+                UPDATE {table_name}
+                SET launch_prices = ?
                 WHERE name = ?
-            """, (launch_price, clean_name))
+            """, (launch_price, db_name))
+            print(f"   -> Saved to DB as {db_name} (${launch_price:,.2f}).")
+        else:
+            print(f"   -> GPU not found in DB (Name mismatch).")
+
+    fetcher.scrape_many(urls, lambda url: url, lambda html, url: parse_spec_page(html),
+                        needs_js=spec_needs_js, on_result=on_result, **fetch_opts)
 
-            if cursor.rowcount > 0:
-                print(f"   -> Saved to DB.")
-            else:
-                print(f"   -> GPU not found in DB (Name mismatch).")
-            conn.commit()
 
-    except Exception as e:
-        print(f"Error scraping {link}: {e}")
+def main(incremental=INCREMENTAL):
+    ctx = RefreshContext(db_path, run_id=new_run_id("msrp"), workers=1)
+    try:
+        conn = ctx.connect()
+        ensure_schema(conn)
+        conn.close()
+        refresh(ctx, incremental)
+    finally:
+        ctx.finish("launch_price_scraper")
+    print("Done.")
+
 
-conn.close()
-driver.quit()
-print("Done.")
\ No newline at end of file
+if __name__ == "__main__":
+    main(incremental="--all" not in sys.argv[1:])
@@ -0,0 +1,187 @@
+import re
+import threading
+from statistics import mean, median
+
+from page_parser import is_valid_ebay_listing
+
+# --- CONFIGURATION ---
+MIN_NEW_LISTINGS = 2     # Valid new listings needed to settle a new price without the LLM
+MIN_USED_LISTINGS = 3    # Valid used listings needed to settle a used average without the LLM
+MIN_PRICE = 50           # Anything cheaper is a cable / box / scam (same rule as the prompts)
+
+STORE_NAMES = {"amazon": "Amazon", "newegg": "Newegg", "bestbuy": "BestBuy", "ebay": "eBay"}
+
+# Not new: skipped for the new-market price
+NOT_NEW = ["renewed", "refurbished", "open box", "pre-owned", "used"]
+# Same rejects as the eBay prompt, on top of is_valid_ebay_listing's parts/broken/box only
+REJECT = ["cooler", "read description", "waterblock", "water block", "backplate", "fan only", "for parts"]
+
+PRICE_LINE = re.compile(r"^(?:from\s+)?\$\s?(\d{1,3}(?:,\d{3})*|\d+)(?:\.(\d{2}))?(?:\s|$)", re.IGNORECASE)
+CENTS_LINE = re.compile(r"^\d{2}$")
+# Checked in order, as whole words ("new" must not match "renewed")
+CONDITION_WORDS = ["parts only", "refurbished", "renewed", "open box", "pre-owned", "used", "brand new", "new"]
+CONDITION_RE = [(w, re.compile(rf"\b{re.escape(w)}\b")) for w in CONDITION_WORDS]
+NOT_A_PRICE = ["list:", "was:", "typical:", "shipping", "delivery", "save ", "coupon", "+$", "/mo", "per month"]
+
+_stats_lock = threading.Lock()
+STATS = {"raw_tokens": 0, "prompt_tokens": 0, "settled": 0, "llm": 0}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for before/after reports."""
+    return len(text) // 4 if text else 0
+
+
+def _is_title(line, keywords):
+    if len(line) < 15 or len(line.split()) < 3 or line.startswith("$"):
+        return False
+    low = line.lower()
+    if any(w in low for w in NOT_A_PRICE):
+        return False
+    return any(k in low for k in keywords) if keywords else any(c.isalpha() for c in line)
+
+
+def gpu_keywords(gpu_name):
+    """Model words a listing title has to mention ("RTX 4060 Ti" -> ["4060", "ti"])."""
+    ignore_list = ["geforce", "radeon", "nvidia", "amd", "intel", "arc", "rtx", "gtx"]
+    return [w for w in gpu_name.lower().split() if w not in ignore_list]
+
+
+def _condition(text):
+    text = text.lower()
+    for word, pattern in CONDITION_RE:
+        if pattern.search(text):
+            return "new" if word == "brand new" else word
+    return None
+
+
+def extract_listings(text, keywords=None):
+    """
+    Pulls candidate (title, price, condition) tuples out of a page's visible text.
+
+    A price line is paired with the closest title-like line above it; later prices
+    for the same title (list price, shipping, monthly plans) are ignored.
+
+    :param text: body.text of a search results page
+    :param keywords: If given, only lines containing one of these count as titles
+                     (keeps ratings / "bought in past month" lines from posing as titles)
+    """
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    listings = []
+    title, title_idx, used = None, -1, True
+
+    for i, line in enumerate(lines):
+        m = PRICE_LINE.match(line)
+        if not m:
+            if _is_title(line, keywords):
+                title, title_idx, used = line, i, False
+            continue
+
+        prev = lines[i - 1].lower() if i > 0 else ""
+        if used or title is None or any(w in line.lower() or w in prev for w in NOT_A_PRICE):
+            continue
+
+        dollars = m.group(1).replace(",", "")
+        cents = m.group(2)
+        if cents is None and i + 1 < len(lines) and CENTS_LINE.match(lines[i + 1]):
+            cents = lines[i + 1]  # Amazon renders "$299" and "99" on separate lines
+        price = float(f"{dollars}.{cents or '00'}")
+
+        condition = _condition(" ".join(lines[title_idx:i + 1]))
+        listings.append((title, price, condition))
+        used = True
+
+    return listings
+
+
+def matches_gpu(title, gpu_name):
+    """
+    Same title filters as parse_ebay_sold (which already rejects Ti/Super/XT
+    variants of a card that has no such suffix), plus the eBay prompt's rejects.
+    """
+    title = title.lower()
+    if not is_valid_ebay_listing(title, gpu_name):
+        return False
+    return not any(w in title for w in REJECT)
+
+
+def _format(candidates):
+    return "\n".join(f"{title} | ${price:.2f} | {condition or 'unknown'}" for title, price, condition in candidates)
+
+
+def settle_new_price(gpu_name, text_data):
+    """
+    Tries to settle the best NEW price from Amazon/Newegg/Best Buy text with rules.
+
+    Returns (result, compact_data). result matches analyze_new_market's JSON (or None
+    if the rules can't decide); compact_data is {store: candidate lines} to send to
+    the LLM instead of the raw page text.
+
+    :param gpu_name: GPU name
+    :param text_data: {"amazon": text, "newegg": text, "bestbuy": text}
+    """
+    compact, pool = {}, []
+    for store, text in text_data.items():
+        if not text:
+            continue
+        found = [c for c in extract_listings(text, gpu_keywords(gpu_name)) if matches_gpu(c[0], gpu_name)]
+        found = [c for c in found if c[1] >= MIN_PRICE and not any(w in (c[2] or "") for w in NOT_NEW)]
+        if found:
+            compact[store] = _format(found)
+            pool.extend((store, c) for c in found)
+
+    if len(pool) >= MIN_NEW_LISTINGS:
+        # Cheap leftovers (accessories that slipped through) sit far below the pack
+        mid = median(c[1] for _, c in pool)
+        pool = [(store, c) for store, c in pool if c[1] >= 0.5 * mid]
+    if len(pool) < MIN_NEW_LISTINGS:
+        return None, compact
+
+    store, (title, price, _) = min(pool, key=lambda p: p[1][1])
+    return {"best_price": price, "store": STORE_NAMES.get(store, store), "description": title}, compact
+
+
+def settle_used_price(gpu_name, ebay_text):
+    """
+    Tries to settle the average USED eBay price with rules (outliers < $50 or > 200% dropped).
+
+    Returns (result, compact_text) like settle_new_price.
+
+    :param gpu_name: GPU name
+    :param ebay_text: body.text of the eBay search page
+    """
+    if not ebay_text:
+        return None, ""
+    found = [c for c in extract_listings(ebay_text, gpu_keywords(gpu_name)) if matches_gpu(c[0], gpu_name)]
+    found = [c for c in found if c[1] >= MIN_PRICE and c[2] not in ("renewed", "refurbished", "parts only")]
+    compact = _format(found)
+
+    if found:
+        mid = median(c[1] for c in found)
+        found = [c for c in found if 0.5 * mid <= c[1] <= 2 * mid]
+    if len(found) < MIN_USED_LISTINGS:
+        return None, compact
+
+    return {"average_price": round(mean(c[1] for c in found), 2), "listing_count": len(found)}, compact
+
+
+def record(raw_text, prompt_text, settled):
+    """
+    Adds one question to the before/after token report.
+
+    :param raw_text: Page text that used to be sent
+    :param prompt_text: Text actually sent (empty if the rules settled it)
+    :param settled: True if no LLM call was needed
+    """
+    with _stats_lock:
+        STATS["raw_tokens"] += estimate_tokens(raw_text)
+        STATS["prompt_tokens"] += estimate_tokens(prompt_text)
+        STATS["settled" if settled else "llm"] += 1
+
+
+def report():
+    with _stats_lock:
+        s = dict(STATS)
+    ratio = s["raw_tokens"] / s["prompt_tokens"] if s["prompt_tokens"] else float("inf")
+    return (f"Pre-extraction: {s['settled']} settled by rules, {s['llm']} sent to LLM; "
+            f"~{s['raw_tokens']} -> ~{s['prompt_tokens']} prompt tokens ({ratio:.1f}x smaller)")
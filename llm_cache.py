@@ -0,0 +1,134 @@
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# --- CONFIGURATION ---
+CACHE_PATH = "llm_cache.db"
+
+
+def normalize_prompt(prompt):
+    """
+    Collapses whitespace so re-indenting a prompt template does not change its hash.
+
+    :param prompt: Prompt text
+    """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def prompt_key(model, prompt):
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent cache of parsed JSON answers keyed on (model, normalized prompt hash).
+
+    Keeps hit/miss counts and the tokens a hit avoided, both for this process
+    (`hits`, `misses`, `tokens_saved`) and cumulatively in the `llm_cache_stats` table.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                tokens INTEGER,
+                created_at REAL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                hits INTEGER,
+                misses INTEGER,
+                tokens_saved INTEGER
+            )
+        """)
+        self._conn.execute("INSERT OR IGNORE INTO llm_cache_stats VALUES (1, 0, 0, 0)")
+        self._conn.commit()
+
+    def get(self, model, prompt):
+        """
+        Returns the stored parsed JSON for this prompt, or None.
+
+        :param model: Model name
+        :param prompt: Full prompt text
+        """
+        key = prompt_key(model, prompt)
+        with self._lock:
+            row = self._conn.execute("SELECT response, tokens FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                self._conn.execute("UPDATE llm_cache_stats SET misses = misses + 1 WHERE id = 1")
+                self._conn.commit()
+                return None
+            tokens = row[1] or 0
+            self.hits += 1
+            self.tokens_saved += tokens
+            self._conn.execute("UPDATE llm_responses SET hit_count = hit_count + 1 WHERE key = ?", (key,))
+            self._conn.execute("UPDATE llm_cache_stats SET hits = hits + 1, tokens_saved = tokens_saved + ? WHERE id = 1", (tokens,))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, model, prompt, result, tokens=0):
+        """
+        :param model: Model name
+        :param prompt: Full prompt text
+        :param result: Parsed JSON answer
+        :param tokens: Total tokens the call used (what a later hit saves)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+                (prompt_key(model, prompt), model, json.dumps(result), tokens, time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            hits, misses, saved = self._conn.execute("SELECT hits, misses, tokens_saved FROM llm_cache_stats").fetchone()
+        return {"entries": entries, "hits": hits, "misses": misses, "tokens_saved": saved}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.execute("UPDATE llm_cache_stats SET hits = 0, misses = 0, tokens_saved = 0")
+            self._conn.commit()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_llm_cache():
+    """Shared cache instance used by price_updater."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LLMCache()
+    return _default
+
+
+if __name__ == "__main__":
+    # python llm_cache.py [stats|clear]
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_llm_cache()
+    if cmd == "clear":
+        cache.clear()
+        print("LLM cache cleared.")
+    else:
+        s = cache.stats()
+        print(f"{s['entries']} cached answers, {s['hits']} hits / {s['misses']} misses, {s['tokens_saved']} tokens saved")
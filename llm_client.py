@@ -0,0 +1,205 @@
+import asyncio
+import json
+import random
+import threading
+
+from openai import AsyncOpenAI
+
+from llm_cache import get_llm_cache
+from metrics import get_metrics
+
+# --- CONFIGURATION ---
+BASE_URL = "https://api.moonshot.ai/v1"
+MODEL = "kimi-k2.5"
+CONCURRENCY = 8         # Max LLM requests in flight
+REQUEST_TIMEOUT = 90    # Seconds per request
+RETRIES = 3             # Extra attempts after a timeout / API error / bad JSON
+BATCH_SIZE = 5          # GPUs packed into one prompt in batched mode
+BATCH_WAIT = 2.0        # Seconds to wait for a batch to fill before sending it anyway
+
+
+def parse_json_answer(content):
+    """Parses a JSON answer, unwrapping a ```json fenced block if present."""
+    if "```json" in content: content = content.split("```json")[1].split("```")[0]
+    return json.loads(content)
+
+
+class AsyncLLMClient:
+    """
+    Async chat-completions client with a concurrency limit, timeouts and retries.
+    Answers go through the LLM cache, so unchanged prompts never reach the API.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, model=MODEL, concurrency=CONCURRENCY,
+                 timeout=REQUEST_TIMEOUT, retries=RETRIES, cache=None):
+        """
+        :param api_key: API key
+        :param base_url: OpenAI-compatible endpoint (a local stub works too)
+        :param model: Model name
+        :param concurrency: Max requests in flight
+        :param timeout: Per-request timeout in seconds
+        :param retries: Extra attempts per request
+        :param cache: llm_cache.LLMCache (the shared one if None)
+        """
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache if cache is not None else get_llm_cache()
+        self._concurrency = concurrency
+        self._sem = None
+        self.calls = 0
+
+    async def ask(self, prompt):
+        """
+        Returns the parsed JSON answer for a prompt, or None after all retries fail.
+
+        :param prompt: Prompt text
+        """
+        metrics = get_metrics()
+        cached = self.cache.get(self.model, prompt)
+        if cached is not None:
+            metrics.incr("llm_cache_hits")
+            return cached
+
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._concurrency)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._sem:
+                    self.calls += 1
+                    metrics.incr("llm_calls")
+                    with metrics.timer("llm_call"):
+                        response = await asyncio.wait_for(
+                            self.client.chat.completions.create(
+                                model=self.model,
+                                messages=[{"role": "user", "content": prompt}],
+                                temperature=0.6,
+                                extra_body={"thinking": {"type": "disabled"}}
+                            ),
+                            timeout=self.timeout,
+                        )
+                result = parse_json_answer(response.choices[0].message.content)
+                usage = response.usage
+                tokens = usage.total_tokens if usage else 0
+                if usage:
+                    metrics.incr("llm_prompt_tokens", usage.prompt_tokens or 0)
+                    metrics.incr("llm_completion_tokens", usage.completion_tokens or 0)
+                self.cache.put(self.model, prompt, result, tokens=tokens)
+                return result
+            except Exception as e:
+                if attempt == self.retries:
+                    metrics.incr("llm_errors")
+                    print(f"    [!] AI Error: {e!r}")
+                    return None
+                metrics.incr("llm_retries")
+                with metrics.timer("llm_backoff"):
+                    await asyncio.sleep(2 ** attempt + random.uniform(0, 1))
+
+    async def ask_batch(self, task, items, answer_fields):
+        """
+        Packs several GPUs into one prompt and returns {gpu_name: answer dict}.
+        GPUs missing from the answer map to None.
+
+        :param task: Instructions that apply to every GPU
+        :param items: {gpu_name: extracted listing text}
+        :param answer_fields: JSON fields expected per GPU, e.g. '"best_price": float, "store": str'
+        """
+        prompt = build_batch_prompt(task, items, answer_fields)
+        answer = await self.ask(prompt)
+        results = {name: None for name in items}
+        if isinstance(answer, list):
+            for entry in answer:
+                if isinstance(entry, dict) and entry.get("gpu") in results:
+                    results[entry["gpu"]] = entry
+        return results
+
+    async def close(self):
+        await self.client.close()
+
+
+def build_batch_prompt(task, items, answer_fields):
+    sections = "\n\n".join(f'### GPU: "{name}"\n{text or "No Data"}' for name, text in items.items())
+    return f"""
+    {task}
+
+    Apply the task separately to each GPU section below. Only use a section's text for that GPU.
+
+    {sections}
+
+    Return JSON ONLY: an array with one object per GPU, in the same order:
+    [
+        {{"gpu": "exact GPU name from the section header", {answer_fields}}}
+    ]
+    """
+
+
+class Batcher:
+    """
+    Collects single-GPU requests into batched prompts.
+
+    `submit()` waits until BATCH_SIZE GPUs are queued (or BATCH_WAIT seconds pass),
+    sends one prompt for all of them and hands each caller its own answer.
+    """
+
+    def __init__(self, llm, task, answer_fields, batch_size=BATCH_SIZE, wait=BATCH_WAIT):
+        self.llm = llm
+        self.task = task
+        self.answer_fields = answer_fields
+        self.batch_size = batch_size
+        self.wait = wait
+        self._pending = {}
+        self._timer = None
+
+    async def submit(self, gpu_name, text):
+        future = asyncio.get_running_loop().create_future()
+        self._pending[gpu_name] = (text, future)
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch):
+        try:
+            results = await self.llm.ask_batch(self.task, {name: text for name, (text, _) in batch.items()}, self.answer_fields)
+        except Exception as e:
+            print(f"    [!] AI Batch Error: {e!r}")
+            results = {}
+        for name, (_, future) in batch.items():
+            if not future.done():
+                future.set_result(results.get(name))
+
+
+class LLMRunner:
+    """
+    Runs an AsyncLLMClient on a background event loop so threaded code
+    (price_updater's GPU workers) can share one concurrency limit.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Schedules a coroutine on the LLM loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def ask(self, prompt):
+        return self.submit(self.llm.ask(prompt)).result()
+
+    def close(self):
+        self.submit(self.llm.close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,206 @@
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+METRICS_DIR = "metrics"    # One Prometheus text file per run lands here
+PREFIX = "gpu_scrape"
+
+
+class Metrics:
+    """
+    Per-process timers and counters for a scrape run.
+
+    Timers add up wall-clock seconds per stage ("driver_get", "sleep",
+    "llm_call", "db_commit", ...); counters add up events ("pages_fetched",
+    "page_bytes", "llm_tokens", "rows_written", "llm_retries", ...). Both are
+    thread-safe and cheap enough to leave on. finish() writes them to the
+    scrape_metrics table and a Prometheus text file and prints where the time went.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.timers = {}     # stage -> [total seconds, calls, max seconds]
+            self.counters = {}   # name -> value
+
+    def incr(self, name, value=1):
+        """
+        Adds to a counter.
+
+        :param name: e.g. "pages_fetched"
+        :param value: Amount (bytes, tokens, rows, ...)
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        """Adds one timed call of a stage."""
+        with self._lock:
+            t = self.timers.setdefault(stage, [0.0, 0, 0.0])
+            t[0] += seconds
+            t[1] += 1
+            t[2] = max(t[2], seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the body of a `with` block (also inside coroutines)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage):
+        """Decorator form of timer() for plain and async functions."""
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(stage):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def sleep(self, seconds):
+        """time.sleep that shows up as the "sleep" stage."""
+        with self.timer("sleep"):
+            time.sleep(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return time.time() - self.started, {k: list(v) for k, v in self.timers.items()}, dict(self.counters)
+
+    def summary(self):
+        """Where the wall-clock time went, per stage, plus the counters."""
+        wall, timers, counters = self.snapshot()
+        lines = [f"Run took {wall:.1f}s. Time per stage (stages overlap when work runs concurrently):"]
+        for stage, (total, calls, longest) in sorted(timers.items(), key=lambda kv: -kv[1][0]):
+            share = total / wall * 100 if wall else 0
+            lines.append(f"  {stage:22s} {total:9.2f}s {share:6.1f}%  {calls:6d} calls  "
+                         f"avg {total / calls:7.3f}s  max {longest:7.3f}s")
+        if counters:
+            lines.append("  " + ", ".join(f"{k}={v:g}" for k, v in sorted(counters.items())))
+        return "\n".join(lines)
+
+    def save(self, script, run_id, db_path=DB_PATH):
+        """
+        Appends this run's timers and counters to the scrape_metrics table.
+
+        :param script: e.g. "ebay_scraper"
+        :param run_id: Job-queue run id
+        :param db_path: SQLite database
+        """
+        wall, timers, counters = self.snapshot()
+        now = time.time()
+        rows = [(run_id, script, "wall_seconds", "timer", wall, 1, wall, now)]
+        rows += [(run_id, script, stage, "timer", total, calls, longest, now)
+                 for stage, (total, calls, longest) in timers.items()]
+        rows += [(run_id, script, name, "counter", value, None, None, now) for name, value in counters.items()]
+
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_metrics (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT,
+                script TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                value REAL NOT NULL,
+                calls INTEGER,
+                max_seconds REAL,
+                recorded_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_metrics_run ON scrape_metrics(run_id, name)")
+        conn.executemany("""
+            INSERT INTO scrape_metrics (run_id, script, name, kind, value, calls, max_seconds, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+
+    def prometheus_text(self, script, run_id):
+        """Prometheus text exposition format of this run."""
+        wall, timers, counters = self.snapshot()
+        labels = f'script="{script}",run_id="{run_id}"'
+        lines = [
+            f"# HELP {PREFIX}_wall_seconds Wall-clock duration of the run.",
+            f"# TYPE {PREFIX}_wall_seconds gauge",
+            f"{PREFIX}_wall_seconds{{{labels}}} {wall:.6f}",
+            f"# HELP {PREFIX}_stage_seconds_total Seconds spent per stage.",
+            f"# TYPE {PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [f'{PREFIX}_stage_seconds_total{{{labels},stage="{s}"}} {t[0]:.6f}' for s, t in sorted(timers.items())]
+        lines += [f"# HELP {PREFIX}_stage_calls_total Timed calls per stage.",
+                  f"# TYPE {PREFIX}_stage_calls_total counter"]
+        lines += [f'{PREFIX}_stage_calls_total{{{labels},stage="{s}"}} {t[1]}' for s, t in sorted(timers.items())]
+        lines += [f"# HELP {PREFIX}_stage_max_seconds Slowest single call per stage.",
+                  f"# TYPE {PREFIX}_stage_max_seconds gauge"]
+        lines += [f'{PREFIX}_stage_max_seconds{{{labels},stage="{s}"}} {t[2]:.6f}' for s, t in sorted(timers.items())]
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total{{{labels}}} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, script, run_id, directory=METRICS_DIR):
+        """Writes <directory>/<script>-<run_id>.prom atomically and returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{script}-{run_id}.prom")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text(script, run_id))
+        os.replace(tmp, path)
+        return path
+
+    def finish(self, script, run_id, db_path=DB_PATH):
+        """Saves the run to scrape_metrics and a .prom file, then prints the summary."""
+        try:
+            self.save(script, run_id, db_path)
+            path = self.write_prometheus(script, run_id)
+            print(f"Metrics saved to scrape_metrics and {path}")
+        except (OSError, sqlite3.Error) as e:
+            print(f"    [!] Could not save metrics: {e}")
+        print(self.summary())
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Process-wide Metrics instance shared by the scrapers, fetcher, LLM client and DB writer."""
+    return _metrics
+
+
+if __name__ == "__main__":
+    # Stage totals of the most recent runs
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        runs = conn.execute("""
+            SELECT run_id, script, MAX(recorded_at) FROM scrape_metrics
+            GROUP BY run_id, script ORDER BY MAX(recorded_at) DESC LIMIT 5
+        """).fetchall()
+    except sqlite3.OperationalError:
+        runs = []
+    for run_id, script, _ in runs:
+        print(f"{script} {run_id}")
+        for name, kind, value, calls in conn.execute("""
+            SELECT name, kind, value, calls FROM scrape_metrics WHERE run_id = ? AND script = ?
+            ORDER BY kind DESC, value DESC
+        """, (run_id, script)):
+            print(f"  {name:22s} {value:12.2f}" + (f"  ({calls} calls)" if kind == "timer" else ""))
+    conn.close()
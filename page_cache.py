@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+# --- CONFIGURATION ---
+CACHE_PATH = "page_cache.db"
+MAX_BYTES = 200 * 1024 * 1024   # Compressed size before LRU eviction kicks in
+
+HOUR = 3600
+DEFAULT_TTL = 6 * HOUR
+# How long a page stays fresh, per source
+SOURCE_TTLS = {
+    "www.ebay.com": 6 * HOUR,
+    "www.amazon.com": 12 * HOUR,
+    "www.newegg.com": 12 * HOUR,
+    "www.bestbuy.com": 12 * HOUR,
+    "www.techpowerup.com": 30 * 24 * HOUR,   # Spec pages / launch prices barely change
+}
+
+# Cache-only mode: never touch the network, serve whatever is cached (even if stale)
+OFFLINE = os.getenv("PAGE_CACHE_OFFLINE") == "1"
+
+
+def cache_key(url, kind):
+    """
+    Content address for a page: sha256 of the page kind and URL.
+
+    :param url: Page URL
+    :param kind: What was stored ("html" for page source, "text" for body text)
+    """
+    return hashlib.sha256(f"{kind}:{url.strip()}".encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Compressed page store in a side SQLite file, with per-source TTLs and LRU eviction.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, ttls=None, offline=OFFLINE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = SOURCE_TTLS if ttls is None else ttls
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                kind TEXT,
+                body BLOB,
+                size INTEGER,
+                fetched_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)")
+        self._conn.commit()
+
+    def ttl_for(self, url):
+        return self.ttls.get(urlsplit(url).netloc, DEFAULT_TTL)
+
+    def get(self, url, kind="html"):
+        """
+        Returns the cached page, or None if missing or expired.
+        In offline mode expired pages are still returned.
+
+        :param url: Page URL
+        :param kind: "html" or "text"
+        """
+        key = cache_key(url, kind)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, fetched_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None or (not self.offline and now - row[1] > self.ttl_for(url)):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, url, content, kind="html"):
+        """
+        Stores a page and evicts the least recently used pages if over budget.
+
+        :param url: Page URL
+        :param content: Page HTML or text
+        :param kind: "html" or "text"
+        """
+        if not content:
+            return
+        body = zlib.compress(content.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url, kind), url, kind, body, len(body), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_at ASC").fetchall()
+        drop = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE key = ?", drop)
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"pages": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_cache():
+    """Shared cache instance used by the scrapers."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PageCache()
+    return _default
+
+
+if __name__ == "__main__":
+    # python page_cache.py [stats|clear]
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_cache()
+    if cmd == "clear":
+        cache.clear()
+        print("Page cache cleared.")
+    else:
+        s = cache.stats()
+        print(f"{s['pages']} pages, {s['bytes'] / 1024 / 1024:.1f} MB compressed ({CACHE_PATH})")
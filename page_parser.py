@@ -0,0 +1,221 @@
+"""
+Listing parsers for saved eBay / Amazon result pages.
+
+Everything here is a pure function of the page HTML and the GPU name, so the
+same code handles a fresh driver.page_source (one WebDriver round trip per page
+instead of several per listing), a plain HTTP response or a cached page, and
+can be run offline or in a process pool. Pages are parsed with lxml using
+precompiled XPath versions of the scrapers' CSS selectors.
+
+Usage (re-parse every cached page in parallel):
+    python page_parser.py [--store ebay|amazon] [--workers 4]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean
+
+from lxml import etree, html as lxml_html
+
+from gpu_resolver import get_resolver
+from page_cache import get_cache
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+EBAY_MAX_SALES = 10     # Last N valid sales averaged for the used price
+AMAZON_MAX_RESULTS = 5  # Top N valid results averaged for the new price
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# CSS selector -> XPath
+EBAY_ITEMS = etree.XPath(f"//li[{_has_class('s-card')}]")                                           # li.s-card
+EBAY_TITLE = etree.XPath(f".//*[{_has_class('s-card__title')} or {_has_class('s-item__title')}]")   # .s-card__title, .s-item__title
+EBAY_PRICE = etree.XPath(f".//*[{_has_class('s-card__price')} or {_has_class('s-item__price')}]")   # .s-card__price, .s-item__price
+AMAZON_ITEMS = etree.XPath(f"//div[{_has_class('s-result-item')}][@data-component-type='s-search-result']")
+AMAZON_PRICE = etree.XPath(f".//*[{_has_class('a-price')}]//*[{_has_class('a-offscreen')}]")       # .a-price .a-offscreen
+# Visible text only: like BeautifulSoup's get_text, skip <script> / <style> contents
+TEXT = etree.XPath("descendant-or-self::text()[not(ancestor::script or ancestor::style)]")
+
+
+def parse_html(page):
+    """
+    Parses a page into an lxml tree.
+
+    :param page: HTML as str or bytes
+    """
+    if isinstance(page, str):
+        page = page.encode("utf-8")
+    return lxml_html.document_fromstring(page, parser=_PARSER)
+
+
+def text_of(el, sep=" "):
+    """Stripped text pieces of an element joined with sep (BeautifulSoup get_text(sep, strip=True))."""
+    return sep.join(t.strip() for t in TEXT(el) if t.strip())
+
+
+def get_price_float(price_str):
+    """
+    Converts price to float ($19.99 --> 19.99)
+
+    :param price_str: Price string ("$19.99")
+    """
+    try:
+        clean_str = re.sub(r'[^\d.]', '', price_str)
+        return float(clean_str)
+    except ValueError:
+        return None
+
+
+def is_valid_ebay_listing(title_text, gpu_name):
+    """
+    eBay title filters.
+
+    :param title_text: Lowercased listing title
+    :param gpu_name: GPU name
+    """
+    # Filters
+    if "parts only" in title_text or "broken" in title_text or "box only" in title_text:
+        return False
+
+    # Strict Name Match ("3080" in the title, but not "3080 Ti" or a 12GB card when we want 10GB)
+    return get_resolver().matcher(gpu_name)(title_text)
+
+
+def is_valid_amazon_listing(full_text, gpu_name):
+    """
+    Amazon result filters.
+
+    :param full_text: Lowercased text of the whole result card
+    :param gpu_name: GPU name
+    """
+    # Skip Refurbished/Renewed stuff
+    if "renewed" in full_text or "refurbished" in full_text:
+        return False
+
+    # Skip sponsored stuff
+    if "sponsored" in full_text:
+        return False
+
+    # Model tokens must all be there, without a Ti/Super/XT/Mobile suffix the GPU doesn't have
+    return get_resolver().matcher(gpu_name)(full_text)
+
+
+def ebay_sold_prices(page, gpu_name, limit=EBAY_MAX_SALES):
+    """
+    Prices of the first valid sales on an eBay 'Sold Items' results page.
+
+    :param page: Results page HTML
+    :param gpu_name: GPU name
+    :param limit: Stop after this many prices
+    """
+    prices = []
+    for item in EBAY_ITEMS(parse_html(page)):
+        titles = EBAY_TITLE(item)
+        if not titles:
+            continue
+        if not is_valid_ebay_listing(text_of(titles[0]).lower(), gpu_name):
+            continue
+
+        price_els = EBAY_PRICE(item)
+        if not price_els:
+            continue
+        val = get_price_float(text_of(price_els[0], ""))
+        if val is None:
+            continue
+
+        prices.append(val)
+        if len(prices) >= limit:
+            break
+    return prices
+
+
+def amazon_prices(page, gpu_name, limit=AMAZON_MAX_RESULTS):
+    """
+    Prices of the first valid results on an Amazon search page (default sort).
+
+    :param page: Search page HTML
+    :param gpu_name: GPU name
+    :param limit: Stop after this many prices
+    """
+    prices = []
+    for item in AMAZON_ITEMS(parse_html(page)):
+        if not is_valid_amazon_listing(text_of(item).lower(), gpu_name):
+            continue
+
+        price_els = AMAZON_PRICE(item)
+        if not price_els:
+            continue # No price on this item, move to next
+        val = get_price_float("".join(TEXT(price_els[0])))
+        if val is None:
+            continue
+
+        prices.append(val)
+        if len(prices) >= limit:
+            break
+    return prices
+
+
+def average(prices):
+    """Rounded mean, or None for no prices."""
+    return round(mean(prices), 2) if prices else None
+
+
+STORE_PARSERS = {"ebay": ebay_sold_prices, "amazon": amazon_prices}
+
+
+# --- BULK REPROCESSING ---
+def _reprocess_one(job):
+    store, gpu_name, url = job
+    page = get_cache().get(url)
+    if page is None:
+        return store, gpu_name, None
+    return store, gpu_name, average(STORE_PARSERS[store](page, gpu_name))
+
+
+def reprocess(jobs, workers=None, chunksize=16):
+    """
+    Re-parses cached result pages in a process pool.
+
+    Yields (store, gpu_name, average price or None) in input order; pages missing
+    from the cache give None.
+
+    :param jobs: Iterable of (store, gpu_name, url), store being "ebay" or "amazon"
+    :param workers: Worker processes (default: CPU count)
+    :param chunksize: Jobs sent to a worker at a time
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_reprocess_one, jobs, chunksize=chunksize)
+
+
+if __name__ == "__main__":
+    from amazon_scraper import build_amazon_url
+    from ebay_scraper import build_ebay_url
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", choices=sorted(STORE_PARSERS), action="append", help="Default: both")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    names = [r[0] for r in conn.execute("SELECT name FROM gpus ORDER BY name")]
+    conn.close()
+
+    builders = {"ebay": build_ebay_url, "amazon": build_amazon_url}
+    jobs = [(store, name, builders[store](name)) for store in args.store or sorted(STORE_PARSERS) for name in names]
+
+    start = time.perf_counter()
+    found = 0
+    for store, name, price in reprocess(jobs, args.workers):
+        if price is not None:
+            found += 1
+            print(f"{store:7s} {name}: ${price}")
+    print(f"Re-parsed {len(jobs)} pages ({found} with a price) in {time.perf_counter() - start:.1f}s "
+          f"on {args.workers} worker(s).")
@@ -1,29 +1,31 @@
 import sqlite3
 import time
 import random
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from gpu_resolver import GPUResolver
+from job_queue import new_run_id
+from refresh_context import RefreshContext
+
 
 # --- CONFIGURATION ---
 DB_PATH = "gpus.db"
 TABLE_NAME = "gpus"
 ANCHOR_URL = "https://www.techpowerup.com/gpu-specs/geforce-rtx-4060-mobile.c3946"
 
-# --- DATABASE SETUP ---
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-try:
-    cursor.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN rel_performance REAL")
-except sqlite3.OperationalError:
-    pass 
+def ensure_schema(conn):
+    try:
+        conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN rel_performance REAL")
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass
 
 def scroll_to_section(driver):
     print("   Scrolling to trigger lazy loading...")
     # Scroll in chunks to trigger JS events
-    total_height = int(driver.execute_script("return document.body.scrollHeight"))
+    total_height = int(driver.execute_script("return document.body.scrollHeight") or 0)
     for i in range(0, total_height, 500):
         driver.execute_script(f"window.scrollTo(0, {i});")
         time.sleep(0.1)
@@ -34,74 +36,105 @@ def scroll_to_section(driver):
 
 # --- SCRAPING ---
 
-driver = webdriver.Chrome()
-
-print(f"Visiting Anchor Page: {ANCHOR_URL}")
-driver.get(ANCHOR_URL)
-
-
-# 2. Scroll to load the chart
-scroll_to_section(driver)
-
-performance_map = {}
-
-try:
-    print("   Waiting for chart to render...")
-    
-    # Wait specifically for the entries to appear in the DOM
-    # We use CSS Selector with the dot (.) which is safer than Class Name
-    wait = WebDriverWait(driver, 10)
-    entries = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".gpudb-relative-performance-entry")))
-    
-    print(f"Found {len(entries)} entries in Relative Performance chart.")
-    
-    for entry in entries:
-        try:
-            # Extract Name
-            title_div = entry.find_element(By.CSS_SELECTOR, ".gpudb-relative-performance-entry__title")
-            card_name = title_div.text.strip()
-            
-            # Extract Percentage
-            number_div = entry.find_element(By.CSS_SELECTOR, ".gpudb-relative-performance-entry__number")
-            percent_text = number_div.text.replace('%', '').strip()
-            
-            # Save to map
-            performance_map[card_name] = float(percent_text)
-        except Exception as e:
-            continue
-
-except Exception as e:
-    print(f"Error finding elements: {e}")
-
-driver.quit()
+def scrape_performance(driver):
+    """
+    Reads the Relative Performance chart on the anchor GPU's spec page.
+    Returns {chart name: relative performance in %}.
+
+    :param driver: Chrome webdriver
+    """
+    print(f"Visiting Anchor Page: {ANCHOR_URL}")
+    driver.get(ANCHOR_URL)
+
+    # 2. Scroll to load the chart
+    scroll_to_section(driver)
+
+    performance_map = {}
+
+    try:
+        print("   Waiting for chart to render...")
+        
+        # Wait specifically for the entries to appear in the DOM
+        # We use CSS Selector with the dot (.) which is safer than Class Name
+        wait = WebDriverWait(driver, 10)
+        entries = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".gpudb-relative-performance-entry")))
+        
+        print(f"Found {len(entries)} entries in Relative Performance chart.")
+        
+        for entry in entries:
+            try:
+                # Extract Name
+                title_div = entry.find_element(By.CSS_SELECTOR, ".gpudb-relative-performance-entry__title")
+                card_name = title_div.text.strip()
+                
+                # Extract Percentage
+                number_div = entry.find_element(By.CSS_SELECTOR, ".gpudb-relative-performance-entry__number")
+                percent_text = number_div.text.replace('%', '').strip()
+                
+                # Save to map
+                performance_map[card_name] = float(percent_text)
+            except Exception as e:
+                continue
+
+    except Exception as e:
+        print(f"Error finding elements: {e}")
+
+    return performance_map
 
 # --- UPDATING DATABASE ---
-print(f"Updating Database with {len(performance_map)} benchmarks...")
-
-cursor.execute(f"SELECT name FROM {TABLE_NAME}")
-db_gpus = cursor.fetchall()
-
-match_count = 0
-
-for row in db_gpus:
-    db_name = row[0]
-    
-    # Exact Match
-    score = performance_map.get(db_name)
-    
-    # Fuzzy Match Fallback (e.g. DB: "RTX 4090" vs TPU: "GeForce RTX 4090")
-    if score is None:
-        for key in performance_map:
-            # Check if the DB name is inside the TPU name or vice versa
-            if db_name in key or key in db_name:
-                score = performance_map[key]
-                break
-    
-    if score is not None:
-        cursor.execute(f"UPDATE {TABLE_NAME} SET rel_performance = ? WHERE name = ?", (score, db_name))
-        match_count += 1
-
-conn.commit()
-conn.close()
 
-print(f"Done. Updated {match_count} GPUs.")
\ No newline at end of file
+def match_scores(performance_map, db_names):
+    """
+    Chart names -> DB names through the token index ("NVIDIA GeForce RTX 4090" == "GeForce RTX 4090",
+    but "RTX 4060" never takes "RTX 4060 Ti"'s score). An exact name wins over a normalized one, and a
+    chart name without a memory size scores every memory variant ("RTX 3050" -> the 6 GB and 8 GB cards).
+    DB names the index leaves unscored fall back to the substring rule ("RTX 4060 Laptop GPU").
+    """
+    resolver = GPUResolver(db_names)
+    scores, exact = {}, set()
+    for card_name, score in performance_map.items():
+        for db_name in resolver.resolve_all(card_name):
+            if db_name not in exact:
+                scores[db_name] = score
+            if card_name == db_name:
+                exact.add(db_name)
+    for db_name in db_names:
+        if db_name not in scores:
+            key = next((key for key in performance_map if db_name in key or key in db_name), None)
+            if key is not None:
+                scores[db_name] = performance_map[key]
+    return scores
+
+def refresh(ctx):
+    """
+    Scrapes the chart on a pooled browser and queues the scores on the context's writer.
+    Returns the number of GPUs updated.
+
+    :param ctx: refresh_context.RefreshContext
+    """
+    with ctx.driver() as driver:
+        performance_map = scrape_performance(driver)
+
+    print(f"Updating Database with {len(performance_map)} benchmarks...")
+    conn = ctx.connect()
+    scores = match_scores(performance_map, [r[0] for r in conn.execute(f"SELECT name FROM {TABLE_NAME}")])
+    conn.close()
+
+    # Updates are committed in batches instead of row by row
+    ctx.writer.executemany(f"UPDATE {TABLE_NAME} SET rel_performance = ? WHERE name = ?",
+                           [(score, db_name) for db_name, score in scores.items()])
+    return len(scores)
+
+def main():
+    ctx = RefreshContext(DB_PATH, run_id=new_run_id("perf"), workers=1)
+    try:
+        conn = ctx.connect()
+        ensure_schema(conn)
+        conn.close()
+        updated = refresh(ctx)
+    finally:
+        ctx.finish("performance_scraper_calc")
+    print(f"Done. Updated {updated} GPUs.")
+
+if __name__ == "__main__":
+    main()
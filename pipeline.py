@@ -0,0 +1,142 @@
+"""
+Staged streaming pipeline for the scrapers.
+
+Each stage (fetch pages, extract listings, LLM-judge, ...) has its own worker
+threads and passes results to the next stage through a bounded queue. All
+stages run at once: pages for the next GPUs load while earlier GPUs are being
+parsed or waiting on the LLM. Throughput is then set by the slowest stage, not
+by the sum of all of them. A full queue blocks the stage that feeds it
+(backpressure), so a fast fetch stage never runs far ahead of a slow LLM
+stage, and work items are only pulled from the source (for example leased
+from the job queue) when the first queue has room.
+
+The caller consumes the output as (item, result, error) tuples; a single
+stage is a plain thread pool that still pulls items lazily. The DB write stage is the caller's loop, which
+feeds a BatchWriter.
+"""
+import queue
+import threading
+import time
+
+from metrics import get_metrics
+
+# --- CONFIGURATION ---
+QUEUE_SIZE = 8    # Default bound of each inter-stage queue
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    :param name: Used for thread names and metrics ("stage_<name>" timer)
+    :param fn: Callable(item, value) -> value for the next stage; value is the
+               previous stage's output (the item itself for the first stage)
+    :param workers: Threads running fn
+    :param queue_size: Bound of this stage's input queue
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+
+
+def run_pipeline(items, stages):
+    """
+    Streams items through the stages and yields (item, result, error) as each
+    leaves the last stage (completion order). An item whose stage raises skips
+    the remaining stages and comes out with the error. If the items iterable
+    itself raises (e.g. a failed lease), the items already in flight are
+    yielded and then that exception is raised here.
+
+    :param items: Iterable of work items (read lazily, e.g. JobQueue.iter_jobs)
+    :param stages: List of Stage
+    """
+    metrics = get_metrics()
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=s.queue_size) for s in stages] + [queue.Queue()]
+
+    def put(q, entry):
+        # Blocks while the queue is full, but gives up once the pipeline is stopped
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    feed_error = []
+
+    def feed():
+        try:
+            for item in items:
+                if not put(queues[0], (item, item, None)):
+                    return
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            put(queues[0], _DONE)
+
+    def work(index, stage, remaining):
+        inbox, outbox = queues[index], queues[index + 1]
+        while not stop.is_set():
+            entry = inbox.get()
+            if entry is _DONE:
+                # Let the other workers of this stage see it (nothing else is put after _DONE,
+                # except during shutdown, when a full queue already wakes them)
+                try:
+                    inbox.put_nowait(_DONE)
+                except queue.Full:
+                    pass
+                break
+            item, value, error = entry
+            if error is None:
+                start = time.perf_counter()
+                try:
+                    value = stage.fn(item, value)
+                except Exception as e:
+                    value, error = None, e
+                metrics.observe(f"stage_{stage.name}", time.perf_counter() - start)
+            if not put(outbox, (item, value, error)):
+                break
+        with remaining[1]:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                put(outbox, _DONE)
+
+    threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+    for index, stage in enumerate(stages):
+        remaining = [stage.workers, threading.Lock()]
+        threads += [threading.Thread(target=work, args=(index, stage, remaining),
+                                     name=f"pipeline-{stage.name}-{n}", daemon=True)
+                    for n in range(stage.workers)]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            entry = queues[-1].get()
+            if entry is _DONE:
+                break
+            yield entry
+        if feed_error:
+            raise feed_error[0]
+    finally:
+        # Normal end, error, Ctrl-C or the caller stopped early: unblock and wind down every thread.
+        # Never blocks: put() gives up once stop is set, and a queue that is full again
+        # means nobody is waiting on it (its workers see stop after their current item)
+        stop.set()
+        for q in queues:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(_DONE)
+            except queue.Full:
+                pass
@@ -0,0 +1,147 @@
+import sqlite3
+import time
+
+from db_writer import bump_data_version
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+
+# (source, condition) -> column name in the gpu_prices_latest view
+# "retail" is price_updater's best new price across Amazon / Newegg / Best Buy
+PRICE_COLUMNS = {
+    ("ebay", "used"): "ebay_used_avg",
+    ("amazon", "new"): "amazon_new_avg",
+    ("retail", "new"): "new_avg",
+}
+# Columns that already exist on gpus and hold prices from before the history table
+LEGACY_COLUMNS = ["ebay_used_avg", "new_avg"]
+
+
+def _latest(source, condition):
+    return f"""(SELECT o.price FROM price_observations o
+                 WHERE o.gpu = g.name AND o.source = '{source}' AND o.condition = '{condition}'
+                 ORDER BY o.observed_at DESC LIMIT 1)"""
+
+
+def ensure_schema(conn):
+    """
+    Creates the append-only price_observations table, its indexes and the
+    gpu_prices_latest view (latest price per GPU and source).
+
+    :param conn: sqlite3 connection to gpus.db
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_observations (
+            id INTEGER PRIMARY KEY,
+            gpu TEXT NOT NULL,
+            source TEXT NOT NULL,
+            condition TEXT NOT NULL,
+            price REAL NOT NULL,
+            observed_at REAL NOT NULL,
+            run_id TEXT
+        )
+    """)
+    # Covering index: "latest per (gpu, source)" and per-GPU history never touch the table
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_obs_gpu_source_time
+        ON price_observations(gpu, source, condition, observed_at, price)
+    """)
+    # Time-range queries across all GPUs of a source
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_obs_source_time
+        ON price_observations(source, observed_at, gpu, price)
+    """)
+
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(gpus)")}
+    columns = []
+    for (source, condition), column in PRICE_COLUMNS.items():
+        expr = _latest(source, condition)
+        if column in LEGACY_COLUMNS and column in existing:
+            # Fall back to the old overwritten column for GPUs with no observations yet
+            expr = f"COALESCE({expr}, g.{column})"
+        columns.append(f"{expr} AS {column}")
+
+    view = f"""CREATE VIEW gpu_prices_latest AS
+        SELECT g.name AS name,
+               {", ".join(columns)}
+        FROM gpus g"""
+    current = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'gpu_prices_latest'").fetchone()
+    if current is None or current[0] != view:
+        conn.execute("DROP VIEW IF EXISTS gpu_prices_latest")
+        conn.execute(view)
+        # Prices now come from the view: cached dashboards and snapshots have to reload
+        bump_data_version(conn)
+    conn.commit()
+
+
+def has_history(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'gpu_prices_latest'").fetchone()
+    return row is not None
+
+
+def record_price(writer, gpu, source, condition, price, run_id=None, on_commit=None):
+    """
+    Appends one observation through a db_writer.BatchWriter.
+
+    :param writer: BatchWriter
+    :param gpu: GPU name
+    :param source: "ebay", "amazon" or "retail"
+    :param condition: "used" or "new"
+    :param price: Price in USD
+    :param run_id: Job-queue run that produced it
+    :param on_commit: Called once the observation is committed
+    """
+    writer.execute(
+        "INSERT INTO price_observations (gpu, source, condition, price, observed_at, run_id) VALUES (?, ?, ?, ?, ?, ?)",
+        (gpu, source, condition, price, time.time(), run_id),
+        on_commit,
+    )
+
+
+def get_history(conn, gpu, source=None, since=None, until=None):
+    """
+    Price history for one GPU, oldest first, as (source, condition, price, observed_at) rows.
+
+    :param conn: sqlite3 connection
+    :param gpu: GPU name
+    :param source: Only this source (all sources if None)
+    :param since: Unix time lower bound (inclusive)
+    :param until: Unix time upper bound (exclusive)
+    """
+    query = "SELECT source, condition, price, observed_at FROM price_observations WHERE gpu = ?"
+    params = [gpu]
+    if source is not None:
+        query += " AND source = ?"
+        params.append(source)
+    if since is not None:
+        query += " AND observed_at >= ?"
+        params.append(since)
+    if until is not None:
+        query += " AND observed_at < ?"
+        params.append(until)
+    return conn.execute(query + " ORDER BY observed_at", params).fetchall()
+
+
+def get_source_range(conn, source, since, until=None):
+    """
+    All observations of a source in a time window, as (gpu, price, observed_at) rows.
+
+    :param conn: sqlite3 connection
+    :param source: "ebay", "amazon" or "retail"
+    :param since: Unix time lower bound (inclusive)
+    :param until: Unix time upper bound (exclusive, now if None)
+    """
+    until = time.time() if until is None else until
+    return conn.execute("""
+        SELECT gpu, price, observed_at FROM price_observations
+        WHERE source = ? AND observed_at >= ? AND observed_at < ?
+        ORDER BY observed_at
+    """, (source, since, until)).fetchall()
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+    count = conn.execute("SELECT COUNT(*) FROM price_observations").fetchone()[0]
+    print(f"price_observations ready ({count} rows).")
+    conn.close()
@@ -1,14 +1,27 @@
 import sqlite3
-import time
 import random
 import os
-import json
+import threading
+import asyncio
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from driver_pool import DriverPool, FakeDriver, HostLimiter, PageFetcher
+from pipeline import Stage, run_pipeline
+from page_cache import get_cache
+from job_queue import JobQueue
+from llm_cache import get_llm_cache
+from db_writer import BatchWriter
+from metrics import get_metrics
+import snapshot
+from price_history import ensure_schema, record_price
+from refresh_scheduler import plan_refresh
+from llm_client import AsyncLLMClient, Batcher, LLMRunner
+import listing_extractor
+import fetcher
+
 # 1. Config & Setup
 load_dotenv()
 api_key = os.getenv("MOONSHOT_API_KEY")
@@ -17,12 +30,22 @@ if not api_key:
     print("CRITICAL: .env file missing or MOONSHOT_API_KEY not set.")
     exit()
 
-client = OpenAI(
-    base_url='https://api.moonshot.ai/v1',
-    api_key=api_key
-)
+MODEL = "kimi-k2.5"
+LLM_CONCURRENCY = 8  # Max Kimi requests in flight across all GPU workers
+LLM_BATCH_SIZE = 0   # >1 packs that many GPUs into one prompt (worth it with many GPUs in flight)
+MAX_PROMPT_CHARS = 15000  # ~3-4k tokens; only applies when raw page text has to be sent
+
+llm = AsyncLLMClient(api_key=api_key, base_url='https://api.moonshot.ai/v1', model=MODEL,
+                     concurrency=LLM_CONCURRENCY)
 
 DB_PATH = "gpus.db"
+POOL_SIZE = 4        # Chrome drivers kept warm; 4 lets one GPU load all its stores at once
+PER_HOST_LIMIT = 2   # Politeness: max pages per store in flight
+JOB_SOURCE = "stores"  # jobs.source for this script (Amazon/Newegg/Best Buy/eBay per GPU)
+REFRESH_BUDGET = 600    # Seconds per run; only the most stale / volatile GPUs that fit are scanned (None = all)
+REFRESH_TOP_K = None
+EXTRACT_WORKERS = 1     # Threads running the rule-based pre-extractor (CPU-bound)
+STAGE_QUEUE_SIZE = 4    # GPUs buffered between pipeline stages before the stage feeding them waits
 
 # 2. Initialize "Human-Like" Selenium Driver
 def setup_driver():
@@ -44,33 +67,71 @@ def migrate_schema():
         cursor.execute("ALTER TABLE gpus ADD COLUMN ebay_used_avg REAL")
     except: pass
     conn.commit()
+    # Price history table + latest-price view
+    ensure_schema(conn)
     conn.close()
 
 def get_page_text(driver, url):
     """
     Navigates to URL and extracts visible text (saving tokens vs raw HTML).
+    Served from the page cache when a fresh copy exists.
     """
+    cache = get_cache()
+    metrics = get_metrics()
+    body_text = cache.get(url, kind="text")
+    if body_text is not None:
+        metrics.incr("page_cache_hits")
+        return body_text
+    if cache.offline:
+        print(f"    [!] Not cached (offline mode): {url}")
+        return None
+
     try:
-        driver.get(url)
+        with metrics.timer("driver_get"):
+            driver.get(url)
         # Random sleep to mimic reading the page
-        time.sleep(random.uniform(3, 6))
+        metrics.sleep(random.uniform(3, 6))
         
         # Scroll down slightly to trigger lazy loading of products
         driver.execute_script("window.scrollTo(0, 400);")
-        time.sleep(1)
+        metrics.sleep(1)
 
         # Extract only the body text (cleaner for AI than raw HTML)
-        body_text = driver.find_element(By.TAG_NAME, "body").text
+        with metrics.timer("element_lookup"):
+            body_text = driver.find_element(By.TAG_NAME, "body").text
+        metrics.incr("pages_fetched")
+        metrics.incr("page_bytes", len(body_text))
+        # A captcha / robot check is not cached, so the next run tries again
+        if not fetcher.looks_blocked(body_text):
+            cache.put(url, body_text, kind="text")
         
-        # Limit to ~15k characters (approx 3-4k tokens) to fit context
-        return body_text[:15000] 
+        # Full text: the pre-extractor needs every listing; only raw-text prompts are cut to MAX_PROMPT_CHARS
+        return body_text
     except Exception as e:
         print(f"    [!] Selenium Error: {e}")
         return None
 
-def analyze_new_market(gpu_model, text_data):
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner():
+    """Background event loop that all GPU workers send their LLM calls through."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = LLMRunner(llm)
+    return _runner
+
+def ask_model(prompt):
     """
-    Sends combined text from Amz/Newegg/BB to Kimi to find the best deal.
+    Sends a prompt to Kimi and returns the parsed JSON answer.
+    Unchanged prompts are answered from the LLM cache without an API call.
+    """
+    return get_runner().ask(prompt)
+
+def new_market_prompt(gpu_model, text_data):
+    """
+    Prompt asking for the best NEW price across Amz/Newegg/BB, or None if no page loaded.
     """
     # Filter out empty reads
     valid_data = {k: v for k, v in text_data.items() if v}
@@ -105,21 +166,47 @@ def analyze_new_market(gpu_model, text_data):
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="kimi-k2.5",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.6,
-            extra_body={"thinking": {"type": "disabled"}}
-        )
-        content = response.choices[0].message.content
-        if "```json" in content: content = content.split("```json")[1].split("```")[0]
-        return json.loads(content)
-    except Exception as e:
-        print(f"    [!] AI Error: {e}")
-        return None
+    return prompt
 
-def analyze_used_market(gpu_model, ebay_text):
+def pre_extract_new(gpu_model, text_data):
+    """
+    Rule-based pass over the Amz/Newegg/BB text.
+    Returns (settled result or None, text_data to prompt with if the LLM is still needed).
+    """
+    raw = "\n".join(v for v in text_data.values() if v)
+    settled, compact = listing_extractor.settle_new_price(gpu_model, text_data)
+    if settled:
+        listing_extractor.record(raw, "", True)
+        return settled, None
+
+    # Candidate lines if the rules found any, otherwise the raw text (cut to fit context)
+    data = compact or {k: v[:MAX_PROMPT_CHARS] for k, v in text_data.items() if v}
+    listing_extractor.record(raw, "\n".join(data.values()), False)
+    return None, data
+
+def pre_extract_used(gpu_model, ebay_text):
+    """Same as pre_extract_new for the eBay text. Returns (settled result or None, text to prompt with)."""
+    settled, compact = listing_extractor.settle_used_price(gpu_model, ebay_text)
+    if settled:
+        listing_extractor.record(ebay_text, "", True)
+        return settled, None
+
+    text = compact or (ebay_text or "")[:MAX_PROMPT_CHARS]
+    listing_extractor.record(ebay_text, text, False)
+    return None, text
+
+@get_metrics().timed("analyze_new_market")
+def analyze_new_market(gpu_model, text_data):
+    """
+    Sends combined text from Amz/Newegg/BB to Kimi to find the best deal.
+    Skips the call when the rule-based pre-extractor can settle the price.
+    """
+    settled, data = pre_extract_new(gpu_model, text_data)
+    if settled: return settled
+    prompt = new_market_prompt(gpu_model, data)
+    return ask_model(prompt) if prompt else None
+
+def used_market_prompt(gpu_model, ebay_text):
     if not ebay_text: return None
 
     prompt = f"""
@@ -141,89 +228,222 @@ def analyze_used_market(gpu_model, ebay_text):
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="kimi-k2.5",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.6,
-            extra_body={"thinking": {"type": "disabled"}}
-        )
-        content = response.choices[0].message.content
-        if "```json" in content: content = content.split("```json")[1].split("```")[0]
-        return json.loads(content)
-    except Exception as e:
-        print(f"    [!] AI Error: {e}")
-        return None
+    return prompt
+
+@get_metrics().timed("analyze_used_market")
+def analyze_used_market(gpu_model, ebay_text):
+    settled, text = pre_extract_used(gpu_model, ebay_text)
+    if settled: return settled
+    prompt = used_market_prompt(gpu_model, text)
+    return ask_model(prompt) if prompt else None
+
+# --- BATCHED MODE (LLM_BATCH_SIZE > 1) ---
+NEW_MARKET_TASK = """
+    For each GPU, find the BEST PRICE for a NEW card of exactly that model in its
+    text from Amazon, Newegg and Best Buy search result pages.
+    IGNORE: Used, Refurbished, Renewed, "Open Box", "Parts Only".
+    IGNORE: Different models (e.g. if the GPU is RTX 3080, ignore RTX 3060).
+    IGNORE: Accessories (waterblocks, fans, cables).
+    SCAM CHECK: If price is < $50 (and not a GT 710), it's likely fake/cable/box. Ignore it.
+"""
+NEW_MARKET_FIELDS = '"best_price": float (0.0 if none found), "store": "Amazon/Newegg/BestBuy", "description": "Brief description of the item found"'
+
+USED_MARKET_TASK = """
+    For each GPU, use its text from eBay search results for USED cards:
+    1. Identify valid USED GPU listings.
+    2. FILTER OUT: "Parts only", "Broken", "Box only", "Cooler", "Read Description".
+    3. FILTER OUT: Outliers (prices < $50 or > 200% of average).
+    4. Calculate the average price of the valid listings.
+"""
+USED_MARKET_FIELDS = '"average_price": float (0.0 if none found), "listing_count": int (how many valid items used for math)'
+
+_batchers = {}
+
+def get_batcher(kind):
+    # Only touched from the runner's event loop thread
+    if kind not in _batchers:
+        task, fields = (NEW_MARKET_TASK, NEW_MARKET_FIELDS) if kind == "new" else (USED_MARKET_TASK, USED_MARKET_FIELDS)
+        _batchers[kind] = Batcher(llm, task, fields, batch_size=LLM_BATCH_SIZE)
+    return _batchers[kind]
+
+def pre_extract(gpu_model, texts):
+    """
+    Rule-based passes for one GPU's store pages.
+    Returns ((new settled, new data), (used settled, used text)) for judge_gpu.
+
+    :param gpu_model: GPU name
+    :param texts: {"amazon": ..., "newegg": ..., "bestbuy": ..., "ebay": ...} page text
+    """
+    texts = dict(texts)
+    ebay_text = texts.pop("ebay", None)
+    return pre_extract_new(gpu_model, texts), pre_extract_used(gpu_model, ebay_text)
+
+async def judge_gpu(gpu_model, new_pre, used_pre):
+    """
+    Asks the LLM the new- and used-market questions the pre-extractor could not
+    settle, both at the same time. Returns (new_result, used_result).
+    """
+    @get_metrics().timed("analyze_new_market")
+    async def new_market():
+        settled, data = new_pre
+        if settled: return settled
+        if LLM_BATCH_SIZE > 1:
+            if not data: return None
+            combined = "\n\n".join(f"{store}:\n{text}" for store, text in data.items())
+            return await get_batcher("new").submit(gpu_model, combined)
+        prompt = new_market_prompt(gpu_model, data)
+        return await llm.ask(prompt) if prompt else None
+
+    @get_metrics().timed("analyze_used_market")
+    async def used_market():
+        settled, text = used_pre
+        if settled: return settled
+        if LLM_BATCH_SIZE > 1:
+            if not text: return None
+            return await get_batcher("used").submit(gpu_model, text)
+        prompt = used_market_prompt(gpu_model, text)
+        return await llm.ask(prompt) if prompt else None
+
+    new_result, used_result = await asyncio.gather(new_market(), used_market())
+    return new_result, used_result
+
+def build_store_urls(model):
+    """
+    Search URLs for the four stores checked per GPU.
+
+    :param model: GPU name
+    """
+    q = model.replace(" ", "+")
+    return {
+        "amazon": f"https://www.amazon.com/s?k={q}+graphics+card",
+        "newegg": f"https://www.newegg.com/p/pl?d={q}&N=4814", # N=4814 is New Condition
+        "bestbuy": f"https://www.bestbuy.com/site/searchpage.jsp?st={q}+gpu",
+        "ebay": f"https://www.ebay.com/sch/i.html?_nkw={q}&_sacat=0&LH_ItemCondition=3000&LH_BIN=1",
+    }
+
+def fetch_stage(pages):
+    """
+    Pipeline stage: loads all four store pages for one GPU at the same time.
+    Pages in the cache are read directly; only browser loads are followed by the politeness sleep.
+    """
+    def fetch(job, _):
+        cache, metrics = get_cache(), get_metrics()
+        urls = build_store_urls(job.gpu)
+        texts = {key: cache.get(url, kind="text") for key, url in urls.items()}
+        missing = {key: url for key, url in urls.items() if texts[key] is None}
+        metrics.incr("page_cache_hits", len(urls) - len(missing))
+        if missing:
+            texts.update(pages.fetch_all(missing))
+            if not cache.offline:
+                # Sleep to protect Selenium driver from being flagged (holds this fetch worker only)
+                metrics.sleep(random.uniform(5, 8))
+        return texts
+    return fetch
+
+def extract_stage(job, texts):
+    """Pipeline stage: rule-based pre-extraction, settles most prices without the LLM."""
+    return pre_extract(job.gpu, texts)
+
+def judge_stage(job, pre):
+    """Pipeline stage: LLM calls for whatever the pre-extractor left open."""
+    new_pre, used_pre = pre
+    if new_pre[0] and used_pre[0]:
+        return new_pre[0], used_pre[0]
+    return get_runner().submit(judge_gpu(job.gpu, new_pre, used_pre)).result()
 
 # --- MAIN LOOP ---
-def main():
+def main(pool_size=POOL_SIZE):
     migrate_schema()
-    driver = setup_driver()
+    # Cache-only runs never touch a browser
+    pool = DriverPool(FakeDriver if get_cache().offline else setup_driver, pool_size)
+    pages = PageFetcher(pool, get_page_text, HostLimiter(PER_HOST_LIMIT))
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     
-    # 1. Fetch ALL GPUs
-    cursor.execute("SELECT name FROM gpus")
-    all_gpus = [r[0] for r in cursor.fetchall()]
+    # 1. Pick the GPUs worth refreshing (staleness, price volatility, tier) within the budget
+    all_gpus = plan_refresh(conn, JOB_SOURCE, REFRESH_BUDGET, REFRESH_TOP_K)
+    conn.close()
+    writer = BatchWriter(DB_PATH)
     
     # --- RESUME LOGIC ---
-    # Python lists start at 0. So GPU #103 is at index 102.
-    start_index = 102 
-    gpus_to_process = all_gpus[start_index:]
-    
-    print(f"Found {len(all_gpus)} total GPUs.")
-    print(f"RESUMING scan from GPU #{start_index + 1} ({gpus_to_process[0]}).")
-    print(f"Skipping first {start_index} GPUs. {len(gpus_to_process)} remaining...")
+    # Unfinished runs are picked up from the jobs table; only GPUs that were
+    # in flight when a worker died get scanned again (once their lease expires).
+    queue = JobQueue(DB_PATH)
+    run_id, resumed = queue.open_run(JOB_SOURCE, all_gpus)
+    counts = queue.counts(run_id)
+
+    print(f"{len(all_gpus)} GPUs due for a refresh.")
+    if resumed:
+        print(f"RESUMING run {run_id}: {counts.get('done', 0)} done, "
+              f"{counts.get('pending', 0) + counts.get('leased', 0)} remaining...")
+    else:
+        print(f"Starting run {run_id}.")
     # --------------------
 
+    # Fetch -> extract -> LLM run as concurrent stages; this loop is the DB write stage.
+    # Each GPU uses up to 4 drivers at once (one per store)
+    fetch_workers = max(1, pool_size // 4)
+    stages = [
+        Stage("fetch", fetch_stage(pages), fetch_workers, queue_size=fetch_workers),
+        Stage("extract", extract_stage, EXTRACT_WORKERS, STAGE_QUEUE_SIZE),
+        Stage("judge", judge_stage, LLM_CONCURRENCY, STAGE_QUEUE_SIZE),
+    ]
+    print(f"Running {fetch_workers} fetch worker(s) on {pool_size} driver(s), "
+          f"{EXTRACT_WORKERS} extract worker(s), {LLM_CONCURRENCY} LLM worker(s).")
+
+    results = None
     try:
-        for i, model in enumerate(gpus_to_process):
-            # Calculate real index for logging
-            real_index = start_index + i + 1
-            print(f"\n[{real_index}/{len(all_gpus)}] Scanning: {model}")
-            
-            # --- PHASE 1: NEW PRICES ---
-            q = model.replace(" ", "+")
-            
-            text_data = {
-                "amazon": get_page_text(driver, f"https://www.amazon.com/s?k={q}+graphics+card"),
-                "newegg": get_page_text(driver, f"https://www.newegg.com/p/pl?d={q}&N=4814"), # N=4814 is New Condition
-                "bestbuy": get_page_text(driver, f"https://www.bestbuy.com/site/searchpage.jsp?st={q}+gpu")
-            }
-            
-            new_result = analyze_new_market(model, text_data)
-            
-            if new_result and new_result.get('best_price', 0) > 0:
-                price = new_result['best_price']
-                print(f"  -> Best New: ${price} @ {new_result['store']}")
-                cursor.execute("UPDATE gpus SET new_avg = ? WHERE name = ?", (price, model))
-            else:
-                print("  -> No valid new prices found.")
-
-            # --- PHASE 2: USED PRICES (eBay) ---
-            ebay_url = f"https://www.ebay.com/sch/i.html?_nkw={q}&_sacat=0&LH_ItemCondition=3000&LH_BIN=1"
-            ebay_text = get_page_text(driver, ebay_url)
-            
-            used_result = analyze_used_market(model, ebay_text)
-            
-            if used_result and used_result.get('average_price', 0) > 0:
-                price = used_result['average_price']
-                print(f"  -> Avg Used: ${price:.2f} (n={used_result['listing_count']})")
-                cursor.execute("UPDATE gpus SET ebay_used_avg = ? WHERE name = ?", (price, model))
-            else:
-                print("  -> No valid used prices found.")
-            
-            conn.commit()
+        done = counts.get('done', 0)
+        retried = True
+        while retried:
+            # A job failed back to pending after the last lease was taken is picked up by another pass
+            retried = False
+            # Jobs are only leased when the fetch stage has room for them
+            jobs = queue.iter_jobs(run_id, JOB_SOURCE)
+            results = run_pipeline(jobs, stages)
+            for job, result, error in results:
+                model = job.gpu
+                if error is not None:
+                    print(f"\n[!] {model}: Worker Error: {error} (attempt {job.attempts + 1})")
+                    retried = queue.fail(job, error) or retried
+                    continue
+                done += 1
+                print(f"\n[{done}/{len(all_gpus)}] Scanned: {model}")
+                new_result, used_result = result
+
+                if new_result and new_result.get('best_price', 0) > 0:
+                    price = new_result['best_price']
+                    print(f"  -> Best New: ${price} @ {new_result['store']}")
+                    record_price(writer, model, "retail", "new", price, run_id)
+                else:
+                    print("  -> No valid new prices found.")
+
+                if used_result and used_result.get('average_price', 0) > 0:
+                    price = used_result['average_price']
+                    print(f"  -> Avg Used: ${price:.2f} (n={used_result['listing_count']})")
+                    record_price(writer, model, "ebay", "used", price, run_id)
+                else:
+                    print("  -> No valid used prices found.")
             
-            # Sleep to protect Selenium driver from being flagged
-            time.sleep(random.uniform(5, 8))
+                # Prices are committed in batches; the job is only done once they are on disk
+                writer.call_after_commit(lambda job=job: queue.complete(job))
             
     except KeyboardInterrupt:
         print("\nStopping...")
     finally:
-        driver.quit()
-        conn.close()
+        if results is not None:
+            results.close()   # Stops the stage threads before their drivers go away
+        pages.close()
+        pool.close()
+        writer.close()
+        queue.close()
+        if _runner is not None:
+            _runner.close()
+        llm_cache = get_llm_cache()
+        print(listing_extractor.report())
+        print(f"LLM cache: {llm_cache.hits} hits / {llm_cache.misses} misses, {llm_cache.tokens_saved} tokens saved.")
         print("Driver closed. Database updated.")
+        snapshot.export_after_refresh()
+        get_metrics().finish("price_updater", run_id, DB_PATH)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Resources shared by the data sources of one refresh.
+
+Each scraper module exposes ensure_schema(conn) and refresh(ctx). A
+RefreshContext carries what they share: one run id, one JobQueue and one
+BatchWriter on the DB, one DriverPool (each Chrome only starts when a
+source needs another browser) and the time budget. refresh_store() is the
+job-queue driven refresh of one store search page per GPU (eBay, Amazon). The scripts' own main() and
+gpu_market.py both build one, so a combined refresh pays for browser
+startup and schema checks once rather than once per script.
+"""
+import itertools
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import fetcher
+from db_writer import BatchWriter
+from driver_pool import POOL_SIZE, DriverPool, FakeDriver
+from job_queue import JobQueue, new_run_id
+from metrics import get_metrics
+from page_cache import get_cache
+from pipeline import Stage, run_pipeline
+from price_history import record_price
+from refresh_scheduler import plan_refresh
+import snapshot
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+HTTP_LEASE_BATCH = 20   # Jobs leased per scrape on the http backend; even all on the Selenium fallback fit one lease
+
+
+def default_driver():
+    from selenium import webdriver
+    return webdriver.Chrome()
+
+
+class RefreshContext:
+    """
+    One refresh run. Close it (or use it as a context manager) to flush the
+    writer and quit the browsers.
+    """
+
+    def __init__(self, db_path=DB_PATH, run_id=None, workers=POOL_SIZE, budget=None, driver_factory=None):
+        """
+        :param db_path: SQLite database
+        :param run_id: Shared id for the runs this refresh starts ("refresh-<time>-<pid>" if None)
+        :param workers: Max browsers in the driver pool (started one at a time, as needed)
+        :param budget: Seconds the whole refresh may take (None = no limit), see remaining()
+        :param driver_factory: Callable returning a Selenium driver (Chrome, or FakeDriver when the cache is offline)
+        """
+        self.db_path = db_path
+        self.run_id = run_id or new_run_id("refresh")
+        self.workers = workers
+        self.deadline = None if budget is None else time.time() + budget
+        self.driver_factory = driver_factory or (FakeDriver if get_cache().offline else default_driver)
+        self.queue = JobQueue(db_path)
+        self.writer = BatchWriter(db_path)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def connect(self):
+        """A plain sqlite3 connection for reads and one-off schema changes."""
+        return sqlite3.connect(self.db_path)
+
+    @property
+    def pool(self):
+        """Lazy driver pool: a browser starts only when every started one is borrowed."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = DriverPool(self.driver_factory, self.workers, lazy=True)
+        return self._pool
+
+    @contextmanager
+    def driver(self):
+        """Borrows one browser from the pool."""
+        with self.pool.driver() as d:
+            yield d
+
+    def remaining(self):
+        """Seconds left in the budget (None without one), for refresh_scheduler.plan_refresh."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def open_run(self, source, gpus):
+        """JobQueue.open_run under this refresh's run id. Returns (run_id, resumed)."""
+        return self.queue.open_run(source, gpus, self.run_id)
+
+    def close(self):
+        # Writer first: its commit callbacks mark jobs done in the queue
+        self.writer.close()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self.queue.close()
+
+    def finish(self, script, run_id=None):
+        """Closes the context, writes the dashboard snapshot and saves the run's metrics."""
+        self.close()
+        snapshot.export_after_refresh()
+        get_metrics().finish(script, run_id or self.run_id, self.db_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def store_price_saver(source, condition, label):
+    """
+    save_price for refresh_store: appends the price as a (source, condition)
+    observation, or keeps the last observed price when none was found.
+
+    :param source: price_observations.source, e.g. "ebay"
+    :param condition: "used" or "new"
+    :param label: Shown with the price, e.g. "eBay Avg (Used)"
+    """
+    def save_price(writer, gpu_name, price, run_id=None, on_commit=None):
+        if price is not None:
+            print(f"   -> {label}: ${price}")
+            record_price(writer, gpu_name, source, condition, price, run_id, on_commit)
+        else:
+            print("   -> No valid prices found. Keeping last observed price.")
+            if on_commit:
+                on_commit()
+    return save_price
+
+
+def refresh_store(ctx, job_source, store, build_url, parse, needs_js, save_price,
+                  backend="http", top_k=None, pause=(10, 15), render_wait=fetcher.BROWSER_DELAY):
+    """
+    Refreshes one search page per GPU that is due within the context's time budget.
+    Returns the run id.
+
+    :param ctx: RefreshContext (writer, job queue, driver pool, budget)
+    :param job_source: jobs.source, e.g. "ebay"
+    :param store: Store name for messages, e.g. "eBay"
+    :param build_url: Callable(gpu_name) -> search URL
+    :param parse: Callable(html, gpu_name) -> price or None
+    :param needs_js: Callable(html) -> bool, True for blocked / unrendered pages (the job is
+                     failed and retried later)
+    :param save_price: Callable(writer, gpu_name, price, run_id, on_commit), e.g. store_price_saver(...)
+    :param backend: "http" (concurrent in batches of HTTP_LEASE_BATCH, Selenium only as fallback) or "selenium"
+    :param top_k: Refresh at most this many GPUs (None = as many as fit the budget)
+    :param pause: (min, max) seconds after each browser load on the "selenium" backend
+                  (cache hits go straight through)
+    :param render_wait: (min, max) seconds a page gets to render in the browser, on either backend
+    """
+    conn = ctx.connect()
+    # GPUs ranked by staleness, price volatility and tier; top ones that fit the budget
+    gpu_names = plan_refresh(conn, job_source, ctx.remaining(), top_k)
+    conn.close()
+
+    # Resume an unfinished run, or start a new one
+    queue, writer = ctx.queue, ctx.writer
+    run_id, resumed = ctx.open_run(job_source, gpu_names)
+    if resumed:
+        print(f"Resuming run {run_id} ({queue.counts(run_id).get('done', 0)} GPUs already done).")
+    else:
+        print(f"Found {len(gpu_names)} GPUs due for a refresh.")
+
+    if backend == "http":
+        # Blocked pages fall back to a browser borrowed from the shared pool (started on first use)
+        http = fetcher.AsyncFetcher(driver_pool=ctx, cache=get_cache(), browser_delay=render_wait)
+        count = 0
+        retried = True
+        try:
+            while retried:
+                # Jobs that fail back to pending while their batch is scraped are picked up by another pass
+                retried = False
+                leases = queue.iter_jobs(run_id, job_source)
+                # Leased a batch at a time, so every job of a batch is scraped well within its lease
+                while True:
+                    jobs = {job.gpu: job for job in itertools.islice(leases, HTTP_LEASE_BATCH)}
+                    if not jobs:
+                        break
+                    failed = []
+
+                    def on_result(done, name, price, error):
+                        print(f"[{count + done}] Processed: {name}")
+                        if error is not None:
+                            # Not loaded (or still blocked): retried with backoff, not marked done
+                            print(f"  Error scraping {store}: {error}")
+                            failed.append(queue.fail(jobs[name], error))
+                            return
+                        # The job only counts as done once its price is committed
+                        save_price(writer, name, price, run_id, lambda job=jobs[name]: queue.complete(job))
+
+                    fetcher.scrape_many(list(jobs), build_url, parse, needs_js=needs_js,
+                                        on_result=on_result, fetcher=http)
+                    count += len(jobs)
+                    retried = any(failed) or retried
+        finally:
+            http.close()
+        return run_id
+
+    with ctx.driver() as driver:
+        start = time.perf_counter()
+        count = 0
+
+        def fetch(job, _):
+            url, error = build_url(job.gpu), None
+            try:
+                html, fetched = fetcher.fetch_in_browser(driver, url, needs_js, render_wait, get_cache())
+            except Exception as e:
+                html, fetched, error = None, True, e
+            if fetched:
+                get_metrics().sleep(random.uniform(*pause))
+            if html is None or needs_js(html):
+                raise fetcher.FetchError(f"could not load {url}" + (f": {error}" if error else ""))
+            return html
+
+        def parse_page(job, html):
+            with get_metrics().timer("parse"):
+                return parse(html, job.gpu)
+
+        # The browser loads the next GPU while this one is parsed and written;
+        # a job is only leased once the fetch stage is ready for it
+        stages = [Stage("fetch", fetch, queue_size=1), Stage("parse", parse_page)]
+        retried = True
+        while retried:
+            # A job failed back to pending after the last lease was taken is picked up by another pass
+            retried = False
+            results = run_pipeline(queue.iter_jobs(run_id, job_source), stages)
+            try:
+                for job, price, error in results:
+                    count += 1
+                    print(f"[{count}] Processed: {job.gpu}")
+                    if error is not None:
+                        print(f"  Error scraping {store}: {error}")
+                        retried = queue.fail(job, error) or retried
+                        continue
+                    save_price(writer, job.gpu, price, run_id, lambda job=job: queue.complete(job))
+            finally:
+                results.close()
+        elapsed = time.perf_counter() - start
+        print(f"Fetched {count} GPUs in {elapsed:.1f}s ({count / (elapsed / 60):.1f} GPUs/min)")
+    return run_id
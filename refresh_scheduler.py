@@ -0,0 +1,126 @@
+import math
+import sqlite3
+import sys
+import time
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+
+TARGET_AGE_HOURS = 24         # A price this old counts as "due" (staleness 1.0)
+MAX_STALENESS = 10            # Cap so never-seen GPUs don't drown out everything else
+NEVER_SEEN_HOURS = 24 * 30    # Age assumed for GPUs with no observation yet
+VOLATILITY_WINDOW_DAYS = 30   # Price variance is measured over this window
+VOLATILITY_WEIGHT = 5         # How much a volatile price speeds up staleness
+
+# Popular tiers get refreshed first; discontinued low-end cards rarely move
+TIER_WEIGHTS = {"Low": 0.6, "Low-Mid": 1.0, "High-Mid": 1.2, "High": 1.2, "Ultra-High": 1.0}
+DEFAULT_TIER_WEIGHT = 0.5
+
+# Job source -> price_observations sources it refreshes, and a fallback cost per GPU
+SOURCE_MAP = {
+    "ebay": ("ebay",),
+    "amazon": ("amazon",),
+    "stores": ("retail", "ebay"),
+}
+DEFAULT_SECONDS_PER_GPU = {"ebay": 3.0, "amazon": 3.0, "stores": 40.0}
+
+
+def priority(age_hours, volatility, tier):
+    """
+    Refresh priority: staleness (age / TARGET_AGE_HOURS, capped), boosted by
+    recent price volatility (coefficient of variation) and weighted by tier.
+    """
+    staleness = min(age_hours / TARGET_AGE_HOURS, MAX_STALENESS)
+    return TIER_WEIGHTS.get(tier, DEFAULT_TIER_WEIGHT) * staleness * (1 + VOLATILITY_WEIGHT * volatility)
+
+
+def rank_gpus(conn, job_source, now=None):
+    """
+    Returns [(gpu, score, age_hours, volatility)] sorted by priority, highest first.
+
+    :param conn: sqlite3 connection to gpus.db
+    :param job_source: "ebay", "amazon" or "stores"
+    :param now: Unix time to rank at (defaults to now)
+    """
+    now = time.time() if now is None else now
+    sources = SOURCE_MAP[job_source]
+    marks = ",".join("?" * len(sources))
+    has_obs = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'price_observations'").fetchone()
+
+    if has_obs:
+        rows = conn.execute(f"""
+            SELECT g.name, g.tier,
+                   (SELECT MAX(o.observed_at) FROM price_observations o
+                     WHERE o.gpu = g.name AND o.source IN ({marks})) AS last_seen,
+                   COUNT(w.price), AVG(w.price), AVG(w.price * w.price)
+            FROM gpus g
+            LEFT JOIN price_observations w
+              ON w.gpu = g.name AND w.source IN ({marks}) AND w.observed_at >= ?
+            GROUP BY g.name
+        """, (*sources, *sources, now - VOLATILITY_WINDOW_DAYS * 86400)).fetchall()
+    else:
+        rows = [(name, tier, None, 0, None, None) for name, tier in conn.execute("SELECT name, tier FROM gpus")]
+
+    ranked = []
+    for name, tier, last_seen, n, avg, avg_sq in rows:
+        age_hours = (now - last_seen) / 3600 if last_seen else NEVER_SEEN_HOURS
+        volatility = 0.0
+        if n >= 2 and avg:
+            volatility = math.sqrt(max(avg_sq - avg * avg, 0.0)) / avg
+        ranked.append((name, priority(age_hours, volatility, tier), age_hours, volatility))
+
+    ranked.sort(key=lambda r: r[1], reverse=True)
+    return ranked
+
+
+def seconds_per_gpu(conn, job_source):
+    """
+    Average wall-clock cost per GPU from the last finished run in the jobs table,
+    or DEFAULT_SECONDS_PER_GPU if there is none.
+    """
+    has_jobs = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs'").fetchone()
+    if has_jobs:
+        row = conn.execute("""
+            SELECT (MAX(updated_at) - MIN(updated_at)) / COUNT(*), COUNT(*) FROM jobs
+            WHERE run_id = (SELECT run_id FROM jobs WHERE source = ? GROUP BY run_id
+                            HAVING SUM(state IN ('pending', 'leased')) = 0
+                            ORDER BY MAX(id) DESC LIMIT 1)
+              AND source = ? AND state = 'done'
+        """, (job_source, job_source)).fetchone()
+        if row and row[1] and row[1] >= 5 and row[0]:
+            return row[0]
+    return DEFAULT_SECONDS_PER_GPU[job_source]
+
+
+def plan_refresh(conn, job_source, budget_seconds=None, top_k=None, now=None):
+    """
+    Picks the GPUs to refresh this run: the highest-priority ones that fit in the
+    time budget (and top_k, if given). With neither limit, every GPU is returned
+    in priority order.
+
+    :param conn: sqlite3 connection to gpus.db
+    :param job_source: "ebay", "amazon" or "stores"
+    :param budget_seconds: Wall-clock budget for the run
+    :param top_k: Max GPUs regardless of budget
+    :param now: Unix time to rank at
+    """
+    ranked = rank_gpus(conn, job_source, now)
+    k = len(ranked)
+    if budget_seconds is not None:
+        k = min(k, max(1, int(budget_seconds / seconds_per_gpu(conn, job_source))))
+    if top_k is not None:
+        k = min(k, top_k)
+    return [name for name, *_ in ranked[:k]]
+
+
+if __name__ == "__main__":
+    # python refresh_scheduler.py [source] [budget_seconds]
+    source = sys.argv[1] if len(sys.argv) > 1 else "ebay"
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    conn = sqlite3.connect(DB_PATH)
+    plan = set(plan_refresh(conn, source, budget))
+    print(f"{len(plan)} GPUs planned for '{source}' (~{seconds_per_gpu(conn, source):.1f}s each)")
+    for name, score, age, vol in rank_gpus(conn, source)[:25]:
+        mark = "*" if name in plan else " "
+        print(f" {mark} {score:7.2f}  age {age:7.1f}h  vol {vol:5.2f}  {name}")
+    conn.close()
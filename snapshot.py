@@ -0,0 +1,121 @@
+"""
+Columnar snapshot of the analyzed dataset for fast dashboard / API start-up.
+
+After a refresh, write_snapshot() saves analysis.get_analyzed_df() to an
+Arrow IPC file (uncompressed, so it can be memory-mapped) with typed columns
+and the data version and GPU count in the schema metadata. load_analyzed()
+maps that file when its version matches meta.data_version and falls back to
+SQLite otherwise, so a stale or missing snapshot only costs speed.
+
+Usage:
+    python snapshot.py [--db gpus.db] [--out gpus_analyzed.arrow]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+
+import analysis
+from db_writer import data_version
+
+# --- CONFIGURATION ---
+SNAPSHOT_PATH = "gpus_analyzed.arrow"
+
+
+def _schema_for(df):
+    fields = [pa.field(col, pa.string() if col in analysis.TEXT_COLUMNS else pa.float64())
+              for col in df.columns]
+    return pa.schema(fields)
+
+
+def write_snapshot(path=SNAPSHOT_PATH):
+    """
+    Writes the analyzed dataset of analysis.DB_PATH to an Arrow IPC file (atomically)
+    and returns its data version.
+
+    :param path: Snapshot file
+    """
+    # Read the version first: a write landing mid-export leaves the snapshot
+    # labelled older than its contents, so it is redone rather than trusted
+    version = data_version(analysis.DB_PATH)
+    df, total = analysis.get_analyzed_df(with_total=True)
+
+    schema = _schema_for(df).with_metadata({
+        "data_version": str(version),
+        "total_count": str(total),
+        "written_at": str(time.time()),
+    })
+    # NaN stays NaN (not null) so float columns convert back to pandas without a copy
+    columns = [pa.array(df[col].to_numpy(dtype=object if col in analysis.TEXT_COLUMNS else np.float64),
+                        type=field.type, from_pandas=col in analysis.TEXT_COLUMNS)
+               for col, field in zip(df.columns, schema)]
+    table = pa.Table.from_arrays(columns, schema=schema)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return version
+
+
+def read_snapshot(path=SNAPSHOT_PATH, version=None):
+    """
+    Memory-maps a snapshot. Returns (df, total GPU count, data version), or None
+    when the file is missing, unreadable or not for the given version.
+
+    :param path: Snapshot file
+    :param version: Expected data version (None accepts any)
+    """
+    try:
+        # The table's buffers point into the mapping, which stays open while they are referenced
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    meta = table.schema.metadata or {}
+    snap_version = int(meta.get(b"data_version", -1))
+    if version is not None and snap_version != version:
+        return None
+    return table.to_pandas(), int(meta.get(b"total_count", table.num_rows)), snap_version
+
+
+def load_analyzed(version=None, with_total=False, path=SNAPSHOT_PATH):
+    """
+    Analyzed dataframe from the snapshot when it is current, else from SQLite.
+
+    :param version: Current data version (read from the DB if None)
+    :param with_total: Return (df, number of GPUs in the DB) like get_analyzed_df
+    :param path: Snapshot file
+    """
+    version = data_version(analysis.DB_PATH) if version is None else version
+    snap = read_snapshot(path, version)
+    if snap is None:
+        return analysis.get_analyzed_df(with_total=with_total)
+    df, total, _ = snap
+    return (df, total) if with_total else df
+
+
+def export_after_refresh(path=SNAPSHOT_PATH):
+    """Snapshot stage for the end of a scrape; failures are reported, never raised."""
+    try:
+        start = time.perf_counter()
+        version = write_snapshot(path)
+        print(f"Snapshot for data version {version} written to {path} in {time.perf_counter() - start:.2f}s.")
+    except Exception as e:
+        print(f"    [!] Snapshot export failed: {e}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=analysis.DB_PATH)
+    ap.add_argument("--out", default=SNAPSHOT_PATH)
+    args = ap.parse_args()
+
+    analysis.DB_PATH = args.db
+    export_after_refresh(args.out)
+    start = time.perf_counter()
+    snap = read_snapshot(args.out)
+    if snap is not None:
+        print(f"Read back {len(snap[0])} GPUs in {(time.perf_counter() - start) * 1000:.1f} ms.")
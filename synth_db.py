@@ -0,0 +1,136 @@
+"""
+Synthetic gpus.db generator for benchmarks.
+
+Writes a database with the same gpus schema as the real one (plus
+price_observations and the gpu_prices_latest view) at any size. Value
+distributions and NULL patterns follow the real catalog: older / legacy cards
+are the ones missing launch prices and new prices, the newest cards have no
+used sales yet, cards without a benchmark have no tier, and a few prices are
+junk below the $50 cut-off.
+
+Usage:
+    python synth_db.py out.db [--gpus 100000] [--observations 5] [--seed 0]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from price_history import ensure_schema
+
+# --- CONFIGURATION ---
+CHUNK = 50000
+HISTORY_DAYS = 90
+TIER_EDGES = [45, 100, 160, 230]   # rel_performance cut points, roughly what the tiering gives on the real data
+TIER_NAMES = np.array(['Low', 'Low-Mid', 'High-Mid', 'High', 'Ultra-High'])
+
+SCHEMA = """
+    CREATE TABLE gpus (
+        name TEXT PRIMARY KEY,
+        launch_prices REAL,
+        driver_support TEXT,
+        new_avg REAL,
+        ebay_used_avg REAL,
+        rel_performance REAL,
+        tier TEXT
+    )
+"""
+
+
+def _nullify(values, mask):
+    out = values.astype(object)
+    out[mask] = None
+    return out
+
+
+def generate_gpus(n, rng):
+    """Column arrays for n synthetic GPUs."""
+    perf = np.clip(rng.lognormal(mean=4.4, sigma=0.75, size=n), 1, 450).round()
+    age = rng.uniform(0, 12, n)   # Years since launch
+    legacy = age > 7
+    launch = (perf * rng.uniform(4, 12, n) + 50).round()
+    new = (launch * rng.uniform(0.6, 1.4, n) * np.where(legacy, 0.5, 1.0)).round(2)
+    used = (new * rng.uniform(0.4, 0.9, n)).round(2)
+
+    # Junk prices (cables, boxes, broken cards) that the analysis has to drop
+    junk = rng.random(n) < 0.01
+    used[junk] = rng.uniform(10, 49, junk.sum()).round(2)
+
+    no_perf = rng.random(n) < 0.05
+    tier = TIER_NAMES[np.searchsorted(TIER_EDGES, perf)]
+    return {
+        "name": [f"Synthetic GPU {i:07d}" for i in range(n)],
+        "launch_prices": _nullify(launch, rng.random(n) < np.where(legacy, 0.15, 0.03)),
+        "driver_support": _nullify(np.where(legacy, "Legacy", "Active"), rng.random(n) < 0.006),
+        "new_avg": _nullify(new, rng.random(n) < np.where(legacy, 0.06, 0.015)),
+        "ebay_used_avg": _nullify(used, rng.random(n) < np.where(age < 1, 0.4, 0.04)),
+        "rel_performance": _nullify(perf, no_perf),
+        "tier": _nullify(tier, no_perf),
+    }
+
+
+def generate(path, gpus=100000, observations=5, seed=0):
+    """
+    Creates a synthetic database at path (replacing it).
+
+    :param path: Output SQLite file
+    :param gpus: Number of GPUs
+    :param observations: Average price observations per GPU (0 for none)
+    :param seed: Random seed
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+    cols = generate_gpus(gpus, rng)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute(SCHEMA)
+    names = list(cols)
+    conn.executemany(f"INSERT INTO gpus ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                     zip(*(cols[c] for c in names)))
+    conn.commit()
+
+    if observations:
+        ensure_schema(conn)
+        now = time.time()
+        base = {"ebay": np.array([v if v is not None else np.nan for v in cols["ebay_used_avg"]], dtype=float),
+                "amazon": np.array([v if v is not None else np.nan for v in cols["new_avg"]], dtype=float)}
+        base["retail"] = base["amazon"]
+        conditions = {"ebay": "used", "amazon": "new", "retail": "new"}
+        sources = np.array(list(conditions))
+
+        for start in range(0, gpus, CHUNK):
+            idx = np.arange(start, min(start + CHUNK, gpus))
+            counts = rng.poisson(observations, len(idx))
+            gpu_idx = np.repeat(idx, counts)
+            source = sources[rng.integers(0, len(sources), len(gpu_idx))]
+            price = np.empty(len(gpu_idx))
+            for s in sources:
+                m = source == s
+                price[m] = base[s][gpu_idx[m]] * rng.normal(1.0, 0.08, m.sum())
+            keep = np.isfinite(price)
+            observed = now - rng.uniform(0, HISTORY_DAYS * 86400, len(gpu_idx))
+            conn.executemany(
+                "INSERT INTO price_observations (gpu, source, condition, price, observed_at, run_id) VALUES (?, ?, ?, ?, ?, ?)",
+                ((cols["name"][g], s, conditions[s], round(float(p), 2), float(t), "synthetic")
+                 for g, s, p, t in zip(gpu_idx[keep], source[keep], price[keep], observed[keep])),
+            )
+            conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path")
+    ap.add_argument("--gpus", type=int, default=100000)
+    ap.add_argument("--observations", type=float, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    generate(args.path, args.gpus, args.observations, args.seed)
+    print(f"Wrote {args.path}: {args.gpus} GPUs in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,207 @@
+"""
+Exact 1-D k-means for the performance tiers.
+
+K-means on one column has a globally optimal answer that can be found
+directly: after sorting, every cluster is a contiguous run of values, so the
+best k-segmentation follows from a dynamic program over prefix sums. Each DP
+layer is solved with the divide-and-conquer optimisation (the best split point
+never moves left as the prefix grows), giving O(k * n log n) time. The
+recursion is run one level at a time over all subproblems at once, so each
+level is a handful of numpy operations.
+
+Equal values always share a cluster, so the DP runs on the distinct values
+with their counts as weights. rel_performance has few distinct values, which
+makes a refit cheap and independent of the number of GPUs. That is what
+Tiering.add uses to re-tier after a single GPU is added.
+
+Usage:
+    python tiering.py [--db gpus.db]
+"""
+import argparse
+import bisect
+import sqlite3
+
+import numpy as np
+
+# --- CONFIGURATION ---
+DB_PATH = "gpus.db"
+TIER_NAMES = ['Low', 'Low-Mid', 'High-Mid', 'High', 'Ultra-High']
+
+
+def _layer(prev, cost, m, n):
+    """
+    One DP layer: best[i] = min over m <= j <= i of prev[j - 1] + cost(j, i), for i in [m, n).
+    Returns (best, split) with split[i] the smallest optimal j.
+    """
+    best = np.full(n, np.inf)
+    split = np.zeros(n, dtype=np.int64)
+    # Open subproblems: rows lo..hi whose split point lies in opt_lo..opt_hi
+    lo, hi = np.array([m]), np.array([n - 1])
+    opt_lo, opt_hi = np.array([m]), np.array([n - 1])
+    while len(lo):
+        mid = (lo + hi) // 2
+        top = np.minimum(mid, opt_hi)
+        counts = top - opt_lo + 1
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        task = np.repeat(np.arange(len(mid)), counts)
+        j = opt_lo[task] + (np.arange(counts.sum()) - starts[task])
+        i = mid[task]
+        vals = prev[j - 1] + cost(j, i)
+
+        seg_min = np.minimum.reduceat(vals, starts)
+        first = np.where(vals <= seg_min[task], j, np.iinfo(np.int64).max)
+        arg = np.minimum.reduceat(first, starts)
+        best[mid] = seg_min
+        split[mid] = arg
+
+        left = lo <= mid - 1
+        right = mid + 1 <= hi
+        lo, hi, opt_lo, opt_hi = (np.concatenate((lo[left], mid[right] + 1)),
+                                  np.concatenate((mid[left] - 1, hi[right])),
+                                  np.concatenate((opt_lo[left], arg[right])),
+                                  np.concatenate((arg[left], opt_hi[right])))
+    return best, split
+
+
+def optimal_segments(values, k, weights=None):
+    """
+    Globally optimal k-means segmentation of sorted 1-D data.
+
+    Returns (starts, sse): starts[c] is the index of the first value in cluster c
+    (starts[0] == 0), sse the total within-cluster sum of squares.
+
+    :param values: Sorted values
+    :param k: Number of clusters (capped at the number of values)
+    :param weights: Optional weight per value (e.g. duplicate counts)
+    """
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), 0.0
+    k = max(1, min(k, n))
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+
+    # Centre the values so the prefix sums of squares keep their precision
+    x = x - np.average(x, weights=w)
+    W = np.concatenate(([0.0], np.cumsum(w)))
+    S = np.concatenate(([0.0], np.cumsum(w * x)))
+    Q = np.concatenate(([0.0], np.cumsum(w * x * x)))
+
+    def cost(j, i):
+        # Weighted SSE of values j..i (inclusive)
+        cw = W[i + 1] - W[j]
+        cs = S[i + 1] - S[j]
+        return np.maximum(Q[i + 1] - Q[j] - cs * cs / cw, 0.0)
+
+    idx = np.arange(n)
+    best = cost(np.zeros(n, dtype=np.int64), idx)
+    splits = []
+    for m in range(1, k):
+        best, split = _layer(best, cost, m, n)
+        splits.append(split)
+
+    starts = [0] * k
+    i = n - 1
+    for m in range(k - 1, 0, -1):
+        starts[m] = int(splits[m - 1][i])
+        i = starts[m] - 1
+    return np.array(starts, dtype=np.int64), float(best[n - 1])
+
+
+def thresholds(values, k, weights=None):
+    """
+    Lower bound of every cluster but the first, for assign().
+
+    :param values: Sorted values
+    :param k: Number of clusters
+    :param weights: Optional weight per value
+    """
+    starts, _ = optimal_segments(values, k, weights)
+    return np.asarray(values, dtype=float)[starts[1:]]
+
+
+def assign(values, bounds):
+    """Cluster index (0 = lowest) of each value, given thresholds()."""
+    return np.searchsorted(bounds, values, side="right")
+
+
+class Tiering:
+    """
+    Optimal tiers over a changing set of values.
+
+    Keeps the distinct values with their counts, so adding a GPU only touches
+    the DP over distinct values (not every GPU) and reports which value range
+    changed tier.
+    """
+
+    def __init__(self, values=(), k=len(TIER_NAMES), names=TIER_NAMES):
+        self.k = k
+        self.names = list(names)
+        uniq, counts = np.unique(np.asarray(values, dtype=float), return_counts=True)
+        self.values = uniq.tolist()
+        self.counts = counts.tolist()
+        self.bounds = np.zeros(0)
+        self.sse = 0.0
+        self.refit()
+
+    def refit(self):
+        starts, self.sse = optimal_segments(self.values, self.k, self.counts)
+        self.bounds = np.asarray(self.values, dtype=float)[starts[1:]]
+        return self.bounds
+
+    def tier_of(self, value):
+        """Tier name of a value under the current fit."""
+        return self.names[int(assign(value, self.bounds))]
+
+    def labels(self, values):
+        """Tier names for an array of values."""
+        return np.asarray(self.names, dtype=object)[assign(np.asarray(values, dtype=float), self.bounds)]
+
+    def add(self, value):
+        """
+        Adds one value and refits.
+
+        Returns (tier name of the value, changed) where changed lists (low, high,
+        new tier) value ranges whose tier moved because the boundaries shifted
+        (low inclusive, high exclusive). Nothing else needs rewriting.
+
+        :param value: New GPU's rel_performance
+        """
+        value = float(value)
+        pos = bisect.bisect_left(self.values, value)
+        if pos < len(self.values) and self.values[pos] == value:
+            self.counts[pos] += 1
+        else:
+            self.values.insert(pos, value)
+            self.counts.insert(pos, 1)
+
+        old = self.bounds
+        new = self.refit()
+        changed = []
+        if len(old) == len(new):
+            for c, (a, b) in enumerate(zip(old, new)):
+                if a != b:
+                    # Values in [min, max) crossed boundary c; they now sit below / above it
+                    lo, hi = min(a, b), max(a, b)
+                    changed.append((lo, hi, self.names[c] if b > a else self.names[c + 1]))
+        else:
+            changed.append((-np.inf, np.inf, None))  # Cluster count changed: everything may move
+        return self.tier_of(value), changed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    perf = [r[0] for r in conn.execute("SELECT rel_performance FROM gpus WHERE rel_performance IS NOT NULL")]
+    conn.close()
+
+    model = Tiering(perf)
+    tiers = model.labels(perf)
+    for name in model.names:
+        members = [p for p, t in zip(perf, tiers) if t == name]
+        if members:
+            print(f"{name:12s} {min(members):8.1f} .. {max(members):8.1f}  ({len(members)} GPUs)")
+    print(f"Within-tier SSE: {model.sse:.1f}")